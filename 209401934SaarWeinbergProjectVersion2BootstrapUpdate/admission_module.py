@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Admission control for test jobs, based on a per-job cost model.
+
+A job's cost is estimated from its size: bits per sample (the bound's
+bit length) times samples, times sequences for second-level runs. Memory
+follows the app's in-memory representation of the bits and values;
+CPU-seconds are generation time, from each generator's measured
+throughput (an exponential moving average of seconds per sample,
+starting from a prior), plus analysis time per bit and test.
+
+Budgets on memory, CPU-seconds and concurrent jobs apply per client (its
+queued and running jobs) and globally (running jobs). A job that alone
+exceeds a budget is reduced to the largest sample count that fits, if
+the caller allows it, or rejected with its estimate. A job over its
+client's budget is rejected until the client's earlier jobs finish. A
+job over the global budget waits in the queue until running jobs free
+enough capacity.
+"""
+
+import math
+import threading
+
+# Prior seconds per sample, before any run of the generator has been measured.
+DEFAULT_SECONDS_PER_SAMPLE = {
+    'pythonrand': 2e-6,
+    'time': 1e-4,
+    'javathreads': 0.1,  # one JVM launch per value
+    'mix': 0.05,
+    'sound': 0.1,  # four 1024-frame reads at 44.1 kHz
+}
+UNKNOWN_SECONDS_PER_SAMPLE = 0.01
+
+# Memory per generated bit (a one-character str per bit in a list, plus packed and
+# array copies made during analysis) and per sample (the int object and its slot).
+MEMORY_PER_BIT = 16
+MEMORY_PER_SAMPLE = 40
+# Analysis CPU time per bit for one test.
+ANALYSIS_SECONDS_PER_BIT = 5e-8
+
+RESOURCES = ('memory_bytes', 'cpu_seconds', 'jobs')
+
+class AdmissionRejected(Exception):
+    """Raised by AdmissionController.admit; carries the job's estimate and the reason."""
+    def __init__(self, reason, estimate, max_samples=None):
+        super().__init__(reason)
+        self.reason = reason
+        self.estimate = estimate
+        self.max_samples = max_samples
+
+class AdmissionController:
+    """
+    Cost estimates, per-client and global budgets, and generator throughput
+    history. client_limits and global_limits map 'memory_bytes',
+    'cpu_seconds' and 'jobs' to their budget; a missing key is unlimited.
+    """
+    def __init__(self, client_limits=None, global_limits=None, seconds_per_sample=None,
+                 smoothing=0.2, workers=1):
+        self.client_limits = dict(client_limits or {})
+        self.global_limits = dict(global_limits or {})
+        self.seconds_per_sample = dict(DEFAULT_SECONDS_PER_SAMPLE, **(seconds_per_sample or {}))
+        self.smoothing = smoothing
+        self.workers = workers  # processes a second-level job runs in at once
+        self._jobs = {}  # job_id -> (client, estimate); admitted, queued or running
+        self._running = set()
+        self._cond = threading.Condition()
+        self.admitted = 0
+        self.reduced = 0
+        self.rejected = 0
+
+    def record_generation(self, generator_name, samples, seconds):
+        """Updates the generator's throughput from a measured run."""
+        if samples <= 0 or seconds < 0:
+            return
+        with self._cond:
+            measured = seconds / samples
+            previous = self.seconds_per_sample.get(generator_name)
+            self.seconds_per_sample[generator_name] = measured if previous is None else (
+                (1 - self.smoothing) * previous + self.smoothing * measured)
+
+    def estimate(self, generator_name, upper_bound, samples, tests=1, sequences=1, generate=True):
+        """
+        Estimated cost of a job.
+
+        Args:
+            generator_name (str): Generator drawing the samples.
+            upper_bound (int): Bound of the values; its bit length is the bits per sample.
+            samples (int): Samples per sequence.
+            tests (int): Tests run on each sequence.
+            sequences (int): Independent sequences (second-level analysis).
+            generate (bool): False when the job reuses a stored run.
+
+        Returns:
+            dict: bits, memory_bytes, cpu_seconds, generation_seconds and
+            analysis_seconds.
+        """
+        with self._cond:
+            per_sample = self.seconds_per_sample.get(generator_name, UNKNOWN_SECONDS_PER_SAMPLE)
+        bits_per_sample = max(1, int(upper_bound).bit_length())
+        bits = samples * bits_per_sample
+        # Second-level sequences are held by at most `workers` processes at once.
+        concurrent = min(sequences, self.workers) if sequences > 1 else 1
+        generation = samples * sequences * per_sample if generate else 0.0
+        analysis = bits * sequences * max(1, tests) * ANALYSIS_SECONDS_PER_BIT
+        return {
+            'bits': bits * sequences,
+            'memory_bytes': int(concurrent * (bits * MEMORY_PER_BIT + samples * MEMORY_PER_SAMPLE)),
+            'cpu_seconds': generation + analysis,
+            'generation_seconds': generation,
+            'analysis_seconds': analysis,
+            'jobs': 1
+        }
+
+    @staticmethod
+    def _over(usage, estimate, limits):
+        """Resources for which usage plus estimate would exceed limits."""
+        return [r for r in RESOURCES if r in limits and usage.get(r, 0) + estimate[r] > limits[r]]
+
+    @staticmethod
+    def _usage(estimates):
+        estimates = list(estimates)
+        return {r: sum(e[r] for e in estimates) for r in RESOURCES}
+
+    def max_fitting_fraction(self, estimate):
+        """Largest fraction of the job's size (memory and CPU scale with samples) that fits every budget alone."""
+        fraction = 1.0
+        for limits in (self.client_limits, self.global_limits):
+            for resource in ('memory_bytes', 'cpu_seconds'):
+                if resource in limits and estimate[resource] > 0:
+                    fraction = min(fraction, limits[resource] / estimate[resource])
+        return fraction
+
+    def admit(self, job_id, client, estimate, samples=None, allow_reduce=False):
+        """
+        Admits a job for client, or reduces or rejects it.
+
+        Args:
+            job_id (str): The job's ID, released with release().
+            client (str): Client the budget is charged to.
+            estimate (dict): From estimate().
+            samples (int or None): The job's sample count, to work out the
+                largest count that fits when the job is too large.
+            allow_reduce (bool): Return that count for a job too large to
+                fit, instead of rejecting it.
+
+        Returns:
+            int or None: None if admitted as is, or the reduced sample count
+            for a job too large to fit (it is not admitted; estimate and
+            admit it again at that size).
+
+        Raises:
+            AdmissionRejected: If the job cannot fit, or the client's queued
+                and running jobs leave no room for it.
+        """
+        alone = self._over({}, estimate, self.client_limits) + self._over({}, estimate, self.global_limits)
+        if alone:
+            fraction = self.max_fitting_fraction(estimate)
+            max_samples = math.floor(samples * fraction * 0.99) if samples else 0
+            if 'jobs' in alone or max_samples < 1 or not allow_reduce:
+                with self._cond:
+                    self.rejected += 1
+                raise AdmissionRejected(f"Job exceeds the {', '.join(sorted(set(alone)))} budget",
+                                        estimate, max_samples or None)
+            with self._cond:
+                self.reduced += 1
+            return max_samples
+        with self._cond:
+            client_usage = self._usage(e for c, e in self._jobs.values() if c == client)
+            over = self._over(client_usage, estimate, self.client_limits)
+            if over:
+                self.rejected += 1
+                raise AdmissionRejected(f"Client {', '.join(over)} budget in use by earlier jobs; "
+                                        f"try again when they finish", estimate)
+            self._jobs[job_id] = (client, estimate)
+            self.admitted += 1
+        return None
+
+    def _global_usage(self):
+        return self._usage(self._jobs[j][1] for j in self._running)
+
+    def acquire(self, job_id, token=None, on_wait=None, poll_seconds=0.5):
+        """
+        Waits until the admitted job fits the global budget alongside the
+        running jobs, then marks it running.
+
+        Args:
+            job_id (str): An admitted job.
+            token (CancellationToken or None): Waiting ends when cancelled.
+            on_wait (callable or None): Called once with a status message if
+                the job has to wait.
+
+        Returns:
+            bool: True once running, False if cancelled while waiting.
+        """
+        with self._cond:
+            if job_id not in self._jobs:
+                return True  # not admitted here (e.g. admitted before a restart): run unmetered
+            waited = False
+            while True:
+                if token is not None and token.cancelled:
+                    return False
+                over = self._over(self._global_usage(), self._jobs[job_id][1], self.global_limits)
+                if not over:
+                    self._running.add(job_id)
+                    return True
+                if not waited and on_wait is not None:
+                    waited = True
+                    self._cond.release()
+                    try:
+                        on_wait(f"Queued - waiting for server capacity ({', '.join(over)})")
+                    finally:
+                        self._cond.acquire()
+                    continue
+                self._cond.wait(poll_seconds)
+
+    def release(self, job_id):
+        """Returns the job's share of the budgets (finished, failed or cancelled)."""
+        with self._cond:
+            self._jobs.pop(job_id, None)
+            self._running.discard(job_id)
+            self._cond.notify_all()
+
+    def stats(self):
+        """Budgets, their use globally and per client, throughput history and decision counts."""
+        with self._cond:
+            clients = {}
+            for client, estimate in self._jobs.values():
+                usage = clients.setdefault(client, dict.fromkeys(RESOURCES, 0))
+                for r in RESOURCES:
+                    usage[r] += estimate[r]
+            return {
+                'client_limits': dict(self.client_limits),
+                'global_limits': dict(self.global_limits),
+                'running': self._global_usage(),
+                'clients': clients,
+                'seconds_per_sample': dict(self.seconds_per_sample),
+                'admitted': self.admitted,
+                'reduced': self.reduced,
+                'rejected': self.rejected
+            }
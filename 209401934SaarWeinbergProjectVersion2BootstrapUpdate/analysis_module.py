@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+Table-driven registry of the tests the app can run on a generated
+sequence, and multi-test battery runs over one sequence.
+
+Each entry knows how to run its test on a SequenceData (bits, values,
+bound and sample count), which parameters it takes by default, and how
+to describe its result in one line. run_suite runs a list of
+(test, params) specs on the same data, so a battery of tests costs one
+generation; tests the parallel battery supports with their default
+parameters run in worker processes, the rest in the calling thread.
+"""
+
+import json
+import logging
+from collections import namedtuple
+
+import battery_module
+import ent_module
+import entropy_module
+import integer_tests_module
+import repetition_module
+import tests_module
+from second_level_module import P_VALUE_TESTS
+
+# One generated sequence: its bits, the integers they came from, the bound and the sample count.
+SequenceData = namedtuple('SequenceData', ['bits', 'values', 'upper_bound', 'samples'])
+
+def _verdict(result):
+    return 'PASS' if result['passed'] else 'FAIL'
+
+def _patterns(result):
+    return ", ".join(f"{k}:{v}" for k, v in result['pattern_counts'].items())
+
+def _describe_frequency(result):
+    return (f"0s={result['zeros']}, 1s={result['ones']}, "
+            f"p-value={result['p-value']:.4f}, {_verdict(result)}")
+
+def _describe_runs(result):
+    return (f"{result['runs']} runs (expected={result['expected_runs']:.2f}), "
+            f"z-score={result['z-value']:.2f}, {_verdict(result)} "
+            f"(0s={result['n0']}, 1s={result['n1']})")
+
+def _describe_chi2(result):
+    return (f"X^2={result['chi2']:.2f}, p-value={result['p-value']:.3g}, "
+            f"{_verdict(result)} ({result['N']} groups analyzed)")
+
+def _describe_serial(result):
+    return (f"X^2={result['chi2']:.2f}, p-value={result['p-value']:.3g}, "
+            f"{_verdict(result)} (Patterns: {_patterns(result)})")
+
+def _describe_autocorrelation(result):
+    return (f"r={result['autocorrelation']:.3f}, z-score={result['z']:.2f}, "
+            f"p-value={result['p-value']:.3g}, {_verdict(result)}")
+
+def _describe_poker(result):
+    return (f"X^2={result['chi2']:.2f}, p-value={result['p-value']:.3g}, {_verdict(result)} "
+            f"({result['num_groups']} groups, patterns: {_patterns(result)})")
+
+def _describe_maurer(result):
+    return (f"fn={result['fn']:.3f}, expected={result['expected']:.3f}, "
+            f"z-score={result['z']:.2f}, p-value={result['p-value']:.3g}, {_verdict(result)} "
+            f"(L={result['L']}, K={result['K']} blocks)")
+
+def _describe_min_entropy(result):
+    text = f"{result['min-entropy']:.4f} bits per bit"
+    if 'min-entropy_per_sample' in result:
+        text += f", {result['min-entropy_per_sample']:.2f} bits per sample"
+    return text + f" (limited by {result['limiting_estimator']}, n={result['n']} bits)"
+
+def _describe_ent(result):
+    return (f"entropy={result['entropy']:.4f} bits/byte, "
+            f"X^2={result['chi2']:.2f} (p-value={result['p-value']:.3g}), "
+            f"mean={result['mean']:.3f}, pi={result['monte_carlo_pi']:.5f} "
+            f"(error {result['pi_error_percent']:.2f}%), "
+            f"serial correlation={result['serial_correlation']:.5f}, "
+            f"{_verdict(result)} ({result['N']} bytes)")
+
+def _describe_bit_positions(result):
+    worst = result['worst_position']
+    return (f"width={result['width']} bits, most biased position={worst} "
+            f"(frequency {result['frequencies'][worst]:.4f}, "
+            f"expected {result['expected_frequencies'][worst]:.4f}), "
+            f"most correlated pair={result['worst_pair']}, "
+            f"corrected p-value={result['p-value']:.3g}, {_verdict(result)} ({result['N']} values)")
+
+def _describe_repetition(result):
+    return (f"{result['repeats']} repeats, expected {result['expected_repeats']:.3g} (birthday bound), "
+            f"p-value={result['p-value']:.3g}, {_verdict(result)} ({result['N']} values)")
+
+def _describe_birthday_spacings(result):
+    return (f"X^2={result['chi2']:.2f}, p-value={result['p-value']:.3g}, {_verdict(result)} "
+            f"({result['batches']} batches of {result['birthdays']} birthdays, "
+            f"mean repeats={result['mean_repeats']:.3f}, expected {result['lambda']:.3f})")
+
+def _describe_permutations(result):
+    return (f"statistic={result['statistic']:.2f} (df={result['df']}), p-value={result['p-value']:.3g}, "
+            f"{_verdict(result)} ({result['windows']} windows of {result['t']}, "
+            f"tie rate={result['tie_rate']:.3g})")
+
+def _describe_parking_lot(result):
+    mean = sum(result['parked']) / len(result['parked'])
+    return (f"{mean:.1f} cars parked on average (expected 3523), p-value={result['p-value']:.3g}, "
+            f"{_verdict(result)} ({result['runs']} runs)")
+
+def _describe_nearest_neighbour(result):
+    return (f"smallest distance={min(result['min_distance']):.4g}, p-value={result['p-value']:.3g}, "
+            f"{_verdict(result)} ({result['runs']} runs of {result['points']} points, "
+            f"{result['duplicate_points']} with duplicate points)")
+
+def _describe_equidistribution(result):
+    return (f"X^2={result['chi2']:.2f}, p-value={result['p-value']:.3g}, {_verdict(result)} "
+            f"({result['N']} values in {result['bins']} buckets, "
+            f"largest deviation={result['max_deviation']:.2f} sigma)")
+
+def _describe_gap(result):
+    return (f"X^2={result['chi2']:.2f}, p-value={result['p-value']:.3g}, {_verdict(result)} "
+            f"({result['gaps']} gaps, lengths {result['max_gap']} and more in one class)")
+
+def _describe_coupon_collector(result):
+    return (f"X^2={result['chi2']:.2f}, p-value={result['p-value']:.3g}, {_verdict(result)} "
+            f"({result['segments']} segments over {result['categories']} categories)")
+
+def _describe_runs_up(result):
+    return (f"statistic={result['statistic']:.2f}, p-value={result['p-value']:.3g}, {_verdict(result)} "
+            f"(runs of length 1-5 and 6+: {result['run_counts']}, n={result['n']})")
+
+def _describe_runs_up_down(result):
+    return (f"{result['runs']} runs (expected={result['expected_runs']:.2f}), "
+            f"z-score={result['z-value']:.2f}, p-value={result['p-value']:.3g}, {_verdict(result)} "
+            f"({result['ties']} ties)")
+
+def _describe_p_value(result):
+    return f"p-value={result['p-value']:.4g}, {_verdict(result)}"
+
+class RegisteredTest:
+    """
+    One registry entry. run(data, **params) calls the test with its
+    default parameters overridden by params; describe(result) formats a
+    successful result.
+    """
+    def __init__(self, label, run, describe=_describe_p_value, defaults=None):
+        self.label = label
+        self._run = run
+        self.describe = describe
+        self.defaults = dict(defaults or {})
+
+    def run(self, data, **params):
+        return self._run(data, **dict(self.defaults, **params))
+
+def _on_bits(test):
+    return lambda data, **params: test(data.bits, **params)
+
+def _on_values(test):
+    return lambda data, **params: test(data.values, data.upper_bound, **params)
+
+def _on_stream(test):
+    return lambda data, **params: test(data.values, **params)
+
+def _min_entropy(data, **params):
+    params.setdefault('bits_per_sample', len(data.bits) / data.samples if data.samples else None)
+    return entropy_module.min_entropy_test(data.bits, **params)
+
+def _ent(data, **params):
+    return ent_module.ent_test(ent_module.values_to_bytes(data.values, data.upper_bound), **params)
+
+# Every test the app can run, keyed by the app's test_type names.
+TESTS = {
+    'frequency': RegisteredTest("Frequency Test", _on_bits(tests_module.frequency_test),
+                                _describe_frequency),
+    'runs': RegisteredTest("Runs Test", _on_bits(P_VALUE_TESTS['runs']), _describe_runs),
+    'freq_byte': RegisteredTest("Chi-Square Test (bytes)", _on_bits(tests_module.chi_squared_full_test),
+                                _describe_chi2, {'group_size': 8}),
+    'serial2': RegisteredTest("Serial Test (pairs)", _on_bits(tests_module.serial_test),
+                              _describe_serial, {'group_size': 2}),
+    'serial3': RegisteredTest("Serial Test (triplets)", _on_bits(tests_module.serial_test),
+                              _describe_serial, {'group_size': 3}),
+    'autocorr1': RegisteredTest("Autocorrelation Test (lag=1)", _on_bits(tests_module.autocorrelation_test),
+                                _describe_autocorrelation, {'lag': 1}),
+    'autocorr2': RegisteredTest("Autocorrelation Test (lag=2)", _on_bits(tests_module.autocorrelation_test),
+                                _describe_autocorrelation, {'lag': 2}),
+    'poker4': RegisteredTest("Poker Test (4-bit)", _on_bits(tests_module.poker_test),
+                             _describe_poker, {'group_size': 4}),
+    'poker5': RegisteredTest("Poker Test (5-bit)", _on_bits(tests_module.poker_test),
+                             _describe_poker, {'group_size': 5}),
+    'maurer7': RegisteredTest("Maurer's Universal Test", _on_bits(tests_module.maurer_universal_test),
+                              _describe_maurer, {'L': 7}),
+    'block_frequency': RegisteredTest("Block Frequency Test", _on_bits(tests_module.block_frequency_test)),
+    'longest_run': RegisteredTest("Longest Run of Ones Test", _on_bits(tests_module.longest_run_test)),
+    'random_excursions': RegisteredTest("Random Excursions Test",
+                                        _on_bits(tests_module.random_excursions_test)),
+    'random_excursions_variant': RegisteredTest("Random Excursions Variant Test",
+                                                _on_bits(tests_module.random_excursions_variant_test)),
+    'min_entropy': RegisteredTest("Min-Entropy (SP 800-90B)", _min_entropy, _describe_min_entropy),
+    'ent': RegisteredTest("ENT Byte Statistics", _ent, _describe_ent),
+    'bit_positions': RegisteredTest("Bit Position Bias", _on_values(integer_tests_module.bit_position_test),
+                                    _describe_bit_positions),
+    'repetition': RegisteredTest("Repeated Outputs", _on_values(repetition_module.repetition_test),
+                                 _describe_repetition),
+    'birthday_spacings': RegisteredTest("Birthday Spacings Test",
+                                        _on_values(integer_tests_module.birthday_spacings_test),
+                                        _describe_birthday_spacings),
+    'overlapping_permutations': RegisteredTest("Overlapping Permutations Test",
+                                               _on_stream(integer_tests_module.overlapping_permutations_test),
+                                               _describe_permutations),
+    'parking_lot': RegisteredTest("Parking Lot Test", _on_values(integer_tests_module.parking_lot_test),
+                                  _describe_parking_lot),
+    'minimum_distance': RegisteredTest("Minimum Distance Test",
+                                       _on_values(integer_tests_module.minimum_distance_test),
+                                       _describe_nearest_neighbour),
+    'spheres_3d': RegisteredTest("3D Spheres Test", _on_values(integer_tests_module.spheres_3d_test),
+                                 _describe_nearest_neighbour),
+    'equidistribution': RegisteredTest("Equidistribution Test",
+                                       _on_values(integer_tests_module.equidistribution_test),
+                                       _describe_equidistribution),
+    'gap': RegisteredTest("Gap Test", _on_values(integer_tests_module.gap_test), _describe_gap),
+    'coupon_collector': RegisteredTest("Coupon Collector Test",
+                                       _on_values(integer_tests_module.coupon_collector_test),
+                                       _describe_coupon_collector),
+    'runs_up': RegisteredTest("Runs Up Test", _on_stream(integer_tests_module.runs_up_test),
+                              _describe_runs_up),
+    'runs_up_down': RegisteredTest("Runs Up and Down Test", _on_stream(integer_tests_module.runs_up_down_test),
+                                   _describe_runs_up_down),
+}
+
+def run_test(name, data, params=None):
+    """
+    Runs one registered test on data.
+
+    Returns:
+        dict: The test's result, or an error dict for an unknown test or
+        bad parameters.
+    """
+    test = TESTS.get(name)
+    if test is None:
+        return {"error": f"Unknown test: {name}"}
+    try:
+        return test.run(data, **(params or {}))
+    except Exception as e:
+        logging.error(f"run_test: {name} failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def describe(name, result, label=None):
+    """One-line text of a test result, as shown in the app, led by label (default: the test's label)."""
+    test = TESTS.get(name)
+    if label is None:
+        label = test.label if test is not None else name
+    if "error" in result:
+        return f"{label} ERROR: {result['error']}"
+    try:
+        return f"{label}: {test.describe(result)}"
+    except (KeyError, TypeError, ValueError):
+        return f"{label}: {'PASS' if result.get('passed') else 'FAIL'}"
+
+def spec_key(name, params=None):
+    """Result key of a test spec: its name, with any parameters spelled out."""
+    if not params:
+        return name
+    return f"{name}({', '.join(f'{k}={v}' for k, v in sorted(params.items()))})"
+
+def parse_test_specs(text):
+    """
+    Parses the tests of a battery request: a comma-separated list of test
+    names, or JSON - a list of names and/or {"test": name, "params": {...}}
+    objects, or an object mapping names to params.
+
+    Returns:
+        list of tuple or None: (name, params) pairs without duplicates, or
+        None if text is empty.
+
+    Raises:
+        ValueError: On malformed input or unknown tests.
+    """
+    text = (text or '').strip()
+    if not text:
+        return None
+    if text[0] in '[{':
+        entries = json.loads(text)
+        if isinstance(entries, dict):
+            entries = [{'test': name, 'params': params} for name, params in entries.items()]
+    else:
+        entries = [name.strip() for name in text.split(',') if name.strip()]
+    specs = []
+    for entry in entries:
+        if isinstance(entry, str):
+            name, params = entry, {}
+        elif isinstance(entry, dict) and isinstance(entry.get('test'), str):
+            name, params = entry['test'], entry.get('params') or {}
+        else:
+            raise ValueError(f"Invalid test entry: {entry!r}")
+        if not isinstance(params, dict):
+            raise ValueError(f"Parameters of {name} must be an object")
+        if (name, params) not in specs:
+            specs.append((name, params))
+    unknown = [name for name, _ in specs if name not in TESTS]
+    if unknown:
+        raise ValueError(f"Unknown tests: {', '.join(unknown)}")
+    return specs
+
+def run_suite(data, specs, token=None, workers=None):
+    """
+    Runs several tests on one sequence and yields their results as the
+    tests finish. Tests the parallel battery supports with default
+    parameters run there, in worker processes; the others run here.
+
+    Args:
+        data (SequenceData): The generated sequence.
+        specs (list of tuple): (test name, params dict) pairs.
+        token (CancellationToken or None): When cancelled, no further tests
+            are started or reported.
+        workers (int or None): Worker processes of the parallel battery.
+
+    Yields:
+        tuple: (test name, params, result dict); spec_key(name, params)
+        tells tests run with different parameters apart.
+    """
+    parallel = [name for name, params in specs if not params and name in battery_module.BATTERY_TESTS]
+    if parallel:
+        for name, result in battery_module.run_battery(data.bits, parallel, workers=workers, token=token):
+            yield name, {}, result
+    for name, params in specs:
+        if not params and name in parallel:
+            continue
+        if token is not None and token.cancelled:
+            return
+        yield name, params, run_test(name, data, params)
+
+def summarize(results):
+    """
+    Summary of a battery: which tests passed, failed, reported an error
+    or only gave estimates (no pass/fail), and the smallest p-value.
+
+    Args:
+        results (dict): {key: result dict}, as collected from run_suite.
+
+    Returns:
+        dict: Counts, test names per outcome and the smallest p-value.
+    """
+    passed, failed, errors, informational = [], [], [], []
+    for key, result in results.items():
+        if "error" in result:
+            errors.append(key)
+        elif 'passed' not in result:
+            informational.append(key)
+        elif result['passed']:
+            passed.append(key)
+        else:
+            failed.append(key)
+    p_values = {key: float(result['p-value']) for key, result in results.items()
+                if "error" not in result and result.get('p-value') is not None}
+    weakest = min(p_values, key=p_values.get) if p_values else None
+    return {
+        'tests': len(results),
+        'passed': passed,
+        'failed': failed,
+        'errors': errors,
+        'informational': informational,
+        'all_passed': not failed and not errors,
+        'min_p-value': p_values.get(weakest),
+        'min_p-value_test': weakest
+    }
+
+def describe_summary(summary):
+    """One-line text of a battery summary."""
+    graded = len(summary['passed']) + len(summary['failed'])
+    text = f"Summary: {len(summary['passed'])}/{graded} tests passed"
+    if summary['failed']:
+        text += f", failed: {', '.join(summary['failed'])}"
+    if summary['errors']:
+        text += f", errors: {', '.join(summary['errors'])}"
+    if summary['min_p-value_test'] is not None:
+        text += f", smallest p-value={summary['min_p-value']:.3g} ({summary['min_p-value_test']})"
+    return text
@@ -1,11 +1,28 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 import threading
+import multiprocessing
 import uuid
+import json
 import os , time
 import logging
 import random,secrets
-import tests_module # Import and run statistical test
+import second_level_module # p-value uniformity over many sequences
+import battery_module # Parallel test battery
+import analysis_module # Registry of the tests and multi-test batteries on one sequence
+import tests_module # Cross-correlation of the sources of a combining generator
+import random_stream_module # Bulk random numbers streamed by /api/random
+from prefetch_module import PrefetchPool # Pre-generated bits for the direct page and small API draws
+from coalesce_module import Coalescer # Identical in-flight test jobs share one run
+from admission_module import AdmissionController, AdmissionRejected # Per-job cost model and budgets
+import warmup_module # Generator backends initialized at startup, readiness for /ready
+import result_cache_module # Cached test results
+import sequence_store_module # Generated sequences kept under run IDs
+from job_queue_module import JobScheduler, QueueFull # Bounded job queue and worker pool
+from events_module import EventBus, sse_message # Progress pushed to /events subscribers
+from task_registry_module import TaskRegistry # Bounded task states with TTL eviction
+from job_store_module import JobStore, json_safe # Job states and results shared by all server processes
+from functools import partial
 
 app = Flask(__name__)
 
@@ -15,6 +32,13 @@ RESULTS_FILE = os.path.join(PROJECT_DIR, "results.txt")
 
 # Configure logging
 LOG_FILE = os.path.join(PROJECT_DIR, "flask_app_errors.log")
+# The spawned workers of the test process pools import this module too; only the server
+# process starts the scheduler threads, opens the job store, indexes the spill directory,
+# prefetches and warms up generators
+SERVER_PROCESS = multiprocessing.parent_process() is None
+# Generated sequences beyond the memory budget are spilled here
+if SERVER_PROCESS:
+    sequence_store_module.configure(spill_dir=os.path.join(PROJECT_DIR, "run_cache"))
 logging.basicConfig(
     filename=LOG_FILE,
     level=logging.ERROR,
@@ -22,15 +46,48 @@ logging.basicConfig(
 )
 
 # Global variables
-tasks = {}
-stopped_tasks = set()
+event_bus = EventBus()
+# Finished tasks are kept for an hour, at most 1000 tasks overall
+tasks = TaskRegistry(max_tasks=1000, ttl_seconds=3600, on_evict=event_bus.forget)
+# Fixed worker pool; the sound card takes one stream, the Java generator a few processes
+scheduler = JobScheduler(workers=4, max_queued=32,
+                         generator_limits={"sound": 1, "javathreads": 2, "mix": 2}) if SERVER_PROCESS else None
+# Job budgets: per client (queued and running jobs) and for the jobs running on the server
+admission = AdmissionController(
+    client_limits={"memory_bytes": 2 << 30, "cpu_seconds": 2 * 3600, "jobs": 8},
+    global_limits={"memory_bytes": 4 << 30, "cpu_seconds": 4 * 3600, "jobs": 4},
+    workers=os.cpu_count() or 1)
+# Identical concurrent /start_test requests share one job; each caller keeps its own task ID
+coalescer = Coalescer()
+# Serializes state broadcasts, so a joining task copies the job's state without missing an update
+broadcast_lock = threading.RLock()
+# Durable job history; every server process reads and writes the same database. Jobs are kept 30 days
+job_store = (JobStore(os.path.join(PROJECT_DIR, "jobs.sqlite3"), retention_seconds=30 * 24 * 3600)
+             if SERVER_PROCESS else None)
 import atexit
 from generators import generator_factory, cleanup_global_pyaudio ,cleanup_global_stream# app_updated_en.py
+# Prefetch buffers per generator, (low, high) watermarks in bits; refilled in the background
+PREFETCH_WATERMARKS = {
+    'pythonrand': (1 << 14, 1 << 16),
+    'time': (1 << 12, 1 << 14),
+    'javathreads': (1 << 9, 1 << 11),
+    'mix': (1 << 9, 1 << 11),
+    'sound': (1 << 9, 1 << 11),
+}
+# /api/random requests up to this count are served from the prefetch buffer when it holds enough bits,
+# and only counts a full buffer can cover (prefetchers.max_count: high watermark / bits per value)
+PREFETCH_API_MAX_COUNT = 1024
+# /api/random refuses counts whose estimated generation time (from measured throughput) exceeds this
+API_MAX_GENERATION_SECONDS = 60
+prefetchers = PrefetchPool(generator_factory, PREFETCH_WATERMARKS if SERVER_PROCESS else {})
 def cleanup_on_exit():
     cleanup_global_pyaudio()
     cleanup_global_stream()
 atexit.register(cleanup_on_exit)
 
+# Combining generators whose sources the 'cross_correlation' test type draws side by side
+COMBINING_GENERATORS = {'mix'}
+
 # Generator names in English
 generator_names = {
     'javathreads': 'Java Threads Generator',
@@ -40,6 +97,23 @@ generator_names = {
     'mix':'Mix Random Generators'
 }
 
+def warm_generator(name):
+    """Initialize one generator, check a short draw and wait for its prefetch buffer to fill"""
+    warmup_module.self_test(generator_factory, name)
+    prefetcher = prefetchers.prefetchers.get(name)
+    if prefetcher is not None and not prefetcher.wait_filled(timeout=60):
+        raise RuntimeError("prefetch buffer did not fill within 60 seconds")
+
+# Generators /ready waits for (comma-separated, env REQUIRED_GENERATORS); the others are warmed up and reported only
+REQUIRED_GENERATORS = [name.strip() for name in os.environ.get('REQUIRED_GENERATORS', 'pythonrand,time').split(',')
+                       if name.strip()]
+
+# All generators warm up in parallel in the background; failed ones are rechecked every minute.
+# /ready answers 200 once every required one passed
+warmup = warmup_module.Warmup(list(generator_names), warm_generator, required=REQUIRED_GENERATORS)
+if SERVER_PROCESS:
+    warmup.start()
+
 # Utility functions for randomness improvement
 def flip_rand_bit(rand_num, bitt, recu=1):
     """Flip random bits to improve randomness based on test patterns"""
@@ -69,27 +143,71 @@ def Improve_randomness_by_pattern_from_tests(i, rand_num, generator_name):
         return flip_rand_bit(rand_num,'0',5)
     return rand_num
 
-def run_selected_test_task(task_id, generator_name, test_type, upper_bound, samples=500):
-    """Execute statistical randomness test in background thread"""
-    
-    # Clear results file
-    if os.path.exists(RESULTS_FILE):
-        open(RESULTS_FILE, "w").close()    
+def persist_task(write, task_id, *args, **kwargs):
+    """Write to the job store; a store failure is logged and never fails the task"""
+    try:
+        write(task_id, *args, **kwargs)
+    except Exception:
+        logging.error(f"Job store write failed for task_id={task_id}", exc_info=True)
+
+def store_task(task_id, state, test_type=None):
+    """Replace one task's state, store it and push it to /events subscribers"""
+    state = tasks.set(task_id, state)
+    persist_task(job_store.save, task_id, state, test_type=test_type)
+    event_bus.publish(task_id, state)
+
+def set_task(task_id, state, test_type=None):
+    """Replace the state of a job's task and of every task coalesced with it"""
+    with broadcast_lock:
+        for target in coalescer.targets(task_id):
+            store_task(target, state, test_type)
+        if state.get("done"):
+            coalescer.finish(task_id)
+
+def update_task(task_id, **fields):
+    """Update some fields of a job's tasks; store and push each state that changed"""
+    with broadcast_lock:
+        for target in coalescer.targets(task_id):
+            state = tasks.update(target, **fields)
+            if state is not None:
+                persist_task(job_store.update, target, **fields)
+                event_bus.publish(target, state)
+
+def reject_task(task_id, state):
+    """
+    Final state for a job that will not run: every task coalesced with it
+    receives it before the group is finished, then the job's own task is dropped
+    """
+    set_task(task_id, dict(state, done=True))
+    tasks.delete(task_id)
+
+def stopped_state(generator_name):
+    """Final state of a task cancelled by the user"""
+    return {
+        "status": "Stopped by user",
+        "done": True,
+        "result": "Test stopped",
+        "generator_name": generator_name
+    }
+
+def mark_stopped(task_id, generator_name):
+    """Record that a task was cancelled by the user"""
+    set_task(task_id, stopped_state(generator_name))
+
+def generate_task_sequence(task_id, generator_name, upper_bound, samples, token=None):
+    """Generate the samples for a task; returns (bits, values, timing note), or None if stopped or failed"""
     try:
         # Initialize generator
         generator = generator_factory(generator_name)
-        bits = []      
-        print(f"Starting test: generator={generator_name}, test={test_type}, samples={samples}")
+        bits = []
+        values = []
         start = time.perf_counter()      
         # Generate random numbers and convert to bits
         for i in range(samples):
             # Check if task was stopped
-            if task_id in stopped_tasks:
-                tasks[task_id]["status"] = "Stopped by user"
-                tasks[task_id]["done"] = True
-                tasks[task_id]["result"] = "Test stopped"
-                tasks[task_id]["generator_name"] = generator_name
-                return
+            if token is not None and token.cancelled:
+                mark_stopped(task_id, generator_name)
+                return None
             
             # Generate random number
             rand_num = generator.generate(upper_bound)
@@ -98,15 +216,17 @@ def run_selected_test_task(task_id, generator_name, test_type, upper_bound, samp
             if i % 10 == 0 or i == samples - 1:
                 percent = min(100, int(100 * (i + 1) / samples))  # Ensure it doesn't exceed 100
                 generator_display_name = generator_names.get(generator_name, generator_name)
-                tasks[task_id]["status"] = f"{percent}% complete - {generator_display_name}"
+                update_task(task_id, status=f"{percent}% complete - {generator_display_name}")
             
             # Apply randomness improvements
             rand_num = Improve_randomness_by_pattern_from_tests(i, rand_num, generator_name)
             
-            # Convert to bits
+            # Keep the value for integer tests and convert to bits
+            values.append(rand_num)
             bits.extend(list(bin(rand_num)[2:]))
         
         end = time.perf_counter()
+        admission.record_generation(generator_name, samples, end - start)
         mean_time_per_run = (end-start) / samples   
         add_to_res=f"---Average time to generate one random number: {mean_time_per_run:.9f} sec"
         print(add_to_res)
@@ -115,120 +235,216 @@ def run_selected_test_task(task_id, generator_name, test_type, upper_bound, samp
         # Close generator if needed
         if hasattr(generator, 'close'):
             generator.close()
+        return bits, values, add_to_res
             
     except Exception as e:
         logging.error("Generator error in run_selected_test_task", exc_info=True)
-        tasks[task_id] = {
+        set_task(task_id, {
             "status": f"Generator error: {str(e)}",
             "done": True,
             "result": "",
             "generator_name": generator_name
-        }
+        })
+        return None
+
+def run_selected_test_task(task_id, generator_name, test_type, upper_bound, samples=500, battery_tests=None, run_id=None, token=None):
+    """Execute statistical randomness test in background thread"""
+    
+    # Clear results file
+    if os.path.exists(RESULTS_FILE):
+        open(RESULTS_FILE, "w").close()    
+    print(f"Starting test: generator={generator_name}, test={test_type}, samples={samples}")
+    # Reuse a stored generation run when one is given, otherwise generate and store a new one
+    run = sequence_store_module.SEQUENCE_STORE.get(run_id) if run_id else None
+    if run_id and run is None:
+        set_task(task_id, {
+            "status": "Run not found",
+            "done": True,
+            "result": f"No stored sequence for run ID {run_id}",
+            "generator_name": generator_name
+        })
         return
+    if run is not None:
+        generator_name, upper_bound, samples = run.generator_name, run.upper_bound, run.samples
+        bits, values = run.bits, run.values
+        add_to_res = run.note + " (reused stored run)"
+        logging.info(f"Reusing run {run_id}: {run.n} bits from {generator_name}")
+    else:
+        generated = generate_task_sequence(task_id, generator_name, upper_bound, samples, token)
+        if generated is None:
+            return
+        bits, values, add_to_res = generated
+        run_id = sequence_store_module.SEQUENCE_STORE.put(generator_name, upper_bound, samples,
+                                                          bits, values, add_to_res)
+    update_task(task_id, run_id=run_id)
     
     try:
 
         
         # Update status to show analysis phase
-        tasks[task_id]["status"] = "100% complete - Analyzing results..."
+        update_task(task_id, status="100% complete - Analyzing results...")
         
-        # Execute the selected test
-        if test_type == 'frequency':
-            result = tests_module.frequency_test(bits)
-            result_str = (f"Frequency Test: 0s={result['zeros']}, 1s={result['ones']}, "
-                         f"p-value={result['p-value']:.4f}, "
-                         f"{'PASS' if result['passed'] else 'FAIL'}")
-                         
-        elif test_type == 'runs':
-            result = tests_module.runs_test(bits)
-            result_str = (f"Runs Test: {result['runs']} runs (expected={result['expected_runs']:.2f}), "
-                         f"z-score={result['z-value']:.2f}, "
-                         f"{'PASS' if result['passed'] else 'FAIL'} "
-                         f"(0s={result['n0']}, 1s={result['n1']})")
-                         
-        elif test_type == 'freq_byte':
-            result = tests_module.chi_squared_full_test(bits, group_size=8)
-            result_str = (f"Chi-Square Test (bytes): X^2={result['chi2']:.2f}, "
-                         f"p-value={result['p-value']:.3g}, "
-                         f"{'PASS' if result['passed'] else 'FAIL'} "
-                         f"({result['N']} groups analyzed)")
-                         
-        elif test_type == 'serial2':
-            result = tests_module.serial_test(bits, group_size=2)
-            patterns_txt = ", ".join(f"{k}:{v}" for k, v in result['pattern_counts'].items())
-            result_str = (f"Serial Test (pairs): X^2={result['chi2']:.2f}, "
-                         f"p-value={result['p-value']:.3g}, "
-                         f"{'PASS' if result['passed'] else 'FAIL'} "
-                         f"(Patterns: {patterns_txt})")
-                         
-        elif test_type == 'serial3':
-            result = tests_module.serial_test(bits, group_size=3)
-            patterns_txt = ", ".join(f"{k}:{v}" for k, v in result['pattern_counts'].items())
-            result_str = (f"Serial Test (triplets): χ²={result['chi2']:.2f}, "
-                         f"p-value={result['p-value']:.3g}, "
-                         f"{'PASS' if result['passed'] else 'FAIL'} "
-                         f"(Patterns: {patterns_txt})")
-                         
-        elif test_type == 'autocorr1':
-            result = tests_module.autocorrelation_test(bits, lag=1)
-            result_str = (f"Autocorrelation Test (lag=1): r={result['autocorrelation']:.3f}, "
-                         f"z-score={result['z']:.2f}, p-value={result['p-value']:.3g}, "
-                         f"{'PASS' if result['passed'] else 'FAIL'}")
-                         
-        elif test_type == 'autocorr2':
-            result = tests_module.autocorrelation_test(bits, lag=2)
-            result_str = (f"Autocorrelation Test (lag=2): r={result['autocorrelation']:.3f}, "
-                         f"z-score={result['z']:.2f}, p-value={result['p-value']:.3g}, "
-                         f"{'PASS' if result['passed'] else 'FAIL'}")
-                         
-        elif test_type == 'poker4':
-            result = tests_module.poker_test(bits, group_size=4)
-            patterns_txt = ", ".join(f"{k}:{v}" for k, v in result['pattern_counts'].items())
-            result_str = (f"Poker Test (4-bit): χ²={result['chi2']:.2f}, "
-                         f"p-value={result['p-value']:.3g}, "
-                         f"{'PASS' if result['passed'] else 'FAIL'} "
-                         f"({result['num_groups']} groups, patterns: {patterns_txt})")
-                         
-        elif test_type == 'poker5':
-            result = tests_module.poker_test(bits, group_size=5)
-            patterns_txt = ", ".join(f"{k}:{v}" for k, v in result['pattern_counts'].items())
-            result_str = (f"Poker Test (5-bit): χ²={result['chi2']:.2f}, "
-                         f"p-value={result['p-value']:.3g}, "
-                         f"{'PASS' if result['passed'] else 'FAIL'} "
-                         f"({result['num_groups']} groups, patterns: {patterns_txt})")
-                         
-        elif test_type == 'maurer7':
-            result = tests_module.maurer_universal_test(bits, L=7)
-            if "error" in result:
-                result_str = f"Maurer's Universal Test ERROR: {result['error']}"
-            else:
-                result_str = (f"Maurer's Universal Test: fn={result['fn']:.3f}, "
-                             f"expected={result['expected']:.3f}, z-score={result['z']:.2f}, "
-                             f"p-value={result['p-value']:.3g}, "
-                             f"{'PASS' if result['passed'] else 'FAIL'} "
-                             f"(L={result['L']}, K={result['K']} blocks)")
+        # Execute the selected test, or every test of a battery, on the same data
+        data = analysis_module.SequenceData(bits, values, upper_bound, samples)
+        if test_type == 'battery':
+            # Each line is shown as soon as its test finishes
+            specs = battery_tests or [(name, {}) for name in battery_module.BATTERY_TESTS]
+            results = {}
+            lines = []
+            for name, params, test_result in analysis_module.run_suite(data, specs, token=token):
+                key = analysis_module.spec_key(name, params)
+                results[key] = test_result
+                lines.append(analysis_module.describe(name, test_result, label=key))
+                update_task(task_id, status=f"100% complete - Analyzing results ({len(lines)}/{len(specs)} tests done)",
+                            result="\n".join(lines))
+            summary = analysis_module.summarize(results)
+            result = {'results': results, 'summary': summary}
+            result_str = ("Test Battery:\n" + "\n".join(lines) + "\n"
+                          + analysis_module.describe_summary(summary) + "\n")
+        elif test_type in analysis_module.TESTS:
+            result = analysis_module.run_test(test_type, data)
+            result_str = analysis_module.describe(test_type, result)
         else:
+            result = None
             result_str = f"Test type '{test_type}' is not implemented"
         
+        # A stop during analysis discards the result
+        if token is not None and token.cancelled:
+            mark_stopped(task_id, generator_name)
+            return
         result_str+=add_to_res
+        result_str+=f"\n---Run ID (reuse to analyze the same data again): {run_id}"
         # Save final result with generator name
-        tasks[task_id] = {
+        set_task(task_id, {
             "status": "Test completed - 100% done",
             "done": True,
             "result": result_str,
-            "generator_name": generator_name
-        }
+            "generator_name": generator_name,
+            "run_id": run_id,
+            "result_data": json_safe(result)
+        })
         
     except Exception as e:
         logging.error("Test computation error in run_selected_test_task", exc_info=True)
-        tasks[task_id] = {
+        set_task(task_id, {
             "status": "Test computation error",
             "done": True,
             "result": "An error occurred during test analysis",
             "generator_name": generator_name
-        }
-        
-        
+        })
+
+def run_second_level_task(task_id, generator_name, test_type, upper_bound, samples, sequences, token=None):
+    """Run one test on many independent sequences in worker processes and check its p-values"""
+    try:
+        generator_display_name = generator_names.get(generator_name, generator_name)
+        update_task(task_id, status=f"0% complete - {generator_display_name} ({sequences} sequences in worker processes)")
+        make_bits = partial(second_level_module.generator_bits, generator_name, upper_bound, samples)
+        # Generators with a scheduler limit (sound stream, JVM launches) draw here, on this job's
+        # generator slot, one sequence at a time; only the tests fan out to the worker processes
+        results = second_level_module.second_level_test(
+            make_bits, [test_type], sequences=sequences, token=token,
+            generate_in_workers=generator_name not in scheduler.generator_limits)
+        if token is not None and token.cancelled:
+            mark_stopped(task_id, generator_name)
+            return
+        result = results.get(test_type, results)
+        if "error" in result:
+            result_str = f"Second-Level Analysis ERROR: {result['error']}"
+        else:
+            low, high = result['proportion_range']
+            result_str = (f"Second-Level Analysis ({test_type}, {result['sequences']} sequences): "
+                         f"proportion passing={result['proportion']:.4f} "
+                         f"(acceptable {low:.4f}-{high:.4f}), "
+                         f"uniformity P-value={result['p-value']:.4g}, KS p-value={result['ks_p-value']:.4g}, "
+                         f"{'PASS' if result['passed'] else 'FAIL'}")
+        set_task(task_id, {
+            "status": "Test completed - 100% done",
+            "done": True,
+            "result": result_str,
+            "generator_name": generator_name,
+            "result_data": json_safe(results)
+        })
+    except Exception:
+        logging.error("Second-level analysis error in run_second_level_task", exc_info=True)
+        set_task(task_id, {
+            "status": "Test computation error",
+            "done": True,
+            "result": "An error occurred during test analysis",
+            "generator_name": generator_name
+        })
+
+def run_cross_correlation_task(task_id, generator_name, upper_bound, samples, token=None):
+    """Draw the sources of a combining generator side by side and check them for cross-correlation"""
+    try:
+        generator = generator_factory(generator_name)
+        generator_display_name = generator_names.get(generator_name, generator_name)
+        values_a, values_b = [], []
+        try:
+            for start in range(0, samples, 10):
+                if token is not None and token.cancelled:
+                    mark_stopped(task_id, generator_name)
+                    return
+                a, b = generator.generate_sources(upper_bound, min(10, samples - start))
+                values_a.extend(a.tolist())
+                values_b.extend(b.tolist())
+                percent = min(100, int(100 * len(values_a) / samples))
+                update_task(task_id, status=f"{percent}% complete - {generator_display_name} (both sources)")
+        finally:
+            if hasattr(generator, 'close'):
+                generator.close()
+        update_task(task_id, status="100% complete - Analyzing results...")
+        # Fixed-width bits, so bit i of both streams comes from the same step
+        width = max(1, upper_bound.bit_length())
+        bits_a = ''.join(tests_module.convert_to_bits(v, width) for v in values_a)
+        bits_b = ''.join(tests_module.convert_to_bits(v, width) for v in values_b)
+        result = tests_module.cross_correlation_test(bits_a, bits_b)
+        if "error" in result:
+            result_str = f"Cross-Correlation Test ERROR: {result['error']}"
+        else:
+            result_str = (f"Cross-Correlation Test ({generator_display_name} sources, {result['n']} bits): "
+                         f"max correlation={result['max_correlation']:.4f} at lag {result['lag']}, "
+                         f"z-score={result['z']:.2f}, corrected p-value={result['p-value']:.3g}, "
+                         f"{'PASS' if result['passed'] else 'FAIL'}")
+        set_task(task_id, {
+            "status": "Test completed - 100% done",
+            "done": True,
+            "result": result_str,
+            "generator_name": generator_name,
+            "result_data": json_safe(result)
+        })
+    except Exception:
+        logging.error("Cross-correlation error in run_cross_correlation_task", exc_info=True)
+        set_task(task_id, {
+            "status": "Test computation error",
+            "done": True,
+            "result": "An error occurred during test analysis",
+            "generator_name": generator_name
+        })
+
+def run_admitted_job(task_id, target, args, token=None):
+    """Run a job once it fits the global budget alongside the running jobs; release its budget when done"""
+    try:
+        if not admission.acquire(task_id, token, on_wait=lambda status: update_task(task_id, status=status)):
+            mark_stopped(task_id, tasks.get(task_id, {}).get("generator_name", ""))
+            return
+        target(*args, token=token)
+    finally:
+        admission.release(task_id)
+
+def estimate_job(generator, test_type, upper_bound, samples, sequences, battery_tests, run_id):
+    """Cost estimate of a test job, from the stored run's size when it reuses one"""
+    if test_type == 'battery':
+        tests = len(battery_tests or battery_module.BATTERY_TESTS)
+    else:
+        tests = 1
+    if test_type == 'cross_correlation':
+        # Every sample draws one value from each source
+        samples *= 2
+    run = sequence_store_module.SEQUENCE_STORE.get(run_id) if run_id else None
+    if run is not None:
+        return admission.estimate(run.generator_name, run.upper_bound, run.samples, tests, generate=False)
+    return admission.estimate(generator, upper_bound, samples, tests, sequences)
+
 @app.route('/start_test', methods=['POST'])
 def start_test():
     """Start a new randomness test in background thread"""
@@ -237,26 +453,87 @@ def start_test():
         test_type = request.form['test_type']
         upper_bound = int(request.form['upper_bound'])
         samples = int(request.form.get('samples', 50))
+        sequences = int(request.form.get('sequences', 1))
+        # Comma-separated test names, or JSON with per-test parameters
+        try:
+            battery_tests = analysis_module.parse_test_specs(request.form.get('tests'))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid tests: {e}"}), 400
+        run_id = request.form.get('run_id') or None
+        if test_type == 'cross_correlation' and generator not in COMBINING_GENERATORS:
+            return jsonify({"error": f"Generator '{generator}' has no separate sources to correlate"}), 400
+        # coalesce=0 asks for an independent sample instead of sharing an identical job in flight
+        coalesce = request.form.get('coalesce', '1').lower() not in ('0', 'false', 'no')
+        # reduce=1 lets a job too large for the budgets run with fewer samples instead of being rejected
+        allow_reduce = request.form.get('reduce', '0').lower() in ('1', 'true', 'yes')
+        client = request.headers.get('X-Client-Id') or request.remote_addr or 'unknown'
         
         # Generate unique task ID
         task_id = str(uuid.uuid4())
         
-        # Initialize task with generator name
-        tasks[task_id] = {
-            "status": "Initializing test...",
+        priority = int(request.form.get('priority', 0))
+        second_level = sequences > 1 and test_type in second_level_module.P_VALUE_TESTS
+        queued_state = {
+            "status": "Queued - waiting for a worker...",
             "done": False,
             "result": "",
             "generator_name": generator
         }
         
-        # Start background thread
-        thread = threading.Thread(
-            target=run_selected_test_task,
-            args=(task_id, generator, test_type, upper_bound, samples)
-        )
-        thread.start()
+        # Requests allowing a reduced job only share with each other, so a request that did not
+        # send reduce=1 never gets fewer samples than it asked for
+        key = (generator, test_type, upper_bound, samples, sequences if second_level else 1,
+               json.dumps(battery_tests, sort_keys=True), run_id, allow_reduce)
+        job_sequences = sequences if second_level else 1
+        # A new job is admitted under the lock, so a request joining it copies its admitted
+        # state, effective sample count included
+        with broadcast_lock:
+            job_id = coalescer.join(key, task_id) if coalesce else None
+            if job_id is not None:
+                # Follow the shared job from its current state on, as held by its first attached task
+                current = tasks.get(coalescer.targets(job_id)[0], queued_state)
+                store_task(task_id, current, test_type=test_type)
+                return jsonify({"task_id": task_id, "generator_name": generator, "coalesced": True,
+                                "samples": current.get("samples", samples)})
+            
+            # Admission: the job's estimated cost must fit the client's and the server's budgets
+            estimate = estimate_job(generator, test_type, upper_bound, samples, job_sequences, battery_tests, run_id)
+            try:
+                reduced = admission.admit(task_id, client, estimate, samples, allow_reduce and not run_id)
+                if reduced is not None:
+                    samples = reduced
+                    estimate = estimate_job(generator, test_type, upper_bound, samples, job_sequences, battery_tests, run_id)
+                    admission.admit(task_id, client, estimate)
+            except AdmissionRejected as e:
+                reject_task(task_id, dict(queued_state, status=f"Not admitted: {e.reason}"))
+                return jsonify({"error": f"Job not admitted: {e.reason}", "estimate": e.estimate,
+                                "max_samples": e.max_samples}), 429
+            
+            # Initialize task with generator name and the sample count the job runs with
+            queued_state["samples"] = samples
+            set_task(task_id, queued_state, test_type=test_type)
+        
+        # Queue the job; several sequences switch to second-level analysis
+        if second_level:
+            target = run_second_level_task
+            args = (task_id, generator, test_type, upper_bound, samples, sequences)
+        elif test_type == 'cross_correlation':
+            target = run_cross_correlation_task
+            args = (task_id, generator, upper_bound, samples)
+        else:
+            target = run_selected_test_task
+            args = (task_id, generator, test_type, upper_bound, samples, battery_tests, run_id)
+        try:
+            scheduler.submit(task_id, run_admitted_job, (task_id, target, args),
+                             generator_name=generator, priority=priority)
+        except QueueFull:
+            admission.release(task_id)
+            # Identical requests that joined before the submit failed are turned away too
+            reject_task(task_id, dict(queued_state, status="Rejected - queue full"))
+            return jsonify({"error": "Server busy: too many tests waiting. Please try again later."}), 503
         
-        return jsonify({"task_id": task_id, "generator_name": generator})
+        return jsonify({"task_id": task_id, "generator_name": generator, "coalesced": False,
+                        "samples": samples, "estimate": estimate})
         
     except Exception:
         logging.error("start_test failed", exc_info=True)
@@ -264,24 +541,74 @@ def start_test():
             "error": "Unable to start test. Please check your parameters and try again."
         }), 400
 
+def stop_task(task_id):
+    """Stop a task of this server process"""
+    generator_name = tasks.get(task_id, {}).get("generator_name", "")
+    job_id = coalescer.job_of(task_id)
+    remaining = coalescer.detach(task_id)
+    if remaining is not None:
+        # A coalesced task stops at once; the shared job runs on while other callers wait for it
+        store_task(task_id, stopped_state(generator_name))
+        if remaining == 0 and scheduler.cancel(job_id) == 'queued':
+            coalescer.finish(job_id)
+            admission.release(job_id)
+    # Queued jobs are dropped at once; running jobs stop at their next token check
+    elif scheduler.cancel(task_id) == 'queued':
+        admission.release(task_id)
+        mark_stopped(task_id, generator_name)
+
 @app.route('/stop_test', methods=['POST'])
 def stop_test():
-    """Stop a running test"""
+    """Stop a running test; a task of another server process is flagged in the job store for it to stop"""
     try:
         task_id = request.form['task_id']
         
-        if task_id not in tasks:
+        if task_id in tasks:
+            stop_task(task_id)
+        elif not job_store.request_cancel(task_id) and job_store.get(task_id) is None:
             return jsonify({"error": "Task not found"}), 404
         
-        # Mark task for stopping
-        stopped_tasks.add(task_id)
-        
         return jsonify({"status": "Test stop requested"})
         
     except Exception:
         logging.error("Failed to stop test", exc_info=True)
         return jsonify({"error": "Failed to stop test"}), 500
 
+def watch_cancel_requests(interval=1.0):
+    """Stop the tasks of this process that a stop request to another server process flagged in the job store"""
+    while True:
+        time.sleep(interval)
+        try:
+            for task_id in job_store.cancel_requests():
+                if task_id in tasks:
+                    job_store.clear_cancel(task_id)
+                    stop_task(task_id)
+        except Exception:
+            logging.error("Cancel request poll failed", exc_info=True)
+
+if SERVER_PROCESS:
+    threading.Thread(target=watch_cancel_requests, name="cancel-requests", daemon=True).start()
+
+def generate_direct(algo, upper_bound):
+    """Generate one number with a fresh generator; returns the page output"""
+    generator = generator_factory(algo)
+    
+    # Special handling for sound generator
+    if algo == "sound":
+        if not hasattr(generator, 'stream') or generator.stream is None:
+            output = "Error: Sound generator could not initialize audio stream."
+        else:
+            rand_num = generator.generate(upper_bound)
+            output = f"{generator_names.get(algo, 'Unknown Generator')}\n{rand_num}"
+    else:
+        rand_num = generator.generate(upper_bound)
+        output = f"{generator_names.get(algo, 'Unknown Generator')}\n{rand_num}"
+    
+    # Clean up generator resources
+    if hasattr(generator, 'close'):
+        generator.close()
+    return output
+
 @app.route('/', methods=['GET', 'POST'])
 def direct():
     """Main page - direct random number generation"""
@@ -294,22 +621,12 @@ def direct():
             
             try:
                 upper_bound = int(upper_bound)
-                generator = generator_factory(algo)
-                
-                # Special handling for sound generator
-                if algo == "sound":
-                    if not hasattr(generator, 'stream') or generator.stream is None:
-                        output = "Error: Sound generator could not initialize audio stream."
-                    else:
-                        rand_num = generator.generate(upper_bound)
-                        output = f"{generator_names.get(algo, 'Unknown Generator')}\n{rand_num}"
-                else:
-                    rand_num = generator.generate(upper_bound)
+                # Served from the prefetch buffer when it has bits; otherwise generated now
+                rand_num = prefetchers.draw(algo, upper_bound)
+                if rand_num is not None:
                     output = f"{generator_names.get(algo, 'Unknown Generator')}\n{rand_num}"
-                
-                # Clean up generator resources
-                if hasattr(generator, 'close'):
-                    generator.close()
+                else:
+                    output = generate_direct(algo, upper_bound)
                     
             except Exception:
                 logging.error("Direct page generator failed", exc_info=True)
@@ -321,6 +638,65 @@ def direct():
         logging.error("Direct page failed to render", exc_info=True)
         return "Error: Could not display random generator page.", 500
 
+@app.route('/api/random', methods=['GET', 'POST'])
+def api_random():
+    """Stream count random numbers in [0, upper_bound] as JSON, NDJSON or raw binary"""
+    try:
+        algo = request.values.get('generator', 'pythonrand')
+        upper_bound = int(request.values.get('upper_bound', 1000))
+        count = int(request.values.get('count', 1))
+        fmt = request.values.get('format', 'json')
+    except ValueError:
+        return jsonify({"error": "upper_bound and count must be integers"}), 400
+    error = random_stream_module.validate(fmt, upper_bound, count)
+    if error:
+        return jsonify({"error": error}), 400
+    headers = {"X-Value-Count": str(count), "Cache-Control": "no-store"}
+    if fmt == 'binary':
+        headers["X-Value-Width"] = str(random_stream_module.value_width(upper_bound))
+    if count <= min(PREFETCH_API_MAX_COUNT, prefetchers.max_count(algo, upper_bound)):
+        values = prefetchers.draw_many(algo, upper_bound, count)
+        if values is not None:
+            return Response(random_stream_module.encode_chunks([values], upper_bound, fmt),
+                            mimetype=random_stream_module.FORMATS[fmt], headers=headers)
+    if algo in generator_names:
+        # Slow generators (one JVM launch or audio read per value) serve small counts only
+        estimate = admission.estimate(algo, upper_bound, count)
+        if estimate['generation_seconds'] > API_MAX_GENERATION_SECONDS:
+            max_count = int(count * API_MAX_GENERATION_SECONDS / estimate['generation_seconds'])
+            return jsonify({"error": f"count too large for generator '{algo}'", "max_count": max_count,
+                            "estimate": estimate}), 429
+    # The draw takes one of the generator's slots, shared with queued test jobs
+    if not scheduler.acquire_generator(algo):
+        return jsonify({"error": f"Generator '{algo}' is busy. Please try again later."}), 503
+    try:
+        generator = generator_factory(algo)
+    except Exception as e:
+        scheduler.release_generator(algo)
+        if isinstance(e, ValueError):
+            return jsonify({"error": str(e)}), 400
+        raise
+
+    def stream():
+        # Values are drawn chunk by chunk while the response is sent; a disconnect stops generation
+        try:
+            yield from random_stream_module.encode_stream(generator, upper_bound, count, fmt)
+        except Exception:
+            logging.error(f"/api/random stream failed (generator={algo})", exc_info=True)
+
+    def close():
+        # Runs when the response is closed, even if the stream never started
+        try:
+            if hasattr(generator, 'close'):
+                generator.close()
+        finally:
+            scheduler.release_generator(algo)
+
+    response = Response(stream_with_context(stream()), mimetype=random_stream_module.FORMATS[fmt],
+                        headers=headers)
+    response.call_on_close(close)
+    return response
+
 @app.route('/tests')
 def tests():
     """Statistical tests page"""
@@ -342,7 +718,9 @@ def status(task_id):
                 "generator_name": ""
             }), 400
         
-        if task_id not in tasks:
+        # Tasks of other server processes, and tasks evicted from memory, come from the job store
+        state = tasks.get(task_id) or job_store.get(task_id)
+        if state is None:
             return jsonify({
                 "status": "Task not found",
                 "done": True,
@@ -350,22 +728,7 @@ def status(task_id):
                 "generator_name": ""
             }), 404
         
-        # Check for external results file updates
-        if os.path.exists(RESULTS_FILE):
-            try:
-                with open(RESULTS_FILE, encoding="utf-8") as f:
-                    lines = f.readlines()
-                    if lines:
-                        tasks[task_id]["status"] = lines[-1].strip()
-            except Exception:
-                pass  # Ignore file read errors
-        
-        return jsonify(tasks.get(task_id, {
-            "status": "Task not found",
-            "done": True,
-            "result": "",
-            "generator_name": ""
-        }))
+        return jsonify(state)
         
     except Exception :
         logging.error(f"Status route failed for task_id={task_id}", exc_info=True)
@@ -376,6 +739,137 @@ def status(task_id):
             "generator_name": ""
         }), 500
 
+@app.route('/events/<task_id>')
+def events(task_id):
+    """Server-Sent Events stream of a task's status, partial results and final result"""
+    if task_id not in tasks:
+        if job_store.get(task_id) is None:
+            return jsonify({"error": "Task not found"}), 404
+        # The task runs in another server process: follow its row in the job store
+        return Response(stream_with_context(stored_task_stream(task_id)), mimetype='text/event-stream',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    def stream():
+        with event_bus.subscribe(task_id) as subscription:
+            # The subscription starts with the current state, then every change until done
+            while True:
+                state = subscription.get(timeout=15)
+                if state is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield sse_message(state)
+                if state.get("done"):
+                    return
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def stored_task_stream(task_id, interval=0.5, keep_alive=15):
+    """SSE messages for a task known only from the job store, polled every interval seconds"""
+    last_update, idle = None, 0.0
+    while True:
+        job = job_store.get(task_id)
+        if job is None:
+            return
+        if job["updated"] != last_update:
+            last_update, idle = job["updated"], 0.0
+            yield sse_message(job)
+            if job["done"]:
+                return
+        elif idle >= keep_alive:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+        time.sleep(interval)
+        idle += interval
+
+@app.route('/history')
+def history():
+    """Past and current jobs from the job store, newest first, paginated"""
+    try:
+        since = request.args.get('since', type=float)
+        until = request.args.get('until', type=float)
+        return jsonify(job_store.history(generator=request.args.get('generator') or None,
+                                         since=since, until=until,
+                                         page=request.args.get('page', 1, type=int),
+                                         per_page=request.args.get('per_page', 20, type=int)))
+    except Exception:
+        logging.error("History route failed", exc_info=True)
+        return jsonify({"error": "Unable to read job history"}), 500
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once every required generator has warmed up, 503 until then; optional ones are only reported"""
+    try:
+        status = warmup.status()
+        return jsonify(status), 200 if status['ready'] else 503
+    except Exception:
+        logging.error("Ready route failed", exc_info=True)
+        return jsonify({"ready": False, "error": "Unable to read warm-up status"}), 503
+
+@app.route('/runs')
+def runs():
+    """Stored generation runs that /start_test can analyze again by run_id"""
+    try:
+        return jsonify(sequence_store_module.SEQUENCE_STORE.runs())
+    except Exception:
+        logging.error("Runs route failed", exc_info=True)
+        return jsonify({"error": "Unable to list stored runs"}), 500
+
+@app.route('/task_stats')
+def task_stats():
+    """Entry counts and memory held by the task registry"""
+    try:
+        tasks.sweep()
+        return jsonify(tasks.stats())
+    except Exception:
+        logging.error("Task stats route failed", exc_info=True)
+        return jsonify({"error": "Unable to read task statistics"}), 500
+
+@app.route('/queue_stats')
+def queue_stats():
+    """Queued and running jobs of the scheduler"""
+    try:
+        return jsonify(scheduler.stats())
+    except Exception:
+        logging.error("Queue stats route failed", exc_info=True)
+        return jsonify({"error": "Unable to read queue statistics"}), 500
+
+@app.route('/prefetch_stats')
+def prefetch_stats():
+    """Buffered bits and hit/miss counts of the prefetch buffers"""
+    try:
+        return jsonify(prefetchers.stats())
+    except Exception:
+        logging.error("Prefetch stats route failed", exc_info=True)
+        return jsonify({"error": "Unable to read prefetch statistics"}), 500
+
+@app.route('/admission_stats')
+def admission_stats():
+    """Budgets, their current use, generator throughput history and admission decisions"""
+    try:
+        return jsonify(admission.stats())
+    except Exception:
+        logging.error("Admission stats route failed", exc_info=True)
+        return jsonify({"error": "Unable to read admission statistics"}), 500
+
+@app.route('/coalesce_stats')
+def coalesce_stats():
+    """Shared in-flight jobs and how many requests joined them"""
+    try:
+        return jsonify(coalescer.stats())
+    except Exception:
+        logging.error("Coalesce stats route failed", exc_info=True)
+        return jsonify({"error": "Unable to read coalescing statistics"}), 500
+
+@app.route('/cache_stats')
+def cache_stats():
+    """Hit rate and size of the test result cache"""
+    try:
+        return jsonify(result_cache_module.RESULT_CACHE.stats())
+    except Exception:
+        logging.error("Cache stats route failed", exc_info=True)
+        return jsonify({"error": "Unable to read cache statistics"}), 500
+
 @app.errorhandler(404)
 def not_found_error(error):
     """Handle 404 errors"""
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel test battery. Runs any subset of the tests_module tests in
+worker processes of the shared spawn pool (second_level_module.process_pool),
+so CPU-bound tests are not serialized by the GIL and a full battery takes
+about as long as its slowest test.
+
+The bits are packed once into a shared BitSequence (shared_buffer_module)
+and workers read them in place instead of receiving a pickled copy.
+Results are yielded as each test finishes. The result cache is checked
+and filled here, in the calling process: each worker would only see its
+own empty cache.
+"""
+
+import logging
+from concurrent.futures import as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import result_cache_module
+import tests_module
+from shared_buffer_module import BitSequence
+from second_level_module import P_VALUE_TESTS, discard_pool, pool_submit, process_pool
+
+# Every test the battery can run, keyed by the app's test_type names.
+BATTERY_TESTS = dict(P_VALUE_TESTS, **{
+    'random_excursions': tests_module.random_excursions_test,
+    'random_excursions_variant': tests_module.random_excursions_variant_test,
+})
+
+# Tests that read packed (bytes, n) input directly, without unpacking.
+_PACKED_INPUT = {'block_frequency', 'longest_run'}
+# Tests that accept a 0/1 NumPy array.
+_ARRAY_INPUT = {'random_excursions', 'random_excursions_variant'}
+
+def _run_shared_test(sequence_name, test_name):
+    """Worker: attaches to the shared bits and runs one test on them in place."""
+    with BitSequence.attach(sequence_name) as sequence:
+        if test_name in _PACKED_INPUT:
+            bits = sequence.as_packed()
+        elif test_name in _ARRAY_INPUT:
+            bits = sequence.to_array()
+        else:
+            bits = sequence.to_string()
+        result = BATTERY_TESTS[test_name](bits)
+        del bits  # release the view before the mapping is closed
+        return result
+
+def run_battery(bits, test_names=None, workers=None, token=None):
+    """
+    Runs a battery of tests on one bit sequence in parallel processes and
+    yields (test name, result dict) pairs in completion order.
+
+    Args:
+        bits (str, list, tuple or BitSequence): Bit string/list, packed
+            (bytes, n) pair, or a BitSequence already in shared memory.
+        test_names (list of str or None): Keys of BATTERY_TESTS (default: all).
+        workers (int or None): Worker processes of the shared pool (default: one per core).
+        token (CancellationToken or None): When cancelled, tests not yet
+            started are dropped and no further results are yielded.
+
+    Yields:
+        tuple: (test name, result dict); a worker failure yields an error dict.
+    """
+    test_names = list(BATTERY_TESTS) if test_names is None else list(test_names)
+    unknown = [name for name in test_names if name not in BATTERY_TESTS]
+    if unknown:
+        yield 'battery', {"error": f"Unknown tests: {', '.join(unknown)}"}
+        return
+    cache = result_cache_module.RESULT_CACHE
+    content = bits.as_packed() if isinstance(bits, BitSequence) else bits
+    keys = {name: result_cache_module.make_key(f"battery.{name}", (content,), {}) for name in test_names}
+    pending = []
+    for name in test_names:
+        result = cache.get(keys[name])
+        if result is None:
+            pending.append(name)
+        else:
+            yield name, result
+    if not pending:
+        return
+    owned = not isinstance(bits, BitSequence)
+    sequence = BitSequence.from_bits(bits) if owned else bits
+    try:
+        pool = process_pool(workers)
+        futures = {}
+        try:
+            for name in pending:
+                if sequence.segment is not None:
+                    sequence.segment.acquire()  # one reference per running test
+                pool, future = pool_submit(pool, workers, _run_shared_test, sequence.name, name)
+                futures[future] = name
+            for future in as_completed(futures):
+                name = futures[future]
+                if sequence.segment is not None:
+                    sequence.segment.release()
+                if token is not None and token.cancelled:
+                    break
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        discard_pool(pool)
+                    logging.error(f"run_battery: {name} failed: {e}")
+                    yield name, {'error': str(e), 'passed': False}
+                    continue
+                if isinstance(result, dict) and 'error' not in result:
+                    cache.put(keys[name], result)
+                yield name, result
+        finally:
+            # Tests that have not started yet are dropped on cancellation or early exit;
+            # running ones finish before the shared block is freed.
+            for future in futures:
+                future.cancel()
+            wait(futures)
+    finally:
+        if owned:
+            sequence.close()
+            # Stopped early or a worker crashed: free the block even if references remain.
+            sequence.segment.discard()
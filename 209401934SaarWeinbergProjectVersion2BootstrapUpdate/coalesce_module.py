@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Request coalescing: identical test jobs that are in flight at the same
+time share one generation and analysis run.
+
+The first request for a key leads: its task ID is the job's ID. Later
+requests with the same key join the job and get their own task IDs;
+every state the job publishes is written to all attached task IDs. A
+caller that stops detaches only itself; the job is cancelled once no
+caller is attached. A group stops accepting joiners when it finishes or
+when its last caller detaches.
+"""
+
+import threading
+
+class Coalescer:
+    """Groups of task IDs that share one job, keyed by the job's parameters."""
+    def __init__(self):
+        self._job_by_key = {}  # key -> job_id, while the group accepts joiners
+        self._key_by_job = {}
+        self._members = {}  # job_id -> attached task IDs, the leader first
+        self._job_by_task = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def join(self, key, task_id):
+        """
+        Attaches task_id to the in-flight job for key, or makes it the
+        leader of a new group.
+
+        Returns:
+            str or None: The job ID joined, or None if task_id now leads.
+        """
+        with self._lock:
+            job_id = self._job_by_key.get(key)
+            if job_id is None:
+                self._job_by_key[key] = task_id
+                self._key_by_job[task_id] = key
+                self._members[task_id] = [task_id]
+                self._job_by_task[task_id] = task_id
+                return None
+            self._members[job_id].append(task_id)
+            self._job_by_task[task_id] = job_id
+            self.coalesced += 1
+            return job_id
+
+    def targets(self, job_id):
+        """Task IDs that receive the job's states: its attached members, or the job alone if not grouped."""
+        with self._lock:
+            members = self._members.get(job_id)
+            return list(members) if members is not None else [job_id]
+
+    def job_of(self, task_id):
+        """ID of the job serving task_id (task_id itself if it is not grouped)."""
+        with self._lock:
+            return self._job_by_task.get(task_id, task_id)
+
+    def detach(self, task_id):
+        """
+        Detaches a task from its job.
+
+        Returns:
+            int or None: Tasks still attached to the job, or None if task_id
+            is not part of a group.
+        """
+        with self._lock:
+            job_id = self._job_by_task.pop(task_id, None)
+            if job_id is None:
+                return None
+            members = self._members[job_id]
+            if task_id in members:
+                members.remove(task_id)
+            if not members:
+                self._close_key(job_id)
+            return len(members)
+
+    def finish(self, job_id):
+        """Drops the job's group once it has published its final state."""
+        with self._lock:
+            self._close_key(job_id)
+            for task_id in self._members.pop(job_id, ()):
+                self._job_by_task.pop(task_id, None)
+
+    def _close_key(self, job_id):
+        key = self._key_by_job.pop(job_id, None)
+        if key is not None and self._job_by_key.get(key) == job_id:
+            del self._job_by_key[key]
+
+    def stats(self):
+        """Open groups, tasks attached to them, and requests coalesced so far."""
+        with self._lock:
+            return {
+                'groups': len(self._members),
+                'attached_tasks': sum(len(m) for m in self._members.values()),
+                'coalesced': self.coalesced
+            }
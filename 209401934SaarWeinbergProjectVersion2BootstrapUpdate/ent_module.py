@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Quick byte-level health checks in the style of the classic `ent` tool:
+Shannon entropy per byte, chi-square over byte values, arithmetic mean,
+Monte Carlo estimate of pi and serial correlation coefficient.
+
+All five statistics are accumulated in a single pass over byte buffers
+with bincount and dot products, so multi-gigabyte dumps can be fed chunk
+by chunk (see ent_file) in seconds. The heavier tests live in tests_module.
+"""
+
+import logging
+import math
+
+import numpy as np
+from scipy.stats import chi2 as chi2_dist
+
+# Monte Carlo pi: each point uses 6 bytes, a 24-bit x and a 24-bit y.
+_MONTE_BYTES = 6
+_MONTE_RADIUS_SQ = float(256 ** 3 - 1) ** 2
+
+# Chunk size used when reading dumps from disk.
+CHUNK_BYTES = 1 << 24
+
+class EntStats:
+    """
+    Running `ent` statistics. Call update() with consecutive buffers of the
+    stream and result() at any point to get the statistics so far.
+    """
+    def __init__(self):
+        self.counts = np.zeros(256, dtype=np.int64)
+        self.lag_product = 0  # sum of x[i] * x[i+1]
+        self.first = None
+        self.last = None
+        self.monte_inside = 0
+        self.monte_points = 0
+        self._monte_carry = b''
+
+    def update(self, data):
+        """Adds a buffer (bytes, bytearray, memoryview or uint8 array)."""
+        x = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+        if len(x) == 0:
+            return
+        self.counts += np.bincount(x, minlength=256)
+        xi = x.astype(np.int64)
+        self.lag_product += int(np.dot(xi[:-1], xi[1:]))
+        if self.last is not None:
+            self.lag_product += self.last * int(xi[0])
+        else:
+            self.first = int(xi[0])
+        self.last = int(xi[-1])
+        self._update_monte(x)
+
+    def _update_monte(self, x):
+        if self._monte_carry:
+            x = np.concatenate((np.frombuffer(self._monte_carry, dtype=np.uint8), x))
+        usable = len(x) // _MONTE_BYTES * _MONTE_BYTES
+        self._monte_carry = x[usable:].tobytes()
+        groups = x[:usable].reshape(-1, _MONTE_BYTES).astype(np.int64)
+        xs = (groups[:, 0] << 16) | (groups[:, 1] << 8) | groups[:, 2]
+        ys = (groups[:, 3] << 16) | (groups[:, 4] << 8) | groups[:, 5]
+        self.monte_inside += int(np.count_nonzero(xs.astype(float) ** 2 + ys.astype(float) ** 2
+                                                  <= _MONTE_RADIUS_SQ))
+        self.monte_points += len(groups)
+
+    def result(self):
+        """
+        Returns:
+            dict: Entropy (bits per byte), chi-square and its p-value,
+            arithmetic mean, Monte Carlo pi with its error, serial
+            correlation coefficient, and pass/fail.
+        """
+        N = int(self.counts.sum())
+        if N < 2:
+            return {"error": "Not enough data (less than 2 bytes)"}
+        values = np.arange(256)
+        prob = self.counts / N
+        nonzero = prob[prob > 0]
+        entropy = float(-np.sum(nonzero * np.log2(nonzero)))
+        expected = N / 256
+        chi2 = float(np.sum((self.counts - expected) ** 2) / expected)
+        p = float(chi2_dist.sf(chi2, 255))
+        total = float(np.dot(self.counts, values))
+        mean = total / N
+        # Serial correlation is cyclic, as in ent: the last byte pairs with the first.
+        lag = float(self.lag_product + self.last * self.first)
+        squares = float(np.dot(self.counts, values * values))
+        denom = N * squares - total * total
+        scc = (N * lag - total * total) / denom if denom != 0 else 1.0
+        if self.monte_points:
+            pi = 4 * self.monte_inside / self.monte_points
+            pi_error = abs(pi - math.pi) / math.pi * 100
+        else:
+            pi, pi_error = float('nan'), float('nan')
+        return {
+            'entropy': entropy,
+            'chi2': chi2,
+            'p-value': p,
+            'mean': mean,
+            'monte_carlo_pi': pi,
+            'pi_error_percent': pi_error,
+            'serial_correlation': scc,
+            'passed': 0.01 < p < 0.99,  # ent flags both tails as suspect
+            'N': N
+        }
+
+def values_to_bytes(values, upper_bound):
+    """
+    Turns generator outputs in [0, upper_bound] into a byte stream for the
+    battery. Each value is written with a fixed width of k = floor(log2(
+    upper_bound + 1)) bits, so leading zeros are kept, and values of 2^k or
+    more are dropped, so every written bit is uniform for a uniform
+    generator. With upper_bound = 255 these are the generator's raw bytes.
+
+    Args:
+        values (array-like): Integers in [0, upper_bound].
+        upper_bound (int): Inclusive upper bound of the generator.
+
+    Returns:
+        np.ndarray: uint8 bytes (MSB first); a trailing partial byte is dropped.
+    """
+    k = (int(upper_bound) + 1).bit_length() - 1
+    if not 1 <= k <= 64:
+        raise ValueError("Upper bound must be between 1 and 2^64 - 1")
+    values = np.asarray(values, dtype=np.uint64)
+    values = values[values < (1 << k)] if k < 64 else values
+    bits = np.unpackbits(values.astype('>u8').view(np.uint8).reshape(-1, 8), axis=1)[:, 64 - k:]
+    bits = bits.ravel()
+    return np.packbits(bits[:len(bits) // 8 * 8])
+
+def ent_test(data):
+    """
+    Runs the ent battery on a byte buffer.
+
+    Args:
+        data (bytes, bytearray or np.ndarray): Raw bytes, e.g. from
+            RandomGenerator.generate_bytes().
+
+    Returns:
+        dict: See EntStats.result().
+    """
+    try:
+        stats = EntStats()
+        stats.update(data)
+        return stats.result()
+    except Exception as e:
+        logging.error(f"ent_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def ent_file(path, chunk_size=CHUNK_BYTES):
+    """
+    Runs the ent battery over a file, reading it in chunks so memory stays
+    bounded for dumps of any size.
+
+    Returns:
+        dict: See EntStats.result().
+    """
+    try:
+        stats = EntStats()
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                stats.update(chunk)
+        return stats.result()
+    except Exception as e:
+        logging.error(f"ent_file failed for {path}: {e}")
+        return {'error': str(e), 'passed': False}
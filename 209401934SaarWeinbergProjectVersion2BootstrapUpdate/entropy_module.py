@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+"""
+Min-entropy estimation following NIST SP 800-90B, section 6.3 (non-IID track).
+
+The sources are analysed as binary sources: the samples are the bits the
+generators produce, and every estimate is in bits of min-entropy per bit.
+The suite runs the most common value, collision, Markov, compression,
+t-tuple, longest repeated substring (LRS) estimates and the MultiMCW, Lag,
+MultiMMC and LZ78Y predictors; the assessed min-entropy is the lowest of them.
+
+The t-tuple and LRS estimates need the counts of repeated substrings of
+every length. They are read from a suffix array and its LCP array instead
+of scanning substrings, so 10^6-sample inputs finish in seconds.
+"""
+
+import logging
+import math
+
+import numpy as np
+
+from tests_module import _bits_to_array
+
+# Upper bound of the 99% confidence interval used throughout SP 800-90B.
+Z_99 = 2.576
+
+def _upper_bound(p, n):
+    """Upper end of the 99% confidence interval for a proportion p of n."""
+    return min(1.0, p + Z_99 * math.sqrt(p * (1 - p) / (n - 1)))
+
+def _entropy(p):
+    """Min-entropy -log2(p), clamped at 0 for p = 1."""
+    return max(0.0, -math.log2(p))
+
+def _solve_decreasing(f, target, lo, hi, iterations=60):
+    """
+    Binary search for p in [lo, hi] with f(p) = target, for a decreasing f.
+    Returns None when the target is above f(lo) (no solution, full entropy)
+    and hi when it is below f(hi).
+    """
+    if target > f(lo):
+        return None
+    if target < f(hi):
+        return hi
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        if f(mid) > target:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+# --- Suffix array and LCP -----------------------------------------------------
+
+def suffix_array(symbols):
+    """
+    Builds the suffix array by prefix doubling with NumPy sorts.
+
+    Returns:
+        tuple: (suffix array, list of rank arrays). levels[j][i] ranks the
+        substring of length 2^j starting at i, so equal ranks mean equal
+        substrings; they are reused to compute the LCP array.
+    """
+    n = len(symbols)
+    _, rank = np.unique(symbols, return_inverse=True)
+    rank = rank.astype(np.int32)
+    levels = [rank]
+    step = 1
+    while rank.max() < n - 1:
+        second = np.full(n, -1, dtype=np.int64)
+        second[:n - step] = rank[step:]
+        key = rank.astype(np.int64) * (n + 1) + second + 1
+        order = np.argsort(key, kind='stable')
+        sorted_key = key[order]
+        rank = np.empty(n, dtype=np.int32)
+        rank[order] = np.concatenate(([0], np.cumsum(sorted_key[1:] != sorted_key[:-1])))
+        levels.append(rank)
+        step *= 2
+    return np.argsort(rank), levels
+
+def lcp_array(sa, levels):
+    """
+    LCP of every pair of neighbouring suffixes in the suffix array, by
+    binary lifting over the doubling ranks: a match of 2^j symbols is
+    taken whenever the length-2^j ranks at the current offsets agree.
+
+    Returns:
+        np.ndarray: lcp[k] = LCP(sa[k], sa[k+1]), of length n-1.
+    """
+    n = len(sa)
+    a, b = sa[:-1].astype(np.int64), sa[1:].astype(np.int64)
+    lcp = np.zeros(n - 1, dtype=np.int64)
+    for j in reversed(range(len(levels))):
+        ia, ib = a + lcp, b + lcp
+        valid = np.flatnonzero((ia < n) & (ib < n))
+        equal = levels[j][ia[valid]] == levels[j][ib[valid]]
+        lcp[valid[equal]] += 1 << j
+    return lcp
+
+def repeat_profile(symbols):
+    """
+    Repetition statistics for every substring length W, from the LCP array.
+
+    Pairs of suffixes whose LCP is at least W are pairs of equal W-tuples.
+    A single stack pass finds, for every LCP entry, the range of the suffix
+    array in which it is the minimum; that gives the number of pairs whose
+    LCP equals it and the size of the group of suffixes sharing it.
+
+    Returns:
+        tuple: (max_count, pairs) arrays indexed by W, where max_count[W] is
+        the count of the most common W-tuple and pairs[W] the number of
+        pairs of equal W-tuples. Both cover W = 0..max LCP + 1.
+    """
+    sa, levels = suffix_array(symbols)
+    h = lcp_array(sa, levels)
+    m = len(h)
+    prev = np.full(m, -1, dtype=np.int64)
+    nxt = np.full(m, m, dtype=np.int64)
+    stack = []
+    heights = h.tolist()
+    for k, value in enumerate(heights):
+        while stack and heights[stack[-1]] >= value:
+            nxt[stack.pop()] = k
+        prev[k] = stack[-1] if stack else -1
+        stack.append(k)
+    idx = np.arange(m)
+    top = int(h.max()) + 2 if m else 2
+    pairs_at = np.bincount(h, weights=(idx - prev) * (nxt - idx), minlength=top)
+    group_at = np.ones(top, dtype=np.int64)
+    np.maximum.at(group_at, h, nxt - prev)
+    pairs = np.cumsum(pairs_at[::-1])[::-1]
+    max_count = np.maximum.accumulate(group_at[::-1])[::-1]
+    max_count[-1] = 1  # no tuple longer than the longest repeat occurs twice
+    return max_count, pairs
+
+# --- Estimators ------------------------------------------------------------------
+
+def most_common_value_estimate(bits):
+    """SP 800-90B 6.3.1: bound on the probability of the most common value."""
+    s = _bits_to_array(bits)
+    L = len(s)
+    p_hat = np.bincount(s).max() / L
+    return {'min-entropy': _entropy(_upper_bound(p_hat, L)), 'p_max': float(p_hat)}
+
+def collision_estimate(bits):
+    """SP 800-90B 6.3.2: mean time until the first repeated value."""
+    s = _bits_to_array(bits).tolist()
+    L = len(s)
+    times = []
+    i = 0
+    while i + 1 < L:
+        if s[i] == s[i + 1]:
+            times.append(2)
+            i += 2
+        elif i + 2 < L:
+            times.append(3)  # binary: a repeat is certain by the third value
+            i += 3
+        else:
+            break
+    times = np.array(times, dtype=float)
+    v = len(times)
+    mean = times.mean() - Z_99 * times.std(ddof=1) / math.sqrt(v)
+    # For binary samples the expected collision time in the spec's equation
+    # reduces to 2 + 2p(1-p), which is solved for p >= 1/2 directly.
+    if mean >= 2.5:
+        h = 1.0
+    else:
+        p = (1 + math.sqrt(max(0.0, 1 - 2 * (mean - 2)))) / 2
+        h = _entropy(min(p, 1.0))
+    return {'min-entropy': h, 'collisions': v, 'mean_time': float(times.mean())}
+
+def markov_estimate(bits):
+    """SP 800-90B 6.3.3: most likely 128-bit path of a first-order Markov model."""
+    s = _bits_to_array(bits)
+    L = len(s)
+    p1 = s.mean()
+    p0 = 1 - p1
+    pairs = np.bincount(s[:-1] * 2 + s[1:], minlength=4)
+    from0, from1 = pairs[0] + pairs[1], pairs[2] + pairs[3]
+    p00 = pairs[0] / from0 if from0 else 0.0
+    p01 = 1 - p00 if from0 else 0.0
+    p11 = pairs[3] / from1 if from1 else 0.0
+    p10 = 1 - p11 if from1 else 0.0
+    paths = [
+        p0 * p00 ** 127,                # 00...0
+        p0 * p01 ** 64 * p10 ** 63,     # 0101...01
+        p0 * p01 * p11 ** 126,          # 011...1
+        p1 * p10 * p00 ** 126,          # 100...0
+        p1 * p10 ** 64 * p01 ** 63,     # 1010...10
+        p1 * p11 ** 127,                # 11...1
+    ]
+    p_max = max(paths)
+    return {'min-entropy': min(_entropy(p_max) / 128, 1.0) if p_max > 0 else 1.0}
+
+_COMPRESSION_BLOCK = 6
+_COMPRESSION_DICT = 1000
+
+def compression_estimate(bits):
+    """SP 800-90B 6.3.4: Maurer-style compression of 6-bit blocks."""
+    b, d = _COMPRESSION_BLOCK, _COMPRESSION_DICT
+    s = _bits_to_array(bits)
+    L = len(s) // b
+    nu = L - d
+    if nu < 2:
+        return {'error': f"Sequence too short (need more than {(d + 1) * b} bits)"}
+    blocks = s[:L * b].reshape(L, b) @ (1 << np.arange(b - 1, -1, -1))
+    # Distance to the previous occurrence of each block (1-based index if none).
+    order = np.argsort(blocks, kind='stable')
+    previous = np.zeros(L, dtype=np.int64)
+    same = blocks[order[1:]] == blocks[order[:-1]]
+    previous[order[1:][same]] = order[:-1][same] + 1
+    index = np.arange(1, L + 1)
+    log_d = np.log2(index - previous)[d:]
+    mean = log_d.mean()
+    sigma = 0.5907 * math.sqrt(max(0.0, np.sum(log_d ** 2) / (nu - 1) - mean ** 2))
+    target = mean - Z_99 * sigma / math.sqrt(nu)
+    u = np.arange(1, L + 1)
+    log_u = np.log2(u)
+
+    def G(z):
+        powers = (1 - z) ** (u - 1)
+        prefix = np.concatenate(([0.0], np.cumsum(log_u * powers)))  # A(m), m = 0..L
+        t = np.arange(d + 1, L + 1)
+        return (z * z * prefix[t - 1].sum() + z * np.sum(log_u[t - 1] * powers[t - 1])) / nu
+
+    def expected(p):
+        q = (1 - p) / (2 ** b - 1)
+        return G(p) + (2 ** b - 1) * G(q)
+
+    p = _solve_decreasing(expected, target, 2.0 ** -b, 1 - 1e-12)
+    h = 1.0 if p is None else _entropy(p) / b
+    return {'min-entropy': h, 'mean_log_distance': float(mean)}
+
+def t_tuple_estimate(bits, profile=None):
+    """SP 800-90B 6.3.5: most common t-tuples that occur at least 35 times."""
+    s = _bits_to_array(bits)
+    L = len(s)
+    max_count, _ = profile if profile is not None else repeat_profile(s)
+    lengths = np.flatnonzero(max_count[1:] >= 35) + 1
+    if len(lengths) == 0:
+        return {'error': "No tuple occurs 35 times"}
+    t = int(lengths.max())
+    i = np.arange(1, t + 1)
+    p_max = float(np.max((max_count[1:t + 1] / (L - i + 1)) ** (1 / i)))
+    return {'min-entropy': _entropy(_upper_bound(p_max, L)), 't': t}
+
+def lrs_estimate(bits, profile=None):
+    """SP 800-90B 6.3.6: collision probability of tuples up to the longest repeat."""
+    s = _bits_to_array(bits)
+    L = len(s)
+    max_count, pairs = profile if profile is not None else repeat_profile(s)
+    u = int(np.argmax(max_count[1:] < 20)) + 1
+    v = len(max_count) - 2  # longest repeated substring
+    if u > v:
+        return {'error': "No tuple shorter than 20 occurrences repeats"}
+    W = np.arange(u, v + 1)
+    total = (L - W + 1) * (L - W) / 2
+    p_max = float(np.max((pairs[u:v + 1] / total) ** (1 / W)))
+    return {'min-entropy': _entropy(_upper_bound(p_max, L)), 'u': u, 'v': v}
+
+def _local_probability(N, r):
+    """
+    P_local of SP 800-90B 6.3.7: the success probability at which a longest
+    run of r-1 correct predictions in N is at the 99% level.
+    """
+    def no_long_run(p):
+        q = 1 - p
+        x = 1.0
+        for _ in range(10):
+            x = 1 + q * p ** r * x ** (r + 1)
+        denom = (r + 1 - r * x) * q
+        if denom <= 0:
+            return 0.0
+        log_tail = (N + 1) * math.log(x)
+        return (1 - p * x) / denom * math.exp(-log_tail) if log_tail < 700 else 0.0
+
+    p = _solve_decreasing(no_long_run, 0.99, 1e-12, 1 - 1e-12)
+    return 0.0 if p is None else p
+
+def _predictor_result(correct):
+    """Min-entropy from a predictor's sequence of correct/incorrect guesses."""
+    N = len(correct)
+    C = int(correct.sum())
+    p_global = C / N
+    if C == 0:
+        p_global_upper = 1 - 0.01 ** (1 / N)
+    else:
+        p_global_upper = _upper_bound(p_global, N)
+    # Longest run of successes: distance between failures.
+    failures = np.flatnonzero(~correct)
+    gaps = np.diff(np.concatenate(([-1], failures, [N]))) - 1
+    r = int(gaps.max()) + 1
+    p_local = _local_probability(N, r)
+    p = max(p_global_upper, p_local, 0.5)
+    return {'min-entropy': _entropy(p), 'predictions': N, 'correct': C,
+            'p_global': p_global_upper, 'p_local': p_local}
+
+# Columns of predictions scored per vectorized step.
+_SCORE_CHUNK = 1 << 13
+
+def _scoreboard(correct_chunks, num_predictors):
+    """
+    Follows the SP 800-90B scoreboard: at every step the subpredictor with
+    the highest score so far (ties to the later one, the first step to the
+    first one) makes the prediction. Takes chunks of a (predictors x steps)
+    boolean matrix of subpredictor successes and returns the winner's.
+    """
+    scores = np.zeros(num_predictors, dtype=np.int64)
+    out = []
+    first = True
+    for correct in correct_chunks:
+        cum = np.cumsum(correct, axis=1) + scores[:, None]
+        before = np.concatenate((scores[:, None], cum[:, :-1]), axis=1)
+        winner = num_predictors - 1 - np.argmax(before[::-1], axis=0)
+        if first:
+            winner[0] = 0
+            first = False
+        out.append(correct[winner, np.arange(correct.shape[1])])
+        scores = cum[:, -1]
+    return np.concatenate(out)
+
+_MCW_WINDOWS = (63, 255, 1023, 4095)
+
+def multi_mcw_estimate(bits):
+    """SP 800-90B 6.3.7: most common value in sliding windows of 63..4095."""
+    s = _bits_to_array(bits)
+    L = len(s)
+    start = _MCW_WINDOWS[0]
+    if L <= start + 1:
+        return {'error': f"Sequence too short (need more than {start + 1} bits)"}
+    ones = np.concatenate(([0], np.cumsum(s, dtype=np.int64)))
+    i = np.arange(start, L)
+    correct = np.zeros((len(_MCW_WINDOWS), len(i)), dtype=bool)
+    for j, w in enumerate(_MCW_WINDOWS):
+        valid = i >= w
+        count = ones[i[valid]] - ones[i[valid] - w]
+        prediction = (2 * count > w).astype(np.uint8)  # windows are odd: no ties
+        correct[j, valid] = prediction == s[i[valid]]
+    chunks = (correct[:, k:k + _SCORE_CHUNK] for k in range(0, len(i), _SCORE_CHUNK))
+    return _predictor_result(_scoreboard(chunks, len(_MCW_WINDOWS)))
+
+_LAG_DEPTH = 128
+
+def lag_estimate(bits):
+    """SP 800-90B 6.3.8: predicts the value seen 1..128 samples earlier."""
+    s = _bits_to_array(bits)
+    L = len(s)
+    if L < 3:
+        return {'error': "Sequence too short"}
+    D = _LAG_DEPTH
+    padded = np.concatenate((np.full(D, 2, dtype=np.uint8), s))  # 2 never matches
+
+    def chunks():
+        for k in range(1, L, _SCORE_CHUNK):
+            stop = min(L, k + _SCORE_CHUNK)
+            # history[c, d-1] = s[i - d] for column c (i = k + c)
+            history = np.lib.stride_tricks.sliding_window_view(padded[k:stop + D - 1], D)[:, ::-1]
+            yield (history == s[k:stop, None]).T
+
+    return _predictor_result(_scoreboard(chunks(), D))
+
+def _prior_follower_counts(keys, followers):
+    """
+    For every event (key, follower bit), counts the earlier events with
+    the same key whose follower was 0 and 1.
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    f = followers[order].astype(np.int64)
+    new_group = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+    position = np.arange(len(keys))
+    group_start = np.maximum.accumulate(np.where(new_group, position, 0))
+    ones_incl = np.cumsum(f)
+    ones_before_group = (ones_incl - f)[group_start]
+    ones = ones_incl - f - ones_before_group
+    seen = position - group_start
+    result_ones = np.empty(len(keys), dtype=np.int64)
+    result_seen = np.empty(len(keys), dtype=np.int64)
+    result_ones[order] = ones
+    result_seen[order] = seen
+    return result_seen - result_ones, result_ones, order, new_group
+
+def _contexts(s, depth):
+    """contexts[d-1][i] = the d bits before position i, as an int (i >= d)."""
+    L = len(s)
+    ctx = np.zeros(L, dtype=np.int64)
+    out = []
+    for d in range(1, depth + 1):
+        shifted = np.zeros(L, dtype=np.int64)
+        shifted[d:] = s[:L - d].astype(np.int64) << (d - 1)
+        ctx = ctx + shifted
+        out.append(ctx.copy())
+    return out
+
+_MMC_DEPTH = 16
+
+def multi_mmc_estimate(bits):
+    """SP 800-90B 6.3.9: Markov models of order 1..16 learned online."""
+    s = _bits_to_array(bits)
+    L = len(s)
+    if L < 4:
+        return {'error': "Sequence too short"}
+    D = _MMC_DEPTH
+    i = np.arange(2, L)
+    correct = np.zeros((D, len(i)), dtype=bool)
+    for d, ctx in enumerate(_contexts(s, D), start=1):
+        pos = np.arange(d, L)
+        zeros, ones, _, _ = _prior_follower_counts(ctx[d:], s[d:])
+        prediction = np.where(ones >= zeros, 1, 0)  # ties go to the larger value
+        valid = (zeros + ones) > 0
+        hit = valid & (prediction == s[d:])
+        correct[d - 1, pos[pos >= 2] - 2] = hit[pos >= 2]
+    chunks = (correct[:, k:k + _SCORE_CHUNK] for k in range(0, len(i), _SCORE_CHUNK))
+    return _predictor_result(_scoreboard(chunks, D))
+
+_LZ78Y_DEPTH = 16
+_LZ78Y_MAX_DICT = 65536
+
+def lz78y_estimate(bits):
+    """SP 800-90B 6.3.10: LZ78Y dictionary of contexts up to 16 bits long."""
+    s = _bits_to_array(bits)
+    L = len(s)
+    B = _LZ78Y_DEPTH
+    if L < B + 3:
+        return {'error': "Sequence too short"}
+    # Events: (context of length j before position p, follower s[p]) for p >= B.
+    # A context enters the dictionary on its first event, while there is room;
+    # within one step the longest context is added first.
+    pos = np.arange(B, L)
+    counts, firsts = [], []
+    for j, ctx in enumerate(_contexts(s, B), start=1):
+        keys = ctx[B:] + (1 << j)
+        zeros, ones, order, new_group = _prior_follower_counts(keys, s[B:])
+        group_start = np.maximum.accumulate(np.where(new_group, np.arange(len(keys)), 0))
+        first_pos = np.empty(len(keys), dtype=np.int64)
+        first_pos[order] = order[group_start]
+        counts.append((zeros, ones))
+        firsts.append(first_pos)
+    # Admission order of all distinct contexts: by first event, then by -j.
+    first_events = np.concatenate([np.unique(f) * (B + 1) + (B - j)
+                                   for j, f in enumerate(firsts, start=1)])
+    first_events.sort()
+    limit = first_events[_LZ78Y_MAX_DICT - 1] if len(first_events) > _LZ78Y_MAX_DICT else np.inf
+    best = np.zeros(len(pos), dtype=np.int64)
+    prediction = np.full(len(pos), 2, dtype=np.uint8)
+    for j in range(B, 0, -1):
+        zeros, ones = counts[j - 1]
+        admitted = firsts[j - 1] * (B + 1) + (B - j) <= limit
+        count = np.where(ones >= zeros, ones, zeros)
+        take = admitted & (count > best)
+        best = np.where(take, count, best)
+        prediction = np.where(take, np.where(ones >= zeros, 1, 0), prediction)
+    correct = (prediction == s[B:])[1:]  # predictions start at i = B + 1
+    return _predictor_result(correct)
+
+# --- Suite ------------------------------------------------------------------------
+
+ESTIMATORS = {
+    'most_common_value': most_common_value_estimate,
+    'collision': collision_estimate,
+    'markov': markov_estimate,
+    'compression': compression_estimate,
+    't_tuple': t_tuple_estimate,
+    'lrs': lrs_estimate,
+    'multi_mcw': multi_mcw_estimate,
+    'lag': lag_estimate,
+    'multi_mmc': multi_mmc_estimate,
+    'lz78y': lz78y_estimate,
+}
+
+def min_entropy_test(bits, bits_per_sample=None):
+    """
+    Runs the SP 800-90B non-IID estimators and reports the assessed
+    min-entropy, the lowest of the applicable estimates.
+
+    Args:
+        bits (str, list or np.ndarray): The source's output bits.
+        bits_per_sample (float, optional): Bits per generator output, to
+            also report the min-entropy per output.
+
+    Returns:
+        dict: Per-estimator results, min-entropy per bit (and per sample),
+        and the estimator that gave the lowest figure.
+    """
+    try:
+        s = _bits_to_array(bits)
+        if len(s) < 1000:
+            return {"error": "Sequence too short (less than 1000 bits)"}
+        profile = repeat_profile(s)
+        estimates = {}
+        for name, estimator in ESTIMATORS.items():
+            if name in ('t_tuple', 'lrs'):
+                estimates[name] = estimator(s, profile=profile)
+            else:
+                estimates[name] = estimator(s)
+        applicable = {k: v['min-entropy'] for k, v in estimates.items() if 'min-entropy' in v}
+        limiting = min(applicable, key=applicable.get)
+        h = applicable[limiting]
+        result = {
+            'min-entropy': h,
+            'limiting_estimator': limiting,
+            'estimates': estimates,
+            'n': len(s)
+        }
+        if bits_per_sample:
+            result['min-entropy_per_sample'] = h * bits_per_sample
+        return result
+    except Exception as e:
+        logging.error(f"min_entropy_test failed: {e}")
+        return {'error': str(e), 'passed': False}
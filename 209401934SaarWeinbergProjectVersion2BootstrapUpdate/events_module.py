@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+In-process publish/subscribe for task progress, feeding the
+/events/<task_id> Server-Sent Events stream.
+
+Publishers send the task's latest state to a topic (the task ID). Each
+subscriber has its own small queue; a slow subscriber loses intermediate
+states, never the newest one, since only the current state matters for
+progress. New subscribers first receive the last published state.
+"""
+
+import json
+import queue
+import threading
+
+class Subscription:
+    """Receives the states published on one topic."""
+    def __init__(self, bus, topic, maxsize):
+        self.bus = bus
+        self.topic = topic
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def _offer(self, data):
+        while True:
+            try:
+                self.queue.put_nowait(data)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()  # drop the oldest state
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next state, or None if nothing arrives within timeout seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class EventBus:
+    """Topic -> subscribers, plus the last state per topic for late joiners."""
+    def __init__(self, queue_size=16):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic):
+        subscription = Subscription(self, topic, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+            last = self._last.get(topic)
+        if last is not None:
+            subscription._offer(last)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+    def publish(self, topic, data):
+        with self._lock:
+            self._last[topic] = data
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            subscription._offer(data)
+
+    def forget(self, topic):
+        """Drops the stored last state of a topic (e.g. when its task is removed)."""
+        with self._lock:
+            self._last.pop(topic, None)
+
+    def subscriber_count(self, topic=None):
+        with self._lock:
+            if topic is not None:
+                return len(self._subscribers.get(topic, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+def sse_message(data, event=None):
+    """Formats one Server-Sent Events message with a JSON payload."""
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
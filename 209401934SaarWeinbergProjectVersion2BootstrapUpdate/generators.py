@@ -24,6 +24,7 @@ logging.basicConfig(
 _global_pyaudio_instance = None
 _global_stream_instance = None
 _lock = threading.Lock() 
+_stream_read_lock = threading.Lock() # the shared stream is read by one thread at a time (jobs, direct page, prefetcher)
 
 def get_global_stream(CHUNK,FORMAT,CHANNELS,RATE,p):
     global _global_stream_instance
@@ -81,6 +82,21 @@ class RandomGenerator:
     """
     def generate(self, upper_bound: int) -> int:
         raise NotImplementedError("Implement generate in subclass")
+
+    def generate_many(self, upper_bound: int, count: int) -> np.ndarray:
+        """
+        Generates count random ints in [0, upper_bound] as a NumPy int64 array.
+        Sub-classes with a faster batch path may override it.
+        """
+        return np.fromiter((self.generate(upper_bound) for _ in range(count)),
+                           dtype=np.int64, count=count)
+
+    def generate_bytes(self, count: int) -> bytes:
+        """
+        Returns count raw random bytes, one generate(255) draw per byte.
+        Sub-classes with a native byte source may override it.
+        """
+        return self.generate_many(255, count).astype(np.uint8).tobytes()
   
         
 class JavaRandomGenerator(RandomGenerator):
@@ -107,6 +123,9 @@ class PythonRandomGenerator(RandomGenerator):
             logging.error(f"Python random generation failed: {e}")
             return 0
 
+    def generate_bytes(self, count: int) -> bytes:
+        return random.randbytes(count)
+
        
 class NanoTimeRandomGenerator(RandomGenerator):
     """
@@ -152,7 +171,8 @@ class SoundRandomGenerator(RandomGenerator):
         try:
             random_values = []
             for _ in range(4): # Read multiple times for better entropy
-                data = np.frombuffer(self.stream.read(self.CHUNK), dtype=np.int16)
+                with _stream_read_lock:
+                    data = np.frombuffer(self.stream.read(self.CHUNK), dtype=np.int16)
                 rms = np.sqrt(np.mean(data ** 2))
                 max_abs = np.max(np.abs(data))
                 if max_abs == 0:
@@ -181,6 +201,20 @@ class MixRandomGenerators(RandomGenerator):
            return self.j.generate(upper_bound)
         else:  
            return self.n.generate(upper_bound)
+
+    def generate_sources(self, upper_bound: int, count: int):
+        """
+        Draws count values from each source side by side: the i-th values of
+        both arrays come from the same step. Used to check the sources for
+        cross-correlation before trusting their combination.
+        Returns two NumPy int64 arrays (time source, Java source).
+        """
+        n_values = np.empty(count, dtype=np.int64)
+        j_values = np.empty(count, dtype=np.int64)
+        for i in range(count):
+            n_values[i] = self.n.generate(upper_bound)
+            j_values[i] = self.j.generate(upper_bound)
+        return n_values, j_values
          
         
     def close(self):
@@ -0,0 +1,719 @@
+# -*- coding: utf-8 -*-
+"""
+Statistical tests that run directly on integer streams, as produced by
+RandomGenerator.generate_many(upper_bound, count), instead of on bit strings.
+
+Includes Marsaglia's (Diehard) birthday spacings and overlapping
+permutations tests, which work on NumPy arrays in large batches with
+parameters and reference distributions computed once and cached, and the
+geometric parking lot, minimum distance (2D) and 3D spheres tests, where
+values become points and neighbour queries use a grid or k-d tree index,
+Knuth's equidistribution, gap, coupon collector and runs tests, whose
+binning adapts to the upper bound so that very large bounds still work,
+and a per-bit-position bias analysis over fixed-width outputs.
+"""
+
+import logging
+import math
+from functools import lru_cache
+from itertools import permutations
+
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.stats import chi2 as chi2_dist, kstest, norm
+
+# Values handled per vectorized step, to keep memory bounded on long streams.
+_CHUNK_VALUES = 1 << 20
+
+def _as_int_array(values):
+    """Converts a sequence of non-negative ints to a NumPy int64 array."""
+    return np.asarray(values, dtype=np.int64)
+
+def _repeated_spacings(values, m):
+    """
+    Number of repeated spacings in each batch of m consecutive birthdays:
+    sort the batch, take the spacings between neighbours, sort them and
+    count equal neighbours. Batches are processed in chunks.
+    """
+    R = len(values) // m
+    repeats = np.empty(R, dtype=np.int64)
+    step = max(1, _CHUNK_VALUES // m)
+    for start in range(0, R, step):
+        stop = min(R, start + step)
+        batch = np.sort(values[start * m:stop * m].reshape(-1, m), axis=1)
+        spacings = np.sort(np.diff(batch, axis=1, prepend=0), axis=1)
+        repeats[start:stop] = np.count_nonzero(spacings[:, 1:] == spacings[:, :-1], axis=1)
+    return repeats
+
+# Number of simulated values behind each birthday spacings reference table.
+_REFERENCE_VALUES = 1 << 24
+
+@lru_cache(maxsize=None)
+def _birthday_reference(days, lam=2.0):
+    """
+    Parameters and reference distribution of the birthday spacings test for
+    a "year" of `days` days.
+
+    The number of birthdays m is chosen so that the expected number of
+    repeated spacings, about m^3 / (4 * days), is close to `lam`. The
+    Poisson limit is only accurate for very large years, so the reference
+    class counts are simulated once with a fixed-seed PCG64 stream.
+
+    Returns:
+        tuple: (m, lambda, reference counts of 0..5+ repeated spacings)
+    """
+    m = max(2, int(round((4 * lam * days) ** (1 / 3))))
+    rng = np.random.Generator(np.random.PCG64(20250818))
+    reference = np.zeros(6, dtype=np.int64)
+    step = max(m, (_CHUNK_VALUES // m) * m)
+    for _ in range(0, _REFERENCE_VALUES, step):
+        repeats = _repeated_spacings(rng.integers(0, days, step), m)
+        reference += np.bincount(np.minimum(repeats, 5), minlength=6)
+    return m, m ** 3 / (4 * days), reference
+
+def birthday_spacings_test(values, upper_bound, min_expected=5):
+    """
+    Marsaglia's birthday spacings test. Values in [0, upper_bound] are
+    birthdays in a year of upper_bound+1 days. The stream is cut into
+    batches of m birthdays and the repeated spacings in each batch are
+    counted. The distribution of these counts is compared with the cached
+    reference using a two-sample (homogeneity) chi-squared test.
+
+    Args:
+        values (array-like): Integers in [0, upper_bound].
+        upper_bound (int): Inclusive upper bound of the generator.
+        min_expected (int): Minimal expected count per class for chi-squared.
+
+    Returns:
+        dict: Batch parameters, class counts, chi-squared, p-value, pass/fail.
+    """
+    try:
+        values = _as_int_array(values)
+        days = upper_bound + 1
+        m, lam, reference = _birthday_reference(days)
+        R = len(values) // m
+        ref_probs = reference / reference.sum()
+        if R * ref_probs.min() < min_expected:
+            needed = int(math.ceil(min_expected / ref_probs.min())) * m
+            return {"error": f"Not enough samples (need at least {needed} values for m={m})"}
+        repeats = _repeated_spacings(values, m)
+        observed = np.bincount(np.minimum(repeats, 5), minlength=6)
+        table = np.vstack([observed, reference])
+        expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / table.sum()
+        chi2 = float(np.sum((table - expected) ** 2 / expected))
+        p = float(chi2_dist.sf(chi2, len(observed) - 1))
+        return {
+            'chi2': chi2,
+            'p-value': p,
+            'passed': p > 0.01,
+            'birthdays': m,
+            'days': days,
+            'lambda': lam,
+            'batches': R,
+            'mean_repeats': float(repeats.mean()),
+            'class_counts': observed.tolist()
+        }
+    except Exception as e:
+        logging.error(f"birthday_spacings_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+@lru_cache(maxsize=None)
+def _permutation_index(t):
+    """
+    Lookup table from the base-t code of an argsort result to the index of
+    that permutation in 0..t!-1. Codes that are not permutations map to -1.
+    """
+    table = np.full(t ** t, -1, dtype=np.int64)
+    weights = t ** np.arange(t)
+    for idx, perm in enumerate(permutations(range(t))):
+        table[int(np.dot(perm, weights))] = idx
+    return table
+
+def _overlapping_permutation_counts(values, t):
+    """Counts the orderings of all overlapping t-tuples of values."""
+    table = _permutation_index(t)
+    weights = t ** np.arange(t)
+    counts = np.zeros(math.factorial(t), dtype=np.int64)
+    windows_total = len(values) - t + 1
+    for start in range(0, windows_total, _CHUNK_VALUES):
+        stop = min(windows_total, start + _CHUNK_VALUES)
+        chunk = values[start:stop + t - 1]
+        windows = np.lib.stride_tricks.sliding_window_view(chunk, t)
+        order = np.argsort(windows, axis=1, kind='stable')
+        counts += np.bincount(table[order @ weights], minlength=len(counts))
+    return counts
+
+@lru_cache(maxsize=None)
+def _overlapping_permutations_reference(t):
+    """
+    Weak inverse and rank of the covariance matrix of the t! overlapping
+    permutation counts, per window. Neighbouring windows share values, so
+    the covariance includes, for every lag d < t, the joint distribution of
+    the orderings of two windows d apart. It is found by enumerating all
+    (t+d)! orderings of the t+d values the two windows cover.
+
+    Returns:
+        tuple: (pseudo-inverse of the covariance matrix, its rank)
+    """
+    table = _permutation_index(t)
+    weights = t ** np.arange(t)
+    k = math.factorial(t)
+    p = np.full(k, 1 / k)
+    cov = np.diag(p) - np.outer(p, p)
+    for d in range(1, t):
+        orders = np.array(list(permutations(range(t + d))), dtype=np.int64)
+        first = table[np.argsort(orders[:, :t], axis=1) @ weights]
+        second = table[np.argsort(orders[:, d:], axis=1) @ weights]
+        joint = np.zeros((k, k))
+        np.add.at(joint, (first, second), 1 / len(orders))
+        cov += joint + joint.T - 2 * np.outer(p, p)
+    return np.linalg.pinv(cov, hermitian=True), int(np.linalg.matrix_rank(cov, hermitian=True))
+
+def overlapping_permutations_test(values, t=5):
+    """
+    Marsaglia's overlapping permutations test (OPERM). Each window of t
+    consecutive values is reduced to its ordering (one of t! permutations)
+    and the orderings should be equally likely. Overlapping windows are
+    dependent, so the counts are tested with the quadratic form in the weak
+    inverse of their covariance matrix, which is chi-squared with
+    rank(covariance) degrees of freedom (96 for t=5). Ties are broken by
+    position, so the tie rate is reported; it should be near zero.
+
+    Args:
+        values (array-like): Integer stream.
+        t (int): Window length (2..5).
+
+    Returns:
+        dict: Statistic, degrees of freedom, p-value and pass/fail.
+    """
+    try:
+        values = _as_int_array(values)
+        if not 2 <= t <= 5:
+            return {"error": "Window length t must be between 2 and 5"}
+        if len(values) < 10 * math.factorial(t) + t:
+            return {"error": f"Not enough samples (need at least {10 * math.factorial(t) + t})"}
+        weak_inverse, df = _overlapping_permutations_reference(t)
+        counts = _overlapping_permutation_counts(values, t)
+        windows = counts.sum()
+        x = (counts - windows / len(counts)) / math.sqrt(windows)
+        stat = float(x @ weak_inverse @ x)
+        p = float(chi2_dist.sf(stat, df))
+        return {
+            'statistic': stat,
+            'df': df,
+            'p-value': p,
+            'passed': p > 0.01,
+            't': t,
+            'windows': int(windows),
+            'tie_rate': float(np.mean(values[1:] == values[:-1]))
+        }
+    except Exception as e:
+        logging.error(f"overlapping_permutations_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def _to_points(values, upper_bound, dim, points_per_run):
+    """
+    Maps consecutive values to points in the unit cube [0, 1)^dim and
+    groups them into runs of points_per_run points.
+
+    Returns:
+        np.ndarray: Array of shape (runs, points_per_run, dim).
+    """
+    values = _as_int_array(values)
+    runs = len(values) // (dim * points_per_run)
+    coords = values[:runs * dim * points_per_run] / (upper_bound + 1)
+    return coords.reshape(runs, points_per_run, dim)
+
+def _combine_run_p_values(p_values):
+    """Single run: its own p-value. Several runs: KS test for uniformity."""
+    if len(p_values) == 1:
+        return float(p_values[0])
+    return float(kstest(p_values, 'uniform').pvalue)
+
+# Diehard parking lot constants: 12000 attempts on a 100x100 lot park
+# 3523 cars on average, with standard deviation 21.9.
+_PARKING_ATTEMPTS = 12000
+_PARKING_SIDE = 100
+_PARKING_MEAN = 3523
+_PARKING_SIGMA = 21.9
+
+def _park_cars(points):
+    """
+    Parks cars (unit squares) one by one, skipping any that touches an
+    already parked car (|dx| <= 1 and |dy| <= 1). The lot is indexed with a
+    grid of unit cells: two parked cars can never share a cell, so each
+    attempt only checks the 3x3 neighbouring cells.
+    """
+    size = _PARKING_SIDE + 2  # one empty cell of padding on every side
+    grid = [None] * (size * size)
+    parked = 0
+    for x, y in points.tolist():
+        cell = (int(x) + 1) * size + int(y) + 1
+        crash = False
+        for row in (cell - size, cell, cell + size):
+            for other in grid[row - 1:row + 2]:
+                if other is not None and abs(other[0] - x) <= 1 and abs(other[1] - y) <= 1:
+                    crash = True
+                    break
+            if crash:
+                break
+        if not crash:
+            grid[cell] = (x, y)
+            parked += 1
+    return parked
+
+def parking_lot_test(values, upper_bound):
+    """
+    Diehard parking lot test. Pairs of values give 12000 attempts to park
+    a car on a 100x100 lot; the number of cars parked should be close to
+    3523. With several runs, the per-run p-values are tested for
+    uniformity with a KS test.
+
+    Args:
+        values (array-like): Integers in [0, upper_bound].
+        upper_bound (int): Inclusive upper bound of the generator.
+
+    Returns:
+        dict: Cars parked per run, z-scores, p-value and pass/fail.
+    """
+    try:
+        runs = _to_points(values, upper_bound, 2, _PARKING_ATTEMPTS) * _PARKING_SIDE
+        if len(runs) == 0:
+            return {"error": f"Not enough samples (need at least {2 * _PARKING_ATTEMPTS})"}
+        parked = np.array([_park_cars(points) for points in runs])
+        z = (parked - _PARKING_MEAN) / _PARKING_SIGMA
+        run_p = 2 * norm.sf(np.abs(z))
+        p = _combine_run_p_values(run_p)
+        return {
+            'parked': parked.tolist(),
+            'z': z.tolist(),
+            'p-value': p,
+            'passed': p > 0.01,
+            'runs': len(runs)
+        }
+    except Exception as e:
+        logging.error(f"parking_lot_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def _nearest_neighbour_test(values, upper_bound, dim, points):
+    """
+    Shared body of the minimum distance and 3D spheres tests. For n random
+    points in the unit cube, the smallest pairwise distance d satisfies
+    P(d^dim > x) ~ exp(-x / mean) with mean = 1 / (C_dim * n^2 / 2), where
+    C_dim is the volume of the unit ball. Nearest neighbours come from a
+    k-d tree, so a run of 10^6 points takes seconds instead of O(n^2) checks.
+    """
+    runs = _to_points(values, upper_bound, dim, points)
+    if len(runs) == 0:
+        return {"error": f"Not enough samples (need at least {dim * points})"}
+    ball_volume = math.pi ** (dim / 2) / math.gamma(dim / 2 + 1)
+    mean = 2 / (ball_volume * points ** 2)
+    min_dist = np.empty(len(runs))
+    for i, pts in enumerate(runs):
+        distances, _ = cKDTree(pts).query(pts, k=2)
+        min_dist[i] = distances[:, 1].min()
+    run_p = 1 - np.exp(-min_dist ** dim / mean)
+    p = _combine_run_p_values(run_p)
+    return {
+        'min_distance': min_dist.tolist(),
+        'expected_power_mean': mean,
+        'p-value': p,
+        'passed': p > 0.01,
+        'runs': len(runs),
+        'points': points,
+        'duplicate_points': int(np.count_nonzero(min_dist == 0))
+    }
+
+def minimum_distance_test(values, upper_bound, points=8000):
+    """
+    Diehard minimum distance test. Pairs of values are points in a square;
+    the squared smallest distance between any two points of a run should be
+    exponentially distributed.
+
+    Args:
+        values (array-like): Integers in [0, upper_bound].
+        upper_bound (int): Inclusive upper bound of the generator.
+        points (int): Points per run (Diehard uses 8000).
+
+    Returns:
+        dict: Minimum distance per run, p-value and pass/fail.
+    """
+    try:
+        return _nearest_neighbour_test(values, upper_bound, 2, points)
+    except Exception as e:
+        logging.error(f"minimum_distance_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def spheres_3d_test(values, upper_bound, points=4000):
+    """
+    Diehard 3D spheres test. Triples of values are points in a cube; the
+    cube of the smallest distance between any two points of a run (the
+    radius of the smallest sphere reaching a neighbour) should be
+    exponentially distributed.
+
+    Args:
+        values (array-like): Integers in [0, upper_bound].
+        upper_bound (int): Inclusive upper bound of the generator.
+        points (int): Points per run (Diehard uses 4000).
+
+    Returns:
+        dict: Minimum distance per run, p-value and pass/fail.
+    """
+    try:
+        return _nearest_neighbour_test(values, upper_bound, 3, points)
+    except Exception as e:
+        logging.error(f"spheres_3d_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def _chi2_result(observed, expected, df=None):
+    """Chi-squared statistic and p-value of observed vs expected counts."""
+    observed = np.asarray(observed, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    chi2 = float(np.sum((observed - expected) ** 2 / expected))
+    df = len(observed) - 1 if df is None else df
+    return chi2, float(chi2_dist.sf(chi2, df))
+
+def equidistribution_test(values, upper_bound, max_bins=1 << 16, min_expected=5):
+    """
+    Knuth's equidistribution (frequency) test on integers. Values are counted
+    in buckets over [0, upper_bound]: one bucket per value when the bound is
+    small, otherwise as many equal-width buckets as the sample size allows.
+    Bucket widths may differ by one, and the expected counts follow them
+    exactly, so modulo bias (low values too frequent) shows up directly.
+
+    Args:
+        values (array-like): Integers in [0, upper_bound].
+        upper_bound (int): Inclusive upper bound of the generator.
+        max_bins (int): Maximal number of buckets.
+        min_expected (int): Minimal expected count per bucket.
+
+    Returns:
+        dict: Number of buckets, chi-squared, p-value and pass/fail.
+    """
+    try:
+        values = _as_int_array(values)
+        N = len(values)
+        domain = upper_bound + 1
+        bins = int(min(domain, max_bins, N // min_expected))
+        if bins < 2:
+            return {"error": f"Not enough samples (need at least {2 * min_expected})"}
+        if values.min() < 0 or values.max() > upper_bound:
+            return {"error": "Values outside [0, upper_bound]"}
+        # Python ints, so i * domain cannot overflow for bounds near 2^63.
+        edges = np.array([i * domain // bins for i in range(bins + 1)], dtype=np.int64)
+        observed = np.bincount(np.searchsorted(edges, values, side='right') - 1, minlength=bins)
+        expected = np.diff(edges) / domain * N
+        chi2, p = _chi2_result(observed, expected)
+        return {
+            'chi2': chi2,
+            'p-value': p,
+            'passed': p > 0.01,
+            'bins': bins,
+            'N': N,
+            'max_deviation': float(np.max(np.abs(observed - expected) / np.sqrt(expected)))
+        }
+    except Exception as e:
+        logging.error(f"equidistribution_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def gap_test(values, upper_bound, alpha=0.0, beta=0.5, max_gap=None, min_expected=5):
+    """
+    Knuth's gap test. Marks the values that fall in [alpha, beta) of the
+    range and counts the lengths of the gaps between marked values. Gap
+    lengths should be geometric; gaps of max_gap or more share one class.
+
+    Args:
+        values (array-like): Integers in [0, upper_bound].
+        upper_bound (int): Inclusive upper bound of the generator.
+        alpha, beta (float): Marked interval as fractions of the range.
+        max_gap (int, optional): Tail class; chosen from the data if None.
+        min_expected (int): Minimal expected count in the tail class.
+
+    Returns:
+        dict: Gap class counts, chi-squared, p-value and pass/fail.
+    """
+    try:
+        values = _as_int_array(values)
+        domain = upper_bound + 1
+        lo, hi = int(math.ceil(alpha * domain)), int(math.ceil(beta * domain))
+        p = (hi - lo) / domain  # exact probability of a marked integer
+        if not 0 < p < 1:
+            return {"error": "The marked interval must be a proper part of the range"}
+        marked = np.flatnonzero((values >= lo) & (values < hi))
+        gaps = np.diff(marked, prepend=-1) - 1
+        G = len(gaps)
+        if max_gap is None:
+            max_gap = int(math.log(min_expected / G) / math.log(1 - p)) if G > min_expected else 0
+        if max_gap < 1:
+            return {"error": "Not enough samples for the gap test"}
+        probs = p * (1 - p) ** np.arange(max_gap)
+        probs = np.append(probs, (1 - p) ** max_gap)
+        observed = np.bincount(np.minimum(gaps, max_gap), minlength=max_gap + 1)
+        chi2, p_value = _chi2_result(observed, G * probs)
+        return {
+            'chi2': chi2,
+            'p-value': p_value,
+            'passed': p_value > 0.01,
+            'gaps': G,
+            'max_gap': max_gap,
+            'gap_counts': observed.tolist()
+        }
+    except Exception as e:
+        logging.error(f"gap_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+@lru_cache(maxsize=None)
+def _coupon_probabilities(d, t):
+    """
+    Probabilities that collecting all d coupons takes exactly r draws
+    (d <= r < t), and t or more draws, from Stirling numbers of the
+    second kind: P(r) = d!/d^r * S(r-1, d-1).
+    """
+    stirling = [[0] * (d + 1) for _ in range(t + 1)]
+    stirling[0][0] = 1
+    for n in range(1, t + 1):
+        for k in range(1, d + 1):
+            stirling[n][k] = k * stirling[n - 1][k] + stirling[n - 1][k - 1]
+    fact = math.factorial(d)
+    probs = [fact * stirling[r - 1][d - 1] / d ** r for r in range(d, t)]
+    probs.append(1 - fact * stirling[t - 1][d] / d ** (t - 1))
+    return np.array(probs)
+
+def coupon_collector_test(values, upper_bound, d=5, t=None, min_expected=5):
+    """
+    Knuth's coupon collector test. Values are mapped to d equally likely
+    categories and the stream is cut into segments, each ending as soon as
+    every category has been seen. Segment lengths are compared with their
+    theoretical distribution. Values above the largest multiple of d in the
+    range are dropped, so the categories stay exactly equiprobable.
+
+    Args:
+        values (array-like): Integers in [0, upper_bound].
+        upper_bound (int): Inclusive upper bound of the generator.
+        d (int): Number of categories.
+        t (int, optional): Tail class for long segments; chosen if None.
+        min_expected (int): Minimal expected count in the tail class.
+
+    Returns:
+        dict: Segment length counts, chi-squared, p-value and pass/fail.
+    """
+    try:
+        values = _as_int_array(values)
+        width = (upper_bound + 1) // d
+        if width == 0:
+            return {"error": "The range is smaller than the number of categories"}
+        cats = values[values < width * d] // width
+        n = len(cats)
+        # next_seen[c, i]: first position >= i holding category c (n if none).
+        # The end of a segment starting at i is the latest of these.
+        positions = np.arange(n)
+        segment_end = np.full(n, -1, dtype=np.int64)
+        for c in range(d):
+            nxt = np.where(cats == c, positions, n)
+            nxt = np.minimum.accumulate(nxt[::-1])[::-1]
+            np.maximum(segment_end, nxt, out=segment_end)
+        ends = segment_end.tolist()
+        lengths = []
+        start = 0
+        while start < n and ends[start] < n:
+            lengths.append(ends[start] - start + 1)
+            start = ends[start] + 1
+        lengths = np.array(lengths, dtype=np.int64)
+        S = len(lengths)
+        if t is None:
+            t = d
+            while t < 40 * d and S * _coupon_probabilities(d, t + 1)[-1] >= min_expected:
+                t += 1
+        probs = _coupon_probabilities(d, t)
+        observed = np.bincount(np.minimum(lengths, t) - d, minlength=t - d + 1)
+        # The shortest lengths are rare for larger d: merge them into one class.
+        head = int(np.searchsorted(np.cumsum(probs) * S, min_expected))
+        if head >= len(probs) - 2 or S * probs[-1] < min_expected:
+            return {"error": "Not enough samples for the coupon collector test"}
+        merged_obs = np.concatenate(([observed[:head + 1].sum()], observed[head + 1:]))
+        merged_exp = np.concatenate(([probs[:head + 1].sum()], probs[head + 1:])) * S
+        chi2, p = _chi2_result(merged_obs, merged_exp)
+        return {
+            'chi2': chi2,
+            'p-value': p,
+            'passed': p > 0.01,
+            'segments': S,
+            'categories': d,
+            'max_length': t,
+            'length_counts': observed.tolist()
+        }
+    except Exception as e:
+        logging.error(f"coupon_collector_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+# Knuth's run test (TAOCP vol. 2, 3.3.2 G): inverse covariance matrix a and
+# probabilities b of ascending runs of length 1..5 and 6 or more.
+_RUNS_UP_A = np.array([
+    [4529.4, 9044.9, 13568, 18091, 22615, 27892],
+    [9044.9, 18097, 27139, 36187, 45234, 55789],
+    [13568, 27139, 40721, 54281, 67852, 83685],
+    [18091, 36187, 54281, 72414, 90470, 111580],
+    [22615, 45234, 67852, 90470, 113262, 139476],
+    [27892, 55789, 83685, 111580, 139476, 172860],
+])
+_RUNS_UP_B = np.array([1 / 6, 5 / 24, 11 / 120, 19 / 720, 29 / 5040, 1 / 840])
+
+def runs_up_test(values):
+    """
+    Knuth's runs up test. Counts ascending runs of length 1..5 and 6+;
+    consecutive runs are dependent, so the statistic uses Knuth's
+    covariance matrix and is chi-squared with 6 degrees of freedom. Equal
+    neighbours end a run, which penalizes streams with many ties.
+
+    Args:
+        values (array-like): Integer stream (at least 4000 values).
+
+    Returns:
+        dict: Run length counts, statistic, p-value and pass/fail.
+    """
+    try:
+        values = _as_int_array(values)
+        n = len(values)
+        if n < 4000:
+            return {"error": "Sequence too short (less than 4000 values)"}
+        starts = np.flatnonzero(np.diff(values) <= 0) + 1
+        lengths = np.diff(starts, prepend=0, append=n)
+        counts = np.bincount(np.minimum(lengths, 6), minlength=7)[1:]
+        dev = counts - n * _RUNS_UP_B
+        stat = float(dev @ _RUNS_UP_A @ dev / (n - 6))
+        p = float(chi2_dist.sf(stat, 6))
+        return {
+            'statistic': stat,
+            'p-value': p,
+            'passed': p > 0.01,
+            'run_counts': counts.tolist(),
+            'n': n
+        }
+    except Exception as e:
+        logging.error(f"runs_up_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def runs_up_down_test(values):
+    """
+    Runs up and down test. Counts the maximal monotone (ascending or
+    descending) runs of the stream; for n distinct values their number
+    has mean (2n-1)/3 and variance (16n-29)/90. Equal neighbours are
+    skipped and the tie count is reported.
+
+    Args:
+        values (array-like): Integer stream.
+
+    Returns:
+        dict: Number of runs, z-score, p-value and pass/fail.
+    """
+    try:
+        values = _as_int_array(values)
+        signs = np.sign(np.diff(values))
+        ties = int(np.count_nonzero(signs == 0))
+        signs = signs[signs != 0]
+        n = len(signs) + 1
+        if n < 20:
+            return {"error": "Sequence too short (less than 20 non-tied values)"}
+        runs = int(np.count_nonzero(signs[1:] != signs[:-1])) + 1
+        mean = (2 * n - 1) / 3
+        z = (runs - mean) / math.sqrt((16 * n - 29) / 90)
+        p = float(2 * norm.sf(abs(z)))
+        return {
+            'runs': runs,
+            'expected_runs': mean,
+            'z-value': z,
+            'p-value': p,
+            'passed': p > 0.01,
+            'ties': ties
+        }
+    except Exception as e:
+        logging.error(f"runs_up_down_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def _count_with_bits(n, mask):
+    """Number of integers x in [0, n) with all bits of mask set."""
+    count = 0
+    for i in range(n.bit_length() - 1, -1, -1):
+        if not (n >> i) & 1:
+            continue
+        # x shares n's bits above i and has bit i = 0; the lower bits are free.
+        above = (n >> (i + 1)) << (i + 1)
+        if (above & mask) != (mask >> (i + 1)) << (i + 1) or (mask >> i) & 1:
+            continue
+        count += 1 << (i - bin(mask & ((1 << i) - 1)).count('1'))
+    return count
+
+def bit_position_test(values, upper_bound, alpha=0.01):
+    """
+    Per-bit-position bias analysis. Outputs are laid out as a bit matrix of
+    fixed width w = ceil(log2(upper_bound+1)) with np.unpackbits, so stuck or
+    biased positions (e.g. low digits of a coarse clock) are not hidden by
+    variable-length bin() strings. Each position's frequency of ones and
+    each pair of positions' joint frequency are compared with their exact
+    values under a uniform draw from [0, upper_bound] (not 1/2 and 1/4 when
+    the range is not a power of two). The smallest p-value is Bonferroni
+    corrected for the w + w(w-1)/2 tests.
+
+    Args:
+        values (array-like): Integers in [0, upper_bound].
+        upper_bound (int): Inclusive upper bound of the generator.
+        alpha (float): Significance level for the corrected p-value.
+
+    Returns:
+        dict: Per-position frequencies and z-scores, the pairwise correlation
+        matrix, the most deviant position and pair, corrected p-value, pass/fail.
+    """
+    try:
+        values = _as_int_array(values)
+        N = len(values)
+        n = upper_bound + 1
+        w = max(1, (upper_bound).bit_length())
+        if N < 100:
+            return {"error": "Not enough samples (less than 100 values)"}
+        if w > 63:
+            return {"error": "Upper bound too large (more than 63 bits)"}
+        ones = np.zeros(w, dtype=np.int64)
+        joint = np.zeros((w, w), dtype=np.int64)
+        step = 1 << 18
+        for start in range(0, N, step):
+            chunk = values[start:start + step].astype('>u8')
+            bits = np.unpackbits(chunk.view(np.uint8).reshape(-1, 8), axis=1)[:, ::-1][:, :w]
+            ones += bits.sum(axis=0, dtype=np.int64)
+            as_float = bits.astype(np.float32)
+            joint += np.rint(as_float.T @ as_float).astype(np.int64)
+        # Exact probabilities under a uniform draw from [0, upper_bound].
+        p = np.array([_count_with_bits(n, 1 << k) / n for k in range(w)])
+        p_joint = np.array([[_count_with_bits(n, (1 << a) | (1 << b)) / n for b in range(w)]
+                            for a in range(w)])
+        freq = ones / N
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (ones - N * p) / np.sqrt(N * p * (1 - p))
+            z_joint = (joint - N * p_joint) / np.sqrt(N * p_joint * (1 - p_joint))
+            sd = np.sqrt(freq * (1 - freq))
+            corr = (joint / N - np.outer(freq, freq)) / np.outer(sd, sd)
+        z = np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0)
+        z_joint = np.nan_to_num(z_joint, nan=0.0, posinf=0.0, neginf=0.0)
+        pairs = np.triu_indices(w, k=1)
+        p_pos = 2 * norm.sf(np.abs(z))
+        p_pairs = 2 * norm.sf(np.abs(z_joint[pairs]))
+        tests = w + len(p_pairs)
+        worst_pos = int(np.argmin(p_pos))
+        worst_pair = int(np.argmin(p_pairs)) if len(p_pairs) else None
+        p_min = min(p_pos.min(), p_pairs.min() if len(p_pairs) else 1.0)
+        corrected = float(min(1.0, p_min * tests))
+        return {
+            'width': w,
+            'frequencies': freq.tolist(),
+            'expected_frequencies': p.tolist(),
+            'z': z.tolist(),
+            'correlation': np.nan_to_num(corr).tolist(),
+            'worst_position': worst_pos,
+            'worst_pair': None if worst_pair is None else
+                (int(pairs[0][worst_pair]), int(pairs[1][worst_pair])),
+            'p-value': corrected,
+            'passed': corrected > alpha,
+            'N': N
+        }
+    except Exception as e:
+        logging.error(f"bit_position_test failed: {e}")
+        return {'error': str(e), 'passed': False}
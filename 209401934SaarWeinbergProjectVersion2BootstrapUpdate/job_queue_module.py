@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Job scheduler for test tasks: a bounded queue served by a fixed pool of
+worker threads, instead of one thread per request.
+
+Jobs carry a priority (higher runs first) and the generator they use;
+per-generator limits cap how many jobs of one generator run at once (the
+sound card supports a single stream, the Java generator a few processes).
+A queued job whose generator is at its limit is skipped over, not
+blocking jobs behind it. Every job gets a CancellationToken that the task
+checks while generating and while analyzing.
+"""
+
+import itertools
+import logging
+import threading
+from collections import Counter
+
+class QueueFull(Exception):
+    """Raised by JobScheduler.submit when the queue is at capacity."""
+
+class JobCancelled(Exception):
+    """Raised by CancellationToken.raise_if_cancelled."""
+
+class CancellationToken:
+    """Set once by the scheduler; read by the running job."""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled()
+
+class _Job:
+    def __init__(self, job_id, fn, args, kwargs, generator_name, priority, seq):
+        self.job_id = job_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.generator_name = generator_name
+        self.priority = priority
+        self.seq = seq
+        self.token = CancellationToken()
+
+class JobScheduler:
+    """
+    Bounded priority queue with `workers` threads. generator_limits maps
+    a generator name to its maximum number of concurrent jobs; unlisted
+    generators are limited only by the pool size.
+    """
+    def __init__(self, workers=4, max_queued=32, generator_limits=None):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.generator_limits = dict(generator_limits or {})
+        self._queued = []  # kept sorted: highest priority first, then FIFO
+        self._running = {}  # job_id -> job
+        self._running_per_generator = Counter()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._threads = [threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job_id, fn, args=(), kwargs=None, generator_name=None, priority=0):
+        """
+        Queues fn(*args, token=token, **kwargs).
+
+        Returns:
+            CancellationToken: The job's token.
+
+        Raises:
+            QueueFull: If max_queued jobs are already waiting.
+        """
+        with self._cond:
+            if len(self._queued) >= self.max_queued:
+                raise QueueFull(f"{len(self._queued)} jobs already queued")
+            job = _Job(job_id, fn, tuple(args), dict(kwargs or {}), generator_name,
+                       priority, next(self._seq))
+            self._queued.append(job)
+            self._queued.sort(key=lambda j: (-j.priority, j.seq))
+            self._cond.notify()
+            return job.token
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. Returns 'queued' if it was removed before starting,
+        'running' if its token was set, or None if the job is unknown.
+        """
+        with self._cond:
+            for i, job in enumerate(self._queued):
+                if job.job_id == job_id:
+                    del self._queued[i]
+                    job.token.cancel()
+                    return 'queued'
+            job = self._running.get(job_id)
+            if job is not None:
+                job.token.cancel()
+                return 'running'
+        return None
+
+    def position(self, job_id):
+        """0-based place of a queued job, or None if it is not queued."""
+        with self._cond:
+            for i, job in enumerate(self._queued):
+                if job.job_id == job_id:
+                    return i
+        return None
+
+    def _has_capacity(self, job):
+        limit = self.generator_limits.get(job.generator_name)
+        return limit is None or self._running_per_generator[job.generator_name] < limit
+
+    def _take_job(self):
+        """First queued job whose generator has capacity (lock held)."""
+        for i, job in enumerate(self._queued):
+            if self._has_capacity(job):
+                del self._queued[i]
+                self._running[job.job_id] = job
+                self._running_per_generator[job.generator_name] += 1
+                return job
+        return None
+
+    def acquire_generator(self, generator_name):
+        """
+        Takes one of the generator's slots for work outside the queue (e.g.
+        a streamed draw), so it counts against the generator's limit like a
+        running job. Returns False at once if the generator is at its limit;
+        otherwise release the slot with release_generator().
+        """
+        with self._cond:
+            limit = self.generator_limits.get(generator_name)
+            if limit is not None and self._running_per_generator[generator_name] >= limit:
+                return False
+            self._running_per_generator[generator_name] += 1
+            return True
+
+    def release_generator(self, generator_name):
+        with self._cond:
+            self._running_per_generator[generator_name] -= 1
+            self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopping and (job := self._take_job()) is None:
+                    self._cond.wait()
+                if job is None:
+                    return
+            try:
+                job.fn(*job.args, token=job.token, **job.kwargs)
+            except JobCancelled:
+                pass
+            except Exception:
+                logging.error(f"Job {job.job_id} failed", exc_info=True)
+            finally:
+                with self._cond:
+                    self._running.pop(job.job_id, None)
+                    self._running_per_generator[job.generator_name] -= 1
+                    # A finished job may free its generator for a skipped one.
+                    self._cond.notify_all()
+
+    def stats(self):
+        """Queued and running job counts, overall and per generator."""
+        with self._cond:
+            return {
+                'workers': self.workers,
+                'queued': len(self._queued),
+                'max_queued': self.max_queued,
+                'running': len(self._running),
+                'running_per_generator': {k: v for k, v in self._running_per_generator.items() if v},
+                'generator_limits': dict(self.generator_limits)
+            }
+
+    def shutdown(self, cancel_running=True):
+        """Drops queued jobs, optionally cancels running ones, and stops the workers."""
+        with self._cond:
+            for job in self._queued:
+                job.token.cancel()
+            self._queued.clear()
+            if cancel_running:
+                for job in self._running.values():
+                    job.token.cancel()
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Durable job and result store in SQLite (WAL mode), shared by every
+process of a multi-process deployment.
+
+Each job row holds the task's state (status text, progress, done flag,
+result text), its structured result as JSON, the generator, test and run
+ID it used, and a cancel flag: a stop request that reaches a process not
+running the job sets it, and the owning process polls for it. Lookups by
+task ID use the primary key; history queries by generator and time use
+indexes and are paginated. Every thread (and
+every forked process) opens its own connection, as sqlite3 connections
+must not be shared across either; WAL lets readers run alongside the
+single writer, and the busy timeout makes concurrent writers wait.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    task_id     TEXT PRIMARY KEY,
+    generator   TEXT,
+    test_type   TEXT,
+    status      TEXT,
+    progress    INTEGER DEFAULT 0,
+    done        INTEGER DEFAULT 0,
+    result      TEXT DEFAULT '',
+    result_json TEXT,
+    run_id      TEXT,
+    created     REAL NOT NULL,
+    updated     REAL NOT NULL,
+    cancel_requested INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created);
+CREATE INDEX IF NOT EXISTS jobs_generator_created ON jobs (generator, created);
+"""
+
+# Created after the migration below, as older databases lack the column.
+_CANCEL_INDEX = "CREATE INDEX IF NOT EXISTS jobs_cancel ON jobs (cancel_requested) WHERE cancel_requested = 1"
+
+_PERCENT = re.compile(r"(\d+)%")
+
+# Task state fields and the columns they are stored in.
+_STATE_COLUMNS = {
+    'status': 'status',
+    'done': 'done',
+    'result': 'result',
+    'generator_name': 'generator',
+    'run_id': 'run_id',
+}
+
+def _json_default(value):
+    """Makes NumPy scalars/arrays and tuples in result dicts JSON-serializable."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def to_json(value):
+    """JSON text of a result dict, converting NumPy values and non-string keys."""
+    return json.dumps(value, default=_json_default)
+
+def json_safe(value):
+    """Copy of a result dict as it is stored: plain lists, numbers and strings only."""
+    return json.loads(to_json(value))
+
+class JobStore:
+    """
+    SQLite-backed job states, results and history. With retention_seconds
+    set, jobs older than that are deleted by prune(), which save() runs at
+    most once every prune_interval seconds.
+    """
+    def __init__(self, path, timeout=10.0, retention_seconds=None, prune_interval=3600.0):
+        self.path = path
+        self.timeout = timeout
+        self.retention_seconds = retention_seconds
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0  # time.monotonic() of the next scheduled prune
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'cancel_requested' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER DEFAULT 0")
+            conn.execute(_CANCEL_INDEX)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _columns(state):
+        columns = {_STATE_COLUMNS[k]: v for k, v in state.items() if k in _STATE_COLUMNS}
+        if 'result_data' in state:
+            columns['result_json'] = to_json(state['result_data'])
+        if 'done' in columns:
+            columns['done'] = int(bool(columns['done']))
+        if 'status' in columns:
+            match = _PERCENT.search(columns['status'] or '')
+            if match:
+                columns['progress'] = int(match.group(1))
+            elif columns.get('done'):
+                columns['progress'] = 100
+        return columns
+
+    def save(self, task_id, state, test_type=None):
+        """Inserts or replaces a job's state."""
+        columns = self._columns(state)
+        if test_type is not None:
+            columns['test_type'] = test_type
+        now = time.time()
+        names = ', '.join(columns)
+        placeholders = ', '.join('?' for _ in columns)
+        updates = ', '.join(f"{name} = excluded.{name}" for name in columns)
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO jobs (task_id, {names}, created, updated) "
+                f"VALUES (?, {placeholders}, ?, ?) "
+                f"ON CONFLICT(task_id) DO UPDATE SET {updates}, updated = excluded.updated",
+                (task_id, *columns.values(), now, now))
+        if self.retention_seconds is not None and time.monotonic() >= self._next_prune:
+            self.prune()
+
+    def update(self, task_id, **fields):
+        """Updates some state fields of an existing job."""
+        columns = self._columns(fields)
+        if not columns:
+            return
+        assignments = ', '.join(f"{name} = ?" for name in columns)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments}, updated = ? WHERE task_id = ?",
+                         (*columns.values(), time.time(), task_id))
+
+    def save_result(self, task_id, result):
+        """Stores the structured (dict) result of a job as JSON."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET result_json = ?, updated = ? WHERE task_id = ?",
+                         (to_json(result), time.time(), task_id))
+
+    @staticmethod
+    def _row_to_job(row):
+        job = dict(row)
+        job['done'] = bool(job['done'])
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        job['generator_name'] = job.pop('generator')
+        raw = job.pop('result_json')
+        try:
+            job['result_data'] = json.loads(raw) if raw else None
+        except ValueError:
+            logging.error(f"JobStore: unreadable result for {job['task_id']}")
+            job['result_data'] = None
+        return job
+
+    def get(self, task_id):
+        """The job's state and structured result, or None."""
+        row = self._connect().execute("SELECT * FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def request_cancel(self, task_id):
+        """Flags an unfinished job to be stopped by the process running it; returns whether one was flagged."""
+        with self._connect() as conn:
+            return conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE task_id = ? AND done = 0",
+                                (task_id,)).rowcount > 0
+
+    def cancel_requests(self):
+        """Task IDs of the unfinished jobs flagged by request_cancel."""
+        rows = self._connect().execute(
+            "SELECT task_id FROM jobs WHERE cancel_requested = 1 AND done = 0").fetchall()
+        return [row['task_id'] for row in rows]
+
+    def clear_cancel(self, task_id):
+        """Clears the cancel flag once the owning process has handled it."""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 0 WHERE task_id = ?", (task_id,))
+
+    def history(self, generator=None, since=None, until=None, page=1, per_page=20):
+        """
+        Jobs newest first, optionally for one generator and a time window
+        (epoch seconds), one page at a time.
+
+        Returns:
+            dict: The page's jobs, page, per_page and the total match count.
+        """
+        page = max(1, int(page))
+        per_page = max(1, min(int(per_page), 200))
+        where, params = [], []
+        if generator:
+            where.append("generator = ?")
+            params.append(generator)
+        if since is not None:
+            where.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("created < ?")
+            params.append(until)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM jobs {clause}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM jobs {clause} ORDER BY created DESC, rowid DESC LIMIT ? OFFSET ?",
+            (*params, per_page, (page - 1) * per_page)).fetchall()
+        return {
+            'jobs': [self._row_to_job(row) for row in rows],
+            'page': page,
+            'per_page': per_page,
+            'total': total
+        }
+
+    def delete_before(self, timestamp):
+        """Removes jobs created before timestamp; returns how many."""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM jobs WHERE created < ?", (timestamp,)).rowcount
+
+    def prune(self):
+        """Removes jobs older than the retention period; returns how many (0 without one)."""
+        self._next_prune = time.monotonic() + self.prune_interval
+        if self.retention_seconds is None:
+            return 0
+        return self.delete_before(time.time() - self.retention_seconds)
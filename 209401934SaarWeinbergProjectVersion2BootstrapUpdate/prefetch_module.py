@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Per-generator prefetch buffers of raw random bits.
+
+A background thread per generator keeps the buffer between a low and a
+high watermark: once a draw takes it below the low mark, the thread
+refills it up to the high mark in batches. Requests are served from the
+buffer by rejection sampling - take bit_length(upper_bound) bits, retry
+if the value exceeds the bound - so values are uniform whenever the
+generator's bits are. Bits are consumed as they are read and never
+served twice. When the buffer runs dry the draw is a miss and the caller
+generates directly, as it would without a prefetcher.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+class Prefetcher:
+    """
+    Raw bits of one generator, refilled in the background.
+
+    Bits are fetched as words of word_bits bits, each one generate_many()
+    value in [0, 2**word_bits - 1], batch_words words per call.
+    """
+    def __init__(self, make_generator, low_watermark, high_watermark,
+                 word_bits=16, batch_words=64, retry_seconds=5.0):
+        if not 0 <= low_watermark < high_watermark:
+            raise ValueError("low_watermark must be below high_watermark")
+        self.make_generator = make_generator
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.word_bits = word_bits
+        self.batch_words = batch_words
+        self.retry_seconds = retry_seconds
+        self._words = deque()
+        self._reservoir = 0  # leftover bits of a partly consumed word
+        self._reservoir_bits = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._refill_loop, daemon=True, name="prefetch")
+        self._thread.start()
+
+    def _available(self):
+        return len(self._words) * self.word_bits + self._reservoir_bits
+
+    def _take_bits(self, k, taken):
+        """k bits as an int, or None if the buffer holds fewer; words read are added to taken (lock held)."""
+        if self._available() < k:
+            return None
+        while self._reservoir_bits < k:
+            word = self._words.popleft()
+            taken.append(word)
+            self._reservoir |= word << self._reservoir_bits
+            self._reservoir_bits += self.word_bits
+        value = self._reservoir & ((1 << k) - 1)
+        self._reservoir >>= k
+        self._reservoir_bits -= k
+        return value
+
+    def _draw(self, upper_bound, taken):
+        """One value in [0, upper_bound] from the buffer, or None when it runs dry (lock held)."""
+        k = max(1, upper_bound.bit_length())
+        while True:
+            value = self._take_bits(k, taken)
+            if value is None or value <= upper_bound:
+                return value
+
+    def max_count(self, upper_bound):
+        """Most values in [0, upper_bound] a full buffer can serve in one draw (without rejections)."""
+        return self.high_watermark // max(1, upper_bound.bit_length())
+
+    def draw(self, upper_bound):
+        """
+        A value in [0, upper_bound] from the buffer.
+
+        Returns:
+            int or None: The value, or None on a miss (buffer empty).
+        """
+        values = self.draw_many(upper_bound, 1)
+        return values[0] if values is not None else None
+
+    def draw_many(self, upper_bound, count):
+        """
+        count values in [0, upper_bound] from the buffer, all or nothing.
+
+        Returns:
+            list or None: The values, or None on a miss. A missed draw
+            leaves the buffer as it was: a draw the buffered bits cannot
+            cover is refused up front, and the bits read by a draw that
+            runs dry through rejections are put back.
+        """
+        if upper_bound < 0:
+            return None
+        with self._cond:
+            if self._available() < count * max(1, upper_bound.bit_length()):
+                values = None
+            else:
+                reservoir, reservoir_bits = self._reservoir, self._reservoir_bits
+                taken = []
+                values = []
+                for _ in range(count):
+                    value = self._draw(upper_bound, taken)
+                    if value is None:
+                        self._words.extendleft(reversed(taken))
+                        self._reservoir, self._reservoir_bits = reservoir, reservoir_bits
+                        values = None
+                        break
+                    values.append(value)
+            if values is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            if self._available() < self.low_watermark:
+                self._cond.notify()
+            return values
+
+    def _refill_loop(self):
+        generator = None
+        while True:
+            with self._cond:
+                while not self._stopping and self._available() >= self.low_watermark:
+                    self._cond.wait()
+                if self._stopping:
+                    break
+            try:
+                if generator is None:
+                    generator = self.make_generator()
+                self.refills += 1
+                while not self._stopping and self._available() < self.high_watermark:
+                    words = generator.generate_many((1 << self.word_bits) - 1, self.batch_words)
+                    with self._cond:
+                        self._words.extend(int(w) for w in words)
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Prefetch refill failed: {e}")
+                generator = self._close(generator)
+                time.sleep(self.retry_seconds)
+        self._close(generator)
+
+    @staticmethod
+    def _close(generator):
+        if generator is not None and hasattr(generator, 'close'):
+            try:
+                generator.close()
+            except Exception as e:
+                logging.error(f"Prefetch generator close failed: {e}")
+        return None
+
+    def wait_filled(self, timeout=None):
+        """Blocks until the buffer holds at least the low watermark; returns whether it does."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._available() < self.low_watermark:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self):
+        """Buffered bits, watermarks, hit/miss counts and refill activity."""
+        with self._cond:
+            requests = self.hits + self.misses
+            return {
+                'buffered_bits': self._available(),
+                'low_watermark': self.low_watermark,
+                'high_watermark': self.high_watermark,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'refills': self.refills,
+                'errors': self.errors
+            }
+
+    def close(self):
+        """Stops the refill thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+
+class PrefetchPool:
+    """
+    One Prefetcher per configured generator. config maps a generator name
+    to (low watermark, high watermark) in bits; other generators are not
+    prefetched.
+    """
+    def __init__(self, generator_factory, config, **options):
+        self.prefetchers = {
+            name: Prefetcher(lambda name=name: generator_factory(name), low, high, **options)
+            for name, (low, high) in config.items()
+        }
+
+    def draw(self, generator_name, upper_bound):
+        """A prefetched value, or None if the generator is not prefetched or its buffer is empty."""
+        prefetcher = self.prefetchers.get(generator_name)
+        return prefetcher.draw(upper_bound) if prefetcher is not None else None
+
+    def draw_many(self, generator_name, upper_bound, count):
+        prefetcher = self.prefetchers.get(generator_name)
+        return prefetcher.draw_many(upper_bound, count) if prefetcher is not None else None
+
+    def max_count(self, generator_name, upper_bound):
+        """Most values one draw from the generator's buffer can serve; 0 if it is not prefetched."""
+        prefetcher = self.prefetchers.get(generator_name)
+        return prefetcher.max_count(upper_bound) if prefetcher is not None else 0
+
+    def stats(self):
+        return {name: prefetcher.stats() for name, prefetcher in self.prefetchers.items()}
+
+    def close(self):
+        for prefetcher in self.prefetchers.values():
+            prefetcher.close()
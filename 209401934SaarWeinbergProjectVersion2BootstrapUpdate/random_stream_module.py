@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk random numbers streamed in chunks, for the /api/random endpoint.
+
+Values are drawn with the generator's batch path (generate_many) one
+chunk at a time and encoded as they come, so memory use depends on the
+chunk size, not on the count. Three encodings are supported: a JSON
+array, NDJSON (one value per line) and raw binary, where every value is
+a little-endian unsigned integer of the narrowest width (1, 2, 4 or 8
+bytes) that holds the bound.
+"""
+
+import numpy as np
+
+CHUNK_VALUES = 1 << 16
+MAX_COUNT = 100_000_000
+MAX_UPPER_BOUND = (1 << 63) - 1  # generate_many returns int64
+
+FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'binary': 'application/octet-stream',
+}
+
+def value_width(upper_bound):
+    """Bytes per value in the binary encoding: the narrowest of 1, 2, 4, 8 holding upper_bound."""
+    for width in (1, 2, 4):
+        if upper_bound < 1 << (8 * width):
+            return width
+    return 8
+
+def validate(fmt, upper_bound, count):
+    """Error message for unsupported request parameters, or None."""
+    if fmt not in FORMATS:
+        return f"Unknown format '{fmt}' (use {', '.join(FORMATS)})"
+    if not 0 < upper_bound <= MAX_UPPER_BOUND:
+        return f"upper_bound must be between 1 and {MAX_UPPER_BOUND}"
+    if not 0 < count <= MAX_COUNT:
+        return f"count must be between 1 and {MAX_COUNT}"
+    return None
+
+def value_chunks(generator, upper_bound, count, chunk_values=CHUNK_VALUES):
+    """Yields count values in [0, upper_bound] as NumPy arrays of at most chunk_values."""
+    remaining = count
+    while remaining > 0:
+        size = min(chunk_values, remaining)
+        yield np.asarray(generator.generate_many(upper_bound, size))
+        remaining -= size
+
+def _byte_chunks(generator, count, chunk_values):
+    """Yields count raw bytes, for the binary encoding with upper_bound 255."""
+    remaining = count
+    while remaining > 0:
+        size = min(chunk_values, remaining)
+        yield generator.generate_bytes(size)
+        remaining -= size
+
+def encode_stream(generator, upper_bound, count, fmt='json', chunk_values=CHUNK_VALUES):
+    """
+    Streams count random values in [0, upper_bound] in the given format.
+
+    Args:
+        generator (RandomGenerator): Source of the values.
+        upper_bound (int): Inclusive upper bound.
+        count (int): Number of values.
+        fmt (str): 'json', 'ndjson' or 'binary' (see FORMATS).
+        chunk_values (int): Values drawn and encoded per chunk.
+
+    Yields:
+        str or bytes: Encoded chunks; str for the text formats.
+    """
+    if fmt == 'binary' and upper_bound == 255:
+        # Generators with a native byte source skip the integer path entirely.
+        yield from _byte_chunks(generator, count, chunk_values)
+        return
+    yield from encode_chunks(value_chunks(generator, upper_bound, count, chunk_values), upper_bound, fmt)
+
+def encode_chunks(chunks, upper_bound, fmt='json'):
+    """Encodes an iterable of value arrays (e.g. values already drawn) as encode_stream does."""
+    if fmt == 'binary':
+        dtype = np.dtype(f'<u{value_width(upper_bound)}')
+        for chunk in chunks:
+            yield np.asarray(chunk).astype(dtype).tobytes()
+    elif fmt == 'ndjson':
+        for chunk in chunks:
+            yield '\n'.join(map(str, np.asarray(chunk).tolist())) + '\n'
+    else:
+        separator = '['
+        for chunk in chunks:
+            yield separator + ','.join(map(str, np.asarray(chunk).tolist()))
+            separator = ','
+        yield ']'
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Repeated-output detection for very long integer or byte-block streams.
+
+Time-based and thread-race generators can fall into repeating outputs
+under load. RepetitionDetector scans the stream once through a Bloom
+filter of fixed size, which flags every value that may have been seen
+before (no false negatives). The flagged values are kept as exact
+candidates, and a second pass counts their true occurrences, so Bloom
+false positives never count as repeats. Memory is the filter plus a
+capped candidate set, whatever the stream length. The exact repeat count
+is compared with the birthday-bound expectation for uniform draws.
+"""
+
+import logging
+import math
+
+import numpy as np
+from scipy.stats import norm, poisson
+
+# Values handled per vectorized step when scanning arrays.
+CHUNK_VALUES = 1 << 20
+
+_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_M2 = np.uint64(0x94D049BB133111EB)
+_SALT = np.uint64(0x9E3779B97F4A7C15)
+
+def _mix64(x):
+    """SplitMix64 finalizer over a uint64 array (wrap-around is intended)."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * _M1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _M2
+    return x ^ (x >> np.uint64(31))
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over uint64 keys, with k indices per key from
+    double hashing. The bit array is memory_bytes long, rounded down to a
+    power of two.
+    """
+    def __init__(self, memory_bytes=1 << 24, hashes=7):
+        size = 1 << max(3, int(memory_bytes).bit_length() - 1)
+        self.bits = np.zeros(size, dtype=np.uint8)
+        self.mask = np.uint64(size * 8 - 1)
+        self.hashes = hashes
+        self.items = 0
+
+    def _indices(self, keys):
+        h1 = _mix64(keys)
+        h2 = _mix64(keys ^ _SALT) | np.uint64(1)
+        steps = np.arange(self.hashes, dtype=np.uint64)[:, None]
+        return (h1 + steps * h2) & self.mask
+
+    def check_and_add(self, keys):
+        """
+        Adds keys in order and returns, for each one, whether it may have
+        been added before (earlier in this call or in a previous call).
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        idx = self._indices(unique)
+        byte, bit = (idx >> np.uint64(3)).astype(np.intp), (idx & np.uint64(7)).astype(np.uint8)
+        seen_unique = np.all(self.bits[byte] & (np.uint8(1) << bit), axis=0)
+        np.bitwise_or.at(self.bits, byte.ravel(), (np.uint8(1) << bit).ravel())
+        self.items += len(unique)
+        seen = seen_unique[inverse.ravel()]
+        # Later copies of a value inside this batch are certain repeats.
+        repeat_in_batch = np.ones(len(keys), dtype=bool)
+        repeat_in_batch[first] = False
+        return seen | repeat_in_batch
+
+    def false_positive_rate(self):
+        """Current false positive probability, from the fraction of set bits."""
+        filled = float(np.unpackbits(self.bits).mean())
+        return filled ** self.hashes
+
+def _birthday_repeats(N, d):
+    """
+    Mean and variance of the number of repeats (N minus distinct values)
+    among N uniform draws from d values. The mean uses expm1/log1p series
+    so that d up to 2**64 keeps full precision.
+    """
+    x = -1.0 / d
+    t = N * math.log1p(x)
+    if abs(x) < 1e-4:
+        log_rest = -x * x / 2 + x ** 3 / 3 - x ** 4 / 4   # log1p(x) - x
+    else:
+        log_rest = math.log1p(x) - x
+    if abs(t) < 1e-3:
+        exp_rest = t * t / 2 + t ** 3 / 6 + t ** 4 / 24    # expm1(t) - t
+    else:
+        exp_rest = math.expm1(t) - t
+    # N - d*(1 - e^t) = d*(expm1(t) - t) + N*d*(log1p(x) - x)
+    mean = d * exp_rest + N * d * log_rest
+    q1 = math.exp(t)
+    q2 = math.exp(N * math.log1p(-2.0 / d)) if d > 2 else 0.0
+    var = d * (d - 1) * q2 + d * q1 - d * d * q1 * q1
+    return mean, max(var, 0.0)
+
+class RepetitionDetector:
+    """
+    Streaming repetition detector. Feed the stream with update(), then feed
+    it again with verify() for the exact count, and call result().
+    """
+    def __init__(self, upper_bound, memory_bytes=1 << 24, max_candidates=1 << 20):
+        self.upper_bound = upper_bound
+        self.filter = BloomFilter(memory_bytes)
+        self.max_candidates = max_candidates
+        self.candidates = np.empty(0, dtype=np.uint64)
+        self.counts = None
+        self.flagged = 0
+        self.truncated = False
+        self.N = 0
+
+    def update(self, values):
+        """First pass: adds a batch of values (array-like of ints in [0, upper_bound])."""
+        keys = np.asarray(values).astype(np.uint64, copy=False).ravel()
+        if len(keys) == 0:
+            return
+        seen = self.filter.check_and_add(keys)
+        self.N += len(keys)
+        self.flagged += int(np.count_nonzero(seen))
+        if np.any(seen) and not self.truncated:
+            merged = np.union1d(self.candidates, keys[seen])
+            if len(merged) > self.max_candidates:
+                self.truncated = True
+                merged = merged[:self.max_candidates]
+            self.candidates = merged
+
+    def verify(self, values):
+        """Second pass: counts exact occurrences of the candidate values."""
+        if self.counts is None:
+            self.counts = np.zeros(len(self.candidates), dtype=np.int64)
+        keys = np.asarray(values).astype(np.uint64, copy=False).ravel()
+        if len(keys) == 0 or len(self.candidates) == 0:
+            return
+        pos = np.searchsorted(self.candidates, keys)
+        pos[pos == len(self.candidates)] = 0
+        hit = self.candidates[pos] == keys
+        self.counts += np.bincount(pos[hit], minlength=len(self.candidates))
+
+    def result(self, alpha=0.01):
+        """
+        Returns:
+            dict: Repeats found (exact once verified, otherwise the Bloom
+            upper bound), the birthday-bound expectation, repeat rates,
+            upper-tail p-value, filter false positive rate and pass/fail.
+        """
+        if self.N < 2:
+            return {"error": "Not enough values (less than 2)"}
+        verified = self.counts is not None and not self.truncated
+        if verified:
+            repeats = int(np.sum(np.maximum(self.counts - 1, 0)))
+        else:
+            repeats = self.flagged
+        expected, var = _birthday_repeats(self.N, self.upper_bound + 1)
+        if expected < 0.01 * self.N or var <= 0:
+            # Repeats are rare events: Poisson with the birthday mean.
+            p = float(poisson.sf(repeats - 1, expected)) if repeats > 0 else 1.0
+        else:
+            p = float(norm.sf((repeats - expected) / math.sqrt(var)))
+        return {
+            'repeats': repeats,
+            'expected_repeats': expected,
+            'repeat_rate': repeats / self.N,
+            'expected_rate': expected / self.N,
+            'p-value': p,
+            'passed': p > alpha,
+            'verified': verified,
+            'candidates': len(self.candidates),
+            'false_positive_rate': self.filter.false_positive_rate(),
+            'N': self.N
+        }
+
+def _chunks(source, chunk_size):
+    if callable(source):
+        yield from source()
+        return
+    values = np.asarray(source)
+    for start in range(0, len(values), chunk_size):
+        yield values[start:start + chunk_size]
+
+def repetition_test(source, upper_bound, memory_bytes=1 << 24,
+                    max_candidates=1 << 20, chunk_size=CHUNK_VALUES):
+    """
+    Scans a stream for repeated values with fixed memory and an exact
+    verification pass.
+
+    Args:
+        source (array-like or callable): Integers in [0, upper_bound], or a
+            zero-argument callable returning a fresh iterable of chunks, so
+            that streams too long for memory can be scanned twice.
+        upper_bound (int): Inclusive upper bound of the values (at most 2**64-1).
+        memory_bytes (int): Size of the Bloom filter.
+        max_candidates (int): Cap on the exact candidate set.
+        chunk_size (int): Values per step when source is an array.
+
+    Returns:
+        dict: See RepetitionDetector.result().
+    """
+    try:
+        detector = RepetitionDetector(upper_bound, memory_bytes, max_candidates)
+        for chunk in _chunks(source, chunk_size):
+            detector.update(chunk)
+        for chunk in _chunks(source, chunk_size):
+            detector.verify(chunk)
+        return detector.result()
+    except Exception as e:
+        logging.error(f"repetition_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def block_values(data, block_bytes=8):
+    """
+    Splits a byte buffer into big-endian integers of block_bytes bytes
+    (1 to 8), so byte streams can be checked for repeated blocks with
+    upper_bound = 256**block_bytes - 1. A trailing partial block is dropped.
+    """
+    x = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    usable = len(x) // block_bytes * block_bytes
+    blocks = np.zeros((usable // block_bytes, 8), dtype=np.uint8)
+    blocks[:, 8 - block_bytes:] = x[:usable].reshape(-1, block_bytes)
+    return blocks.view('>u8').ravel().astype(np.uint64)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Content-hash cache for statistical test results.
+
+A result is keyed by the test name, a BLAKE2 digest of every bit-sequence
+argument (packed to bytes first, so a string, a list and a packed pair of
+the same bits share one digest) and the other parameters. Results live in
+an in-memory LRU tier bounded by their pickled size, with an optional
+on-disk tier that also shares results between processes. The cached_test
+decorator is applied to every test in tests_module.
+"""
+
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+def _digest_bits(value):
+    """BLAKE2 digest of a bit sequence, or None if value is not one."""
+    if isinstance(value, tuple) and len(value) == 2 and isinstance(value[1], int):
+        packed, n = value
+        data = np.asarray(packed, dtype=np.uint8)
+    elif isinstance(value, np.ndarray):
+        n = len(value)
+        data = np.packbits(value.astype(np.uint8, copy=False))
+    elif isinstance(value, (str, list)):
+        text = value if isinstance(value, str) else ''.join(map(str, value))
+        if text.strip('01'):
+            return None
+        n = len(text)
+        data = np.packbits(np.frombuffer(text.encode('ascii'), dtype=np.uint8) - ord('0'))
+    else:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    h.update(n.to_bytes(8, 'little'))
+    h.update(memoryview(np.ascontiguousarray(data)))
+    return h.hexdigest()
+
+def _key_part(value):
+    digest = _digest_bits(value)
+    return f"bits:{digest}" if digest else repr(value)
+
+def make_key(test_name, args, kwargs):
+    """Cache key: test name, bit digests and parameters."""
+    parts = [test_name]
+    parts.extend(_key_part(value) for value in args)
+    parts.extend(f"{k}={_key_part(kwargs[k])}" for k in sorted(kwargs))
+    return hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+class ResultCache:
+    """
+    Two-tier LRU cache of result dicts. The memory tier evicts the least
+    recently used entries once their pickled sizes exceed max_bytes; with
+    disk_dir set, every result is also written there and a memory miss
+    falls back to disk.
+    """
+    def __init__(self, max_bytes=64 << 20, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> (pickled result, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Returns a copy of the cached result, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pickle.loads(entry[0])
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    data = f.read()
+                self._store(key, data)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return pickle.loads(data)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.error(f"ResultCache: unreadable disk entry {key}: {e}")
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, result):
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        self._store(key, data)
+        if self.disk_dir:
+            try:
+                tmp = self._disk_path(key) + f".{os.getpid()}.tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, self._disk_path(key))
+            except Exception as e:
+                logging.error(f"ResultCache: could not write disk entry {key}: {e}")
+
+    def _store(self, key, data):
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (data, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self):
+        """Empties the memory tier and resets the counters (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hits (and how many came from disk), misses, hit rate,
+            entries and bytes held in memory.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+
+# Shared by all cached tests; configure() replaces its limits or disk tier.
+RESULT_CACHE = ResultCache()
+
+def configure(max_bytes=64 << 20, disk_dir=None):
+    """Replaces the shared cache, e.g. to enable the on-disk tier."""
+    global RESULT_CACHE
+    RESULT_CACHE = ResultCache(max_bytes, disk_dir)
+    return RESULT_CACHE
+
+def cached_test(fn):
+    """
+    Decorator for test functions taking bit sequences. Arguments are bound
+    to the function's parameters, defaults included, before they are
+    hashed, so positional, keyword and default values of a parameter share
+    one key. Results with an 'error' key are not cached, so a failure is
+    always retried.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            bound = signature.bind(*args, **kwargs)
+        except TypeError:
+            return fn(*args, **kwargs)  # raises the call's own TypeError
+        bound.apply_defaults()
+        cache = RESULT_CACHE
+        key = make_key(fn.__qualname__, (), bound.arguments)
+        result = cache.get(key)
+        if result is not None:
+            return result
+        result = fn(*args, **kwargs)
+        if isinstance(result, dict) and 'error' not in result:
+            cache.put(key, result)  # stored pickled, so callers may modify their copy
+        return result
+    return wrapper
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Second-level analysis: run the chosen tests on many independent
+sequences and check the resulting p-values, as in NIST SP 800-22
+section 4.2. A single p-value cannot tell a bad generator from an
+unlucky run; the proportion of passing sequences and the uniformity of
+the p-values can.
+
+Sequences are generated and tested in a ProcessPoolExecutor, one
+sequence per task, so the work scales with the number of cores. The
+pools are long-lived and shared (see process_pool) and their workers are
+spawned, not forked from the multi-threaded server. Generators that may
+only run a few instances at once (the sound stream, JVM launches) draw
+their sequences one by one in the calling process instead, and only the
+tests run in the pool.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import numpy as np
+from scipy.special import gammaincc
+from scipy.stats import kstest, norm
+
+import tests_module
+
+_pools = {}  # worker count -> ProcessPoolExecutor
+_pools_lock = threading.Lock()
+
+def _worker_initializer():
+    """
+    Initializer for spawned workers, as a picklable partial: configures
+    their logging like the server's, before they import a module that
+    configures its own.
+    """
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.FileHandler):
+            return partial(logging.basicConfig, filename=handler.baseFilename, level=logging.ERROR,
+                           format='%(asctime)s %(levelname)s: %(message)s')
+    return partial(logging.basicConfig, level=logging.ERROR)
+
+def process_pool(workers=None):
+    """
+    The shared worker pool with `workers` processes (default: one per core),
+    created on first use and kept for later jobs. Workers are spawned: a
+    fork of the server would copy locks held by its other threads at that
+    moment (e.g. the sound stream read lock held by a prefetch refill), and
+    they would never be released in the child.
+    """
+    workers = workers or os.cpu_count() or 1
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_worker_initializer())
+            _pools[workers] = pool
+        return pool
+
+def discard_pool(pool):
+    """
+    Drops a pool broken by a dead worker (BrokenProcessPool), so the next
+    process_pool call creates a new one.
+    """
+    with _pools_lock:
+        for workers, shared in list(_pools.items()):
+            if shared is pool:
+                del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def pool_submit(pool, workers, fn, *args):
+    """
+    Submits fn(*args) to pool, or to a new shared pool if that one is
+    broken. Returns (pool used, future).
+    """
+    try:
+        return pool, pool.submit(fn, *args)
+    except BrokenProcessPool:
+        discard_pool(pool)
+        pool = process_pool(workers)
+        return pool, pool.submit(fn, *args)
+
+def _runs_test_with_p(bits):
+    # runs_test reports only a z-score; the two-sided p-value follows from it.
+    result = tests_module.runs_test(bits)
+    if 'z-value' in result:
+        result['p-value'] = float(2 * norm.sf(abs(result['z-value'])))
+    return result
+
+# Tests that yield one p-value, keyed by the test_type names used by the app.
+P_VALUE_TESTS = {
+    'frequency': tests_module.frequency_test,
+    'runs': _runs_test_with_p,
+    'freq_byte': partial(tests_module.chi_squared_full_test, group_size=8),
+    'serial2': partial(tests_module.serial_test, group_size=2),
+    'serial3': partial(tests_module.serial_test, group_size=3),
+    'autocorr1': partial(tests_module.autocorrelation_test, lag=1),
+    'autocorr2': partial(tests_module.autocorrelation_test, lag=2),
+    'poker4': partial(tests_module.poker_test, group_size=4),
+    'poker5': partial(tests_module.poker_test, group_size=5),
+    'maurer7': partial(tests_module.maurer_universal_test, L=7),
+    'block_frequency': tests_module.block_frequency_test,
+    'longest_run': tests_module.longest_run_test,
+}
+
+def generator_bits(generator_name, upper_bound, samples, index=0):
+    """
+    Draws samples values from a fresh generator and concatenates their
+    binary forms, as run_selected_test_task does. index only tells the
+    sequences apart; each call uses its own generator instance.
+    """
+    from generators import generator_factory  # pyaudio is only needed where sequences are drawn
+    generator = generator_factory(generator_name)
+    try:
+        values = generator.generate_many(upper_bound, samples)
+    finally:
+        if hasattr(generator, 'close'):
+            generator.close()
+    return ''.join(bin(int(v))[2:] for v in values)
+
+def _sequence_p_values(make_bits, test_names, index):
+    """Worker: builds one sequence and returns {test name: p-value or None}."""
+    return _bits_p_values(make_bits(index), test_names)
+
+def _bits_p_values(bits, test_names):
+    """Worker: runs the tests on one sequence and returns {test name: p-value or None}."""
+    p_values = {}
+    for name in test_names:
+        result = P_VALUE_TESTS[name](bits)
+        p_values[name] = result.get('p-value') if 'error' not in result else None
+    return p_values
+
+def p_value_uniformity(p_values, alpha=0.01):
+    """
+    NIST second-level checks on the p-values of one test over m sequences:
+    the proportion of sequences with p >= alpha must lie within
+    (1-alpha) +/- 3*sqrt(alpha*(1-alpha)/m), and the p-values must be
+    uniform (chi-squared over 10 bins, P-value_T >= 0.0001). A
+    Kolmogorov-Smirnov p-value is reported alongside.
+
+    Args:
+        p_values (list of float): One p-value per sequence.
+        alpha (float): Significance level of the first-level test.
+
+    Returns:
+        dict: Proportion and its acceptable range, bin counts,
+        uniformity P-value_T, KS p-value and pass/fail.
+    """
+    try:
+        p = np.asarray([x for x in p_values if x is not None], dtype=float)
+        m = len(p)
+        if m < 10:
+            return {"error": "Not enough sequences (less than 10 p-values)"}
+        proportion = float(np.mean(p >= alpha))
+        margin = 3 * math.sqrt(alpha * (1 - alpha) / m)
+        low, high = 1 - alpha - margin, min(1.0, 1 - alpha + margin)
+        counts = np.histogram(p, bins=10, range=(0.0, 1.0))[0]
+        expected = m / 10
+        chi2 = float(np.sum((counts - expected) ** 2) / expected)
+        p_uniform = float(gammaincc(9 / 2, chi2 / 2))
+        p_ks = float(kstest(p, 'uniform').pvalue)
+        proportion_ok = low <= proportion <= high
+        return {
+            'sequences': m,
+            'proportion': proportion,
+            'proportion_range': (low, high),
+            'bin_counts': counts.tolist(),
+            'chi2': chi2,
+            'p-value': p_uniform,
+            'ks_p-value': p_ks,
+            'passed': proportion_ok and p_uniform >= 0.0001
+        }
+    except Exception as e:
+        logging.error(f"p_value_uniformity failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def second_level_test(make_bits, test_names, sequences=100, alpha=0.01, workers=None, token=None,
+                      generate_in_workers=True):
+    """
+    Runs test_names on `sequences` independent sequences in a process pool
+    and applies the second-level checks to each test's p-values.
+
+    Args:
+        make_bits (callable): Picklable callable taking a sequence index and
+            returning its bits, e.g. partial(generator_bits, 'pythonrand', 1000, 5000).
+        test_names (list of str): Keys of P_VALUE_TESTS.
+        sequences (int): Number of sequences (NIST suggests at least 55).
+        alpha (float): Significance level of the first-level tests.
+        workers (int or None): Worker processes of the shared pool (default: one per core).
+        token (CancellationToken or None): When cancelled, pending sequences
+            are dropped and an error dict is returned.
+        generate_in_workers (bool): False draws the sequences one by one in
+            the calling process, for generators limited to a few instances;
+            make_bits need not be picklable then. The tests still run in the pool.
+
+    Returns:
+        dict: {test name: p_value_uniformity() result}.
+    """
+    try:
+        unknown = [name for name in test_names if name not in P_VALUE_TESTS]
+        if unknown:
+            return {"error": f"Unknown tests: {', '.join(unknown)}"}
+        collected = {name: [] for name in test_names}
+        pool = process_pool(workers)
+        futures = []
+        try:
+            for i in range(sequences):
+                if generate_in_workers:
+                    pool, future = pool_submit(pool, workers, _sequence_p_values, make_bits, test_names, i)
+                else:
+                    if token is not None and token.cancelled:
+                        return {"error": "Cancelled"}
+                    pool, future = pool_submit(pool, workers, _bits_p_values, make_bits(i), test_names)
+                futures.append(future)
+            for future in as_completed(futures):
+                if token is not None and token.cancelled:
+                    return {"error": "Cancelled"}
+                for name, p in future.result().items():
+                    collected[name].append(p)
+        except BrokenProcessPool:
+            discard_pool(pool)
+            raise
+        finally:
+            # Sequences not started yet are dropped on cancellation or failure.
+            for future in futures:
+                future.cancel()
+        return {name: p_value_uniformity(collected[name], alpha) for name in test_names}
+    except Exception as e:
+        logging.error(f"second_level_test failed: {e}")
+        return {'error': str(e), 'passed': False}
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Store of generated sequences, so several tests can analyze one generation
+run. The Java and sound generators take minutes for large sample counts;
+switching the test type should not mean generating again.
+
+Each run is kept under a run ID with its generator settings, the values
+and the bits (packed). The memory tier has a byte budget with LRU
+eviction. With a spill directory set, every run is also written there
+when it is stored, so the other server processes of a deployment can
+load it by run ID, and an evicted run is loaded back from its file on its
+next use. The spill directory has its own byte budget and a time to
+live: the oldest files are deleted first. Spilled runs are found again
+after a restart, as the store indexes the directory when it is created.
+"""
+
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+class GeneratedRun:
+    """One generation run: settings, values and packed bits."""
+    def __init__(self, run_id, generator_name, upper_bound, samples, bits, values, note=""):
+        self.run_id = run_id
+        self.generator_name = generator_name
+        self.upper_bound = upper_bound
+        self.samples = samples
+        if isinstance(bits, tuple):
+            self.packed, self.n = bits
+        else:
+            if not isinstance(bits, str):
+                bits = ''.join(bits)
+            self.n = len(bits)
+            self.packed = np.packbits(np.frombuffer(bits.encode('ascii'), dtype=np.uint8) - ord('0'))
+        # int64 when the values fit, otherwise Python ints (very large bounds).
+        self.values = (np.asarray(values, dtype=np.int64) if upper_bound < 2 ** 63
+                       else list(values))
+        self.note = note
+        self.created = time.time()
+
+    @property
+    def bits(self):
+        """The bits as a '0'/'1' string, the form run_selected_test_task analyzes."""
+        return (np.unpackbits(self.packed, count=self.n) + ord('0')).tobytes().decode('ascii')
+
+    @property
+    def nbytes(self):
+        values_bytes = self.values.nbytes if isinstance(self.values, np.ndarray) else 32 * len(self.values)
+        return self.packed.nbytes + values_bytes
+
+    def describe(self):
+        return {
+            'run_id': self.run_id,
+            'generator_name': self.generator_name,
+            'upper_bound': self.upper_bound,
+            'samples': self.samples,
+            'bits': self.n,
+            'created': self.created
+        }
+
+SPILL_SUFFIX = ".run"
+# Run IDs looked up in the spill directory: a file name, never a path.
+_RUN_ID = re.compile(r"[\w-]+")
+
+class SequenceStore:
+    """
+    Run ID -> GeneratedRun, with an LRU memory tier of at most
+    memory_budget bytes and an optional, write-through spill directory of
+    at most disk_budget bytes, whose files are deleted after spill_ttl
+    seconds.
+    """
+    def __init__(self, memory_budget=256 << 20, spill_dir=None, disk_budget=1 << 30, spill_ttl=24 * 3600):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.disk_budget = disk_budget
+        self.spill_ttl = spill_ttl
+        self._runs = OrderedDict()
+        self._spilled = OrderedDict()  # run_id -> (file path, size, spill time); oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            self._index_spill_dir()
+
+    def _index_spill_dir(self):
+        """Indexes the runs spilled before a restart, oldest first; drops partial files past the TTL."""
+        try:
+            names = os.listdir(self.spill_dir)
+        except FileNotFoundError:
+            return
+        found = []
+        for name in names:
+            path = os.path.join(self.spill_dir, name)
+            try:
+                if name.endswith(SPILL_SUFFIX):
+                    st = os.stat(path)
+                    found.append((st.st_mtime, name[:-len(SPILL_SUFFIX)], path, st.st_size))
+                elif name.endswith(".tmp") and time.time() - os.stat(path).st_mtime > self.spill_ttl:
+                    os.remove(path)
+            except OSError as e:
+                logging.error(f"SequenceStore: could not index spill file {name}: {e}")
+        with self._lock:
+            for mtime, run_id, path, size in sorted(found):
+                self._spilled[run_id] = (path, size, mtime)
+            expired = self._prune_spilled()
+        self._delete_files(expired)
+
+    def put(self, generator_name, upper_bound, samples, bits, values, note="", run_id=None):
+        """Stores a run and returns its run ID (a new one unless given)."""
+        run = GeneratedRun(run_id or str(uuid.uuid4()), generator_name, upper_bound,
+                           samples, bits, values, note)
+        with self._lock:
+            stale = self._remove(run.run_id)
+        self._delete_files(stale)
+        # Written through, so the other server processes find the run by its ID
+        self._spill([run])
+        with self._lock:
+            self._runs[run.run_id] = run
+            self._bytes += run.nbytes
+            evicted = self._evict()
+        self._spill(evicted)
+        return run.run_id
+
+    def get(self, run_id):
+        """
+        Returns the run, or None. A run not in memory is loaded from the
+        spill directory, also when another process wrote it there.
+        """
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                self._runs.move_to_end(run_id)
+                return run
+            entry = self._spilled.get(run_id)
+        found = entry is None
+        if found:
+            entry = self._find_spilled(run_id)
+            if entry is None:
+                return None
+        try:
+            with open(entry[0], 'rb') as f:
+                run = pickle.load(f)
+        except Exception as e:
+            logging.error(f"SequenceStore: could not load spilled run {run_id}: {e}")
+            return None
+        with self._lock:
+            current = self._runs.get(run_id)
+            if current is not None:
+                return current
+            if found:
+                self._spilled[run_id] = entry
+            self._runs[run_id] = run
+            self._bytes += run.nbytes
+            evicted = self._evict(keep=run_id)
+        self._spill(evicted)
+        return run
+
+    def _find_spilled(self, run_id):
+        """Index entry of a run spilled by another process since this store indexed the directory, or None."""
+        if not self.spill_dir or not isinstance(run_id, str) or not _RUN_ID.fullmatch(run_id):
+            return None
+        path = os.path.join(self.spill_dir, f"{run_id}{SPILL_SUFFIX}")
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return path, st.st_size, st.st_mtime
+
+    def _remove(self, run_id):
+        """Drops a run; returns the path of its spill file to delete, if any (lock held)."""
+        old = self._runs.pop(run_id, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        entry = self._spilled.pop(run_id, None)
+        return [entry[0]] if entry is not None else []
+
+    def _evict(self, keep=None):
+        """Pops least recently used runs until the budget holds (lock held)."""
+        evicted = []
+        for run_id in list(self._runs):
+            if self._bytes <= self.memory_budget:
+                break
+            if run_id == keep:
+                continue
+            run = self._runs.pop(run_id)
+            self._bytes -= run.nbytes
+            evicted.append(run)
+        return evicted
+
+    def _spill(self, runs):
+        """Writes runs to the spill directory, except those already there."""
+        if not runs or not self.spill_dir:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        expired = []
+        for run in runs:
+            with self._lock:
+                if run.run_id in self._spilled:
+                    continue
+            path = os.path.join(self.spill_dir, f"{run.run_id}{SPILL_SUFFIX}")
+            try:
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, 'wb') as f:
+                    pickle.dump(run, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+                with self._lock:
+                    self._spilled[run.run_id] = (path, os.path.getsize(path), time.time())
+                    expired.extend(self._prune_spilled())
+            except Exception as e:
+                logging.error(f"SequenceStore: could not spill run {run.run_id}: {e}")
+        self._delete_files(expired)
+
+    def _prune_spilled(self):
+        """
+        Drops spilled runs past their time to live, then the oldest ones
+        until the disk budget holds; returns their paths (lock held).
+        """
+        expired = []
+        now = time.time()
+        total = sum(size for _, size, _ in self._spilled.values())
+        for run_id, (path, size, spilled) in list(self._spilled.items()):
+            if now - spilled <= self.spill_ttl and total <= self.disk_budget:
+                break
+            del self._spilled[run_id]
+            total -= size
+            expired.append(path)
+        return expired
+
+    @staticmethod
+    def _delete_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.error(f"SequenceStore: could not delete spill file {path}: {e}")
+
+    def runs(self):
+        """Descriptions of the runs in memory, most recent last, and the IDs of runs only on disk."""
+        with self._lock:
+            expired = self._prune_spilled()
+            result = {
+                'in_memory': [run.describe() for run in self._runs.values()],
+                'spilled': [run_id for run_id in self._spilled if run_id not in self._runs],
+                'bytes': self._bytes,
+                'memory_budget': self.memory_budget,
+                'spilled_bytes': sum(size for _, size, _ in self._spilled.values()),
+                'disk_budget': self.disk_budget
+            }
+        self._delete_files(expired)
+        return result
+
+# Shared by the app; configure() sets the budget and spill directory.
+SEQUENCE_STORE = SequenceStore()
+
+def configure(memory_budget=256 << 20, spill_dir=None, disk_budget=1 << 30, spill_ttl=24 * 3600):
+    """Replaces the shared store."""
+    global SEQUENCE_STORE
+    SEQUENCE_STORE = SequenceStore(memory_budget, spill_dir, disk_budget, spill_ttl)
+    return SEQUENCE_STORE
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Shared buffers for handing bit data between processes without copies.
+
+SharedSegment owns a multiprocessing.shared_memory block in the process
+that created it and counts the jobs using it; the block is unlinked when
+the last reference is released, when a job force-discards it after a
+failure, or at interpreter exit. BitSequence is a view on a segment:
+an 8-byte header holding the number of valid bits followed by the bits
+packed MSB first, as in tests_module.pack_bits. Workers attach by name
+and append bits in place or read them as packed bytes, a 0/1 array or a
+bit string.
+"""
+
+import atexit
+import logging
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_HEADER_BYTES = 8
+
+_live_segments = {}
+_live_lock = threading.Lock()
+
+class SharedSegment:
+    """
+    Owner-side handle of a shared memory block with a reference count.
+    The creating job holds the first reference; every other user calls
+    acquire() and release().
+    """
+    def __init__(self, size):
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        self.name = self.shm.name
+        self.size = size
+        self.refs = 1
+        self._lock = threading.Lock()
+        with _live_lock:
+            _live_segments[self.name] = self
+
+    def acquire(self):
+        with self._lock:
+            if self.refs == 0:
+                raise RuntimeError(f"Segment {self.name} was already released")
+            self.refs += 1
+        return self
+
+    def release(self):
+        """Drops one reference; the block is unlinked when none are left."""
+        with self._lock:
+            if self.refs == 0:
+                return
+            self.refs -= 1
+            if self.refs:
+                return
+        self._unlink()
+
+    def discard(self):
+        """Unlinks the block now, whatever the count (job ended or crashed)."""
+        with self._lock:
+            self.refs = 0
+        self._unlink()
+
+    def _unlink(self):
+        with _live_lock:
+            if _live_segments.pop(self.name, None) is None:
+                return
+        try:
+            self.shm.close()
+        except BufferError:
+            # A view is still alive in this process; the name is removed anyway.
+            logging.error(f"Shared segment {self.name} unlinked with live views")
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+def live_segments():
+    """Names and sizes of the segments this process still owns."""
+    with _live_lock:
+        return {name: segment.size for name, segment in _live_segments.items()}
+
+@atexit.register
+def cleanup_segments():
+    """Unlinks every segment still owned by this process."""
+    with _live_lock:
+        segments = list(_live_segments.values())
+    for segment in segments:
+        segment.discard()
+
+class BitSequence:
+    """
+    View of a bit sequence stored in shared memory. Use create() in the
+    owning process and attach() in workers; close() (or a with block)
+    releases the worker's mapping.
+    """
+    def __init__(self, shm, segment=None):
+        self._shm = shm
+        self.segment = segment
+        self.name = shm.name
+        self._header = np.ndarray((1,), dtype=np.uint64, buffer=shm.buf)
+        self.packed_capacity = shm.size - _HEADER_BYTES
+        self._bytes = np.ndarray((self.packed_capacity,), dtype=np.uint8,
+                                 buffer=shm.buf, offset=_HEADER_BYTES)
+
+    @classmethod
+    def create(cls, capacity_bits):
+        """Allocates a new, empty sequence able to hold capacity_bits bits."""
+        segment = SharedSegment(_HEADER_BYTES + (capacity_bits + 7) // 8)
+        sequence = cls(segment.shm, segment)
+        sequence._header[0] = 0
+        return sequence
+
+    @classmethod
+    def from_bits(cls, bits):
+        """Creates a sequence holding bits (str, list or packed (bytes, n) pair)."""
+        import tests_module
+        packed, n = tests_module.pack_bits(bits)
+        sequence = cls.create(n)
+        sequence._bytes[:len(packed)] = packed
+        sequence._header[0] = n
+        return sequence
+
+    @classmethod
+    def attach(cls, name):
+        """Maps an existing sequence by name (worker side)."""
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def n(self):
+        return int(self._header[0])
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def capacity(self):
+        return self.packed_capacity * 8
+
+    @property
+    def packed(self):
+        """The valid packed bytes, as a view (no copy)."""
+        return self._bytes[:(self.n + 7) // 8]
+
+    def as_packed(self):
+        """(bytes view, n) pair accepted by the packed-input tests."""
+        return self.packed, self.n
+
+    def to_array(self):
+        return np.unpackbits(self.packed, count=self.n)
+
+    def to_string(self):
+        return (self.to_array() + ord('0')).tobytes().decode('ascii')
+
+    def append(self, bits):
+        """
+        Appends bits (str, list or 0/1 array) in place. A partial last byte
+        is merged, so any number of appends give the same layout as one.
+        """
+        if isinstance(bits, np.ndarray):
+            new = bits.astype(np.uint8, copy=False)
+        else:
+            if not isinstance(bits, str):
+                bits = ''.join(map(str, bits))
+            new = np.frombuffer(bits.encode('ascii'), dtype=np.uint8) - ord('0')
+        n = self.n
+        if n + len(new) > self.capacity:
+            raise ValueError(f"BitSequence {self.name} is full ({self.capacity} bits)")
+        start = n // 8
+        tail = np.unpackbits(self._bytes[start:start + 1], count=n % 8)
+        packed = np.packbits(np.concatenate((tail, new)))
+        self._bytes[start:start + len(packed)] = packed
+        self._header[0] = n + len(new)
+
+    def close(self):
+        """Drops this process's mapping; the owner also releases its reference."""
+        del self._header, self._bytes
+        self._shm.close()
+        if self.segment is not None:
+            self.segment.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -4,6 +4,7 @@
 // Global variables
 let currentTaskId = null;
 let statusInterval = null;
+let statusEvents = null; // EventSource for /events/<task_id>
 let currentGeneratorName = null; // Store generator name for results
 
 // Initialize when page loads
@@ -144,8 +145,8 @@ function startTest(formData) {
         currentTaskId = data.task_id;
         currentGeneratorName = data.generator_name || currentGeneratorName;
         
-        // Start polling for status
-        statusInterval = setInterval(checkTestStatus, 2000);
+        // Follow progress pushed by the server (polling only as a fallback)
+        watchTestStatus();
         
         showToast('Test Started', 'Statistical test is now running...', 'success');
     })
@@ -156,6 +157,35 @@ function startTest(formData) {
     });
 }
 
+function watchTestStatus() {
+    if (!window.EventSource) {
+        statusInterval = setInterval(checkTestStatus, 2000);
+        return;
+    }
+    statusEvents = new EventSource(`/events/${currentTaskId}`);
+    statusEvents.onmessage = function(event) {
+        handleStatusUpdate(JSON.parse(event.data));
+    };
+    statusEvents.onerror = function() {
+        // Stream dropped (e.g. proxy timeout): fall back to polling
+        stopWatchingStatus();
+        if (currentTaskId) {
+            statusInterval = setInterval(checkTestStatus, 2000);
+        }
+    };
+}
+
+function stopWatchingStatus() {
+    if (statusEvents) {
+        statusEvents.close();
+        statusEvents = null;
+    }
+    if (statusInterval) {
+        clearInterval(statusInterval);
+        statusInterval = null;
+    }
+}
+
 function checkTestStatus() {
     if (!currentTaskId) {
         clearInterval(statusInterval);
@@ -164,28 +194,7 @@ function checkTestStatus() {
 
     fetch(`/status/${currentTaskId}`)
     .then(response => response.json())
-    .then(data => {
-        // Update status text
-        const statusText = document.getElementById('statusText');
-        if (statusText) {
-            statusText.textContent = data.status || 'Processing...';
-        }
-
-        // Parse and update progress - ensure we reach 100%
-        const progressMatch = data.status.match(/(\d+)%/);
-        let percent = 0;
-        if (progressMatch) {
-            percent = parseInt(progressMatch[1]);
-        } else if (data.done === true) {
-            percent = 100; // Force 100% when done
-        }
-        updateProgress(percent);
-
-        // Check if test is complete
-        if (data.done === true) {
-            handleTestCompletion(data);
-        }
-    })
+    .then(handleStatusUpdate)
     .catch(error => {
         console.error('Status check error:', error);
         showToast('Error', 'Lost connection to test. Please refresh the page.', 'error');
@@ -193,10 +202,32 @@ function checkTestStatus() {
     });
 }
 
+function handleStatusUpdate(data) {
+    // Update status text
+    const statusText = document.getElementById('statusText');
+    if (statusText) {
+        statusText.textContent = data.status || 'Processing...';
+    }
+
+    // Parse and update progress - ensure we reach 100%
+    const progressMatch = data.status.match(/(\d+)%/);
+    let percent = 0;
+    if (progressMatch) {
+        percent = parseInt(progressMatch[1]);
+    } else if (data.done === true) {
+        percent = 100; // Force 100% when done
+    }
+    updateProgress(percent);
+
+    // Check if test is complete
+    if (data.done === true) {
+        handleTestCompletion(data);
+    }
+}
+
 function handleTestCompletion(data) {
-    // Stop status polling
-    clearInterval(statusInterval);
-    statusInterval = null;
+    // Stop status updates
+    stopWatchingStatus();
     currentTaskId = null;
 
     // Ensure progress shows 100% when completed
@@ -294,11 +325,8 @@ function resetTestUI(showRestartButton = false) {
         progressDiv.style.display = 'none';
     }
 
-    // Clear intervals
-    if (statusInterval) {
-        clearInterval(statusInterval);
-        statusInterval = null;
-    }
+    // Stop status updates
+    stopWatchingStatus();
 
     currentTaskId = null;
 }
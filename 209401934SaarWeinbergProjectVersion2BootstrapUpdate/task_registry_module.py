@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Thread-safe registry of test task states, replacing an ever-growing dict.
+
+Finished tasks are evicted once they are older than the TTL, and when the
+registry is over its size cap the oldest finished tasks go first. Tasks
+that are still running are never evicted. stats() reports entry counts
+and the approximate memory held by task states, for monitoring.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+def _state_bytes(state):
+    """Approximate memory of one task state: the dict plus its values."""
+    return sys.getsizeof(state) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in state.items())
+
+class TaskRegistry:
+    """
+    task_id -> state dict. A task counts as finished once its state has
+    done=True; its TTL starts then.
+    """
+    def __init__(self, max_tasks=1000, ttl_seconds=3600, on_evict=None):
+        self.max_tasks = max_tasks
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._tasks = OrderedDict()  # task_id -> state, oldest first
+        self._finished_at = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def set(self, task_id, state):
+        """Replaces a task's state; returns a copy of it."""
+        with self._lock:
+            self._tasks[task_id] = dict(state)
+            self._track_done(task_id)
+            snapshot = dict(self._tasks[task_id])
+            evicted = self._evict()
+        self._notify(evicted)
+        return snapshot
+
+    def update(self, task_id, **fields):
+        """
+        Updates some fields of a task. Returns a copy of the new state, or
+        None if the task is unknown or nothing changed.
+        """
+        with self._lock:
+            state = self._tasks.get(task_id)
+            if state is None or all(state.get(k) == v for k, v in fields.items()):
+                return None
+            state.update(fields)
+            self._track_done(task_id)
+            return dict(state)
+
+    def _track_done(self, task_id):
+        if self._tasks[task_id].get("done"):
+            self._finished_at.setdefault(task_id, time.time())
+        else:
+            self._finished_at.pop(task_id, None)
+
+    def get(self, task_id, default=None):
+        """A copy of the task's state, or default."""
+        with self._lock:
+            state = self._tasks.get(task_id)
+            return dict(state) if state is not None else default
+
+    def __contains__(self, task_id):
+        with self._lock:
+            return task_id in self._tasks
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tasks)
+
+    def delete(self, task_id):
+        """Removes a task; on_evict is called for it, as for an evicted task."""
+        with self._lock:
+            removed = self._tasks.pop(task_id, None) is not None
+            self._finished_at.pop(task_id, None)
+        self._notify([task_id] if removed else [])
+
+    def _evict(self):
+        """Removes expired finished tasks, then the oldest finished ones over the cap (lock held)."""
+        now = time.time()
+        evicted = [task_id for task_id, finished in self._finished_at.items()
+                   if now - finished > self.ttl_seconds]
+        excess = len(self._tasks) - len(evicted) - self.max_tasks
+        if excess > 0:
+            expired = set(evicted)
+            oldest = sorted((t for t in self._finished_at if t not in expired),
+                            key=self._finished_at.get)
+            evicted.extend(oldest[:excess])
+        for task_id in evicted:
+            self._tasks.pop(task_id, None)
+            self._finished_at.pop(task_id, None)
+        self.evicted += len(evicted)
+        return evicted
+
+    def sweep(self):
+        """Evicts expired tasks now; returns how many were removed."""
+        with self._lock:
+            evicted = self._evict()
+        self._notify(evicted)
+        return len(evicted)
+
+    def _notify(self, evicted):
+        if self.on_evict:
+            for task_id in evicted:
+                self.on_evict(task_id)
+
+    def stats(self):
+        """Entry counts (running/finished), approximate bytes, limits and evictions."""
+        with self._lock:
+            return {
+                'entries': len(self._tasks),
+                'running': len(self._tasks) - len(self._finished_at),
+                'finished': len(self._finished_at),
+                'bytes': sum(_state_bytes(state) for state in self._tasks.values()),
+                'max_tasks': self.max_tasks,
+                'ttl_seconds': self.ttl_seconds,
+                'evicted': self.evicted
+            }
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+from admission_module import AdmissionController, AdmissionRejected, MEMORY_PER_BIT
+from job_queue_module import CancellationToken
+
+def controller(**limits):
+    return AdmissionController(client_limits=limits.get('client'), global_limits=limits.get('server'),
+                               seconds_per_sample={'slow': 1.0, 'fast': 1e-6})
+
+# Test estimate: memory follows bits per sample, generation time follows throughput
+def test_estimate_scales_with_job_size():
+    admission = controller()
+    small = admission.estimate('slow', 1000, 100)
+    assert small['bits'] == 100 * 10
+    assert small['memory_bytes'] >= 100 * 10 * MEMORY_PER_BIT
+    assert small['generation_seconds'] == pytest.approx(100.0)
+    battery = admission.estimate('slow', 1000, 100, tests=10)
+    assert battery['analysis_seconds'] == pytest.approx(10 * small['analysis_seconds'])
+    assert admission.estimate('slow', 1000, 100, generate=False)['generation_seconds'] == 0
+    assert admission.estimate('slow', 1000, 100, sequences=5)['bits'] == 5 * small['bits']
+
+# Test record_generation: measured runs move the throughput estimate
+def test_record_generation_updates_throughput():
+    admission = controller()
+    admission.record_generation('slow', 100, 10.0)  # 0.1 s per sample measured
+    assert 0.1 < admission.seconds_per_sample['slow'] < 1.0
+    admission.record_generation('new', 10, 1.0)
+    assert admission.seconds_per_sample['new'] == pytest.approx(0.1)
+
+# Test admit: a job too large alone is rejected with its estimate, or reduced when allowed
+def test_admit_rejects_or_reduces_oversized_jobs():
+    admission = controller(server={'cpu_seconds': 50})
+    estimate = admission.estimate('slow', 1000, 100)
+    with pytest.raises(AdmissionRejected) as info:
+        admission.admit('a', 'client', estimate, samples=100)
+    assert info.value.estimate == estimate and 0 < info.value.max_samples < 50
+    reduced = admission.admit('a', 'client', estimate, samples=100, allow_reduce=True)
+    assert reduced == info.value.max_samples
+    assert admission.admit('a', 'client', admission.estimate('slow', 1000, reduced)) is None
+    assert admission.stats()['rejected'] == 1 and admission.stats()['reduced'] == 1
+
+# Test admit: the client budget counts its queued and running jobs
+def test_admit_client_budget():
+    admission = controller(client={'jobs': 2})
+    estimate = admission.estimate('fast', 1000, 100)
+    admission.admit('a', 'alice', estimate)
+    admission.admit('b', 'alice', estimate)
+    with pytest.raises(AdmissionRejected):
+        admission.admit('c', 'alice', estimate)
+    admission.admit('d', 'bob', estimate)
+    admission.release('a')
+    admission.admit('c', 'alice', estimate)
+    assert admission.stats()['clients']['alice']['jobs'] == 2
+
+# Test acquire: over the global budget a job waits until a running job is released
+def test_acquire_waits_for_global_capacity():
+    admission = controller(server={'jobs': 1})
+    estimate = admission.estimate('fast', 1000, 100)
+    admission.admit('a', 'alice', estimate)
+    admission.admit('b', 'bob', estimate)
+    assert admission.acquire('a')
+    waits, acquired = [], []
+    thread = threading.Thread(target=lambda: acquired.append(
+        admission.acquire('b', on_wait=waits.append, poll_seconds=0.01)))
+    thread.start()
+    time.sleep(0.1)
+    assert not acquired and len(waits) == 1
+    admission.release('a')
+    thread.join(timeout=5)
+    assert acquired == [True]
+    assert admission.stats()['running']['jobs'] == 1
+
+# Test acquire: cancelling a waiting job ends the wait
+def test_acquire_cancelled():
+    admission = controller(server={'jobs': 1})
+    estimate = admission.estimate('fast', 1000, 100)
+    admission.admit('a', 'alice', estimate)
+    admission.admit('b', 'alice', estimate)
+    admission.acquire('a')
+    token = CancellationToken()
+    token.cancel()
+    assert admission.acquire('b', token) is False
+
+if __name__ == "__main__":
+    pytest.main(["test_admission_module.py"])
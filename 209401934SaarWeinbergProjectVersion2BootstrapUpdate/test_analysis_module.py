@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+import analysis_module
+import integer_tests_module
+import tests_module
+from analysis_module import SequenceData
+
+def random_data(samples=3000, upper_bound=1 << 16, seed=1):
+    values = np.random.default_rng(seed).integers(0, upper_bound, samples)
+    bits = ''.join(format(int(v), '016b') for v in values)
+    return SequenceData(bits, values.tolist(), upper_bound, samples)
+
+# Test the registry: every entry runs and describes its result under its label
+def test_every_registered_test_runs():
+    data = random_data()
+    for name, test in analysis_module.TESTS.items():
+        result = analysis_module.run_test(name, data)
+        assert isinstance(result, dict)
+        assert analysis_module.describe(name, result).startswith(test.label)
+
+# Test the registry: the integer tests run on the values, with the same result as a direct call
+def test_integer_tests_registered():
+    data = random_data(samples=20000)
+    assert analysis_module.run_test('overlapping_permutations', data)['statistic'] == \
+        pytest.approx(integer_tests_module.overlapping_permutations_test(data.values)['statistic'])
+    result = analysis_module.run_test('birthday_spacings', data)
+    assert result == integer_tests_module.birthday_spacings_test(data.values, data.upper_bound)
+    assert analysis_module.parse_test_specs('birthday_spacings,overlapping_permutations') == \
+        [('birthday_spacings', {}), ('overlapping_permutations', {})]
+    assert analysis_module.run_test('spheres_3d', data, {'points': 1000}) == \
+        integer_tests_module.spheres_3d_test(data.values, data.upper_bound, points=1000)
+    assert 'error' in analysis_module.run_test('parking_lot', data)
+    assert analysis_module.run_test('gap', data, {'beta': 0.25}) == \
+        integer_tests_module.gap_test(data.values, data.upper_bound, beta=0.25)
+    assert analysis_module.run_test('runs_up', data) == integer_tests_module.runs_up_test(data.values)
+
+# Test run_test: defaults match a direct call, params override them, bad input gives an error dict
+def test_run_test_defaults_and_params():
+    data = random_data()
+    assert analysis_module.run_test('serial3', data)['chi2'] == \
+        pytest.approx(tests_module.serial_test(data.bits, group_size=3)['chi2'])
+    assert analysis_module.run_test('poker4', data, {'group_size': 6})['chi2'] == \
+        pytest.approx(tests_module.poker_test(data.bits, group_size=6)['chi2'])
+    assert 'error' in analysis_module.run_test('frequency', data, {'nope': 1})
+    assert 'error' in analysis_module.run_test('nope', data)
+
+# Test parse_test_specs: comma lists, JSON lists and objects; unknown tests are rejected
+def test_parse_test_specs():
+    assert analysis_module.parse_test_specs('') is None
+    assert analysis_module.parse_test_specs('frequency, runs,frequency') == [('frequency', {}), ('runs', {})]
+    assert analysis_module.parse_test_specs('["ent", {"test": "poker4", "params": {"group_size": 6}}]') == \
+        [('ent', {}), ('poker4', {'group_size': 6})]
+    assert analysis_module.parse_test_specs('{"autocorr1": {"lag": 3}}') == [('autocorr1', {'lag': 3})]
+    with pytest.raises(ValueError):
+        analysis_module.parse_test_specs('frequency,nope')
+    with pytest.raises(ValueError):
+        analysis_module.parse_test_specs('[1]')
+
+# Test run_suite: parallel and in-thread tests all report once on the same data, with a summary
+def test_run_suite_and_summary():
+    data = random_data(seed=2)
+    specs = [('frequency', {}), ('block_frequency', {}), ('poker4', {'group_size': 6}),
+             ('min_entropy', {}), ('bit_positions', {})]
+    results = {analysis_module.spec_key(name, params): result
+               for name, params, result in analysis_module.run_suite(data, specs, workers=2)}
+    assert sorted(results) == sorted(['frequency', 'block_frequency', 'poker4(group_size=6)',
+                                      'min_entropy', 'bit_positions'])
+    summary = analysis_module.summarize(results)
+    assert summary['tests'] == 5 and summary['informational'] == ['min_entropy']
+    assert len(summary['passed']) + len(summary['failed']) == 4 and not summary['errors']
+    assert summary['min_p-value_test'] in results
+    assert analysis_module.describe_summary(summary).startswith("Summary: ")
+
+# Test summarize: errors and failures clear all_passed
+def test_summarize_outcomes():
+    summary = analysis_module.summarize({
+        'a': {'p-value': 0.5, 'passed': True},
+        'b': {'p-value': 0.001, 'passed': False},
+        'c': {'error': 'too short'},
+    })
+    assert summary['passed'] == ['a'] and summary['failed'] == ['b'] and summary['errors'] == ['c']
+    assert not summary['all_passed'] and summary['min_p-value'] == 0.001
+
+if __name__ == "__main__":
+    pytest.main(["test_analysis_module.py"])
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import importlib
+import os
+import random
+import threading
+import time
+
+import pytest
+from job_queue_module import QueueFull
+
+class GatedGenerator:
+    """Draws only while the gate is open, so a test decides when its job can finish."""
+    def __init__(self, gate, calls):
+        self.gate = gate
+        self.calls = calls
+
+    def generate(self, upper_bound):
+        self.gate.wait(10)
+        self.calls.append(upper_bound)
+        return random.randint(0, upper_bound)
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    # PROJECT_DIR is a Windows path, so the app's log, job store and spill directory land in the cwd
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    try:
+        yield importlib.import_module("app_updated_en")
+    finally:
+        os.chdir(cwd)
+
+@pytest.fixture
+def client(app):
+    return app.app.test_client()
+
+@pytest.fixture
+def gate(app, monkeypatch):
+    gate, calls = threading.Event(), []
+    monkeypatch.setattr(app, "generator_factory", lambda name: GatedGenerator(gate, calls))
+    gate.calls = calls
+    yield gate
+    gate.set()
+    wait_idle(app)
+
+def wait_idle(app, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = app.scheduler.stats()
+        if not stats['queued'] and not stats['running']:
+            return
+        time.sleep(0.05)
+    raise AssertionError("jobs still running")
+
+def wait_done(client, task_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = client.get(f"/status/{task_id}").get_json()
+        if state['done']:
+            return state
+        time.sleep(0.05)
+    raise AssertionError(f"task {task_id} not done")
+
+def start(client, upper_bound, **fields):
+    data = dict({'generator': 'pythonrand', 'test_type': 'frequency', 'upper_bound': upper_bound,
+                 'samples': 20}, **fields)
+    response = client.post('/start_test', data=data)
+    return response.status_code, response.get_json()
+
+# Test coalescing: a caller that joined keeps the shared job's result after the leader stops
+def test_joiner_gets_result_after_leader_stops(client, gate):
+    _, leader = start(client, 1001)
+    _, joiner = start(client, 1001)
+    assert not leader['coalesced'] and joiner['coalesced']
+    assert client.post('/stop_test', data={'task_id': leader['task_id']}).status_code == 200
+    assert wait_done(client, leader['task_id'])['status'] == "Stopped by user"
+    gate.set()
+    state = wait_done(client, joiner['task_id'])
+    assert state['status'].startswith("Test completed") and state['run_id']
+    assert client.get(f"/status/{leader['task_id']}").get_json()['status'] == "Stopped by user"
+
+# Test coalescing: the shared job is cancelled once every attached caller has stopped
+def test_job_cancelled_when_all_callers_stop(app, client, gate):
+    _, leader = start(client, 1002)
+    _, joiner = start(client, 1002)
+    for task in (leader, joiner):
+        client.post('/stop_test', data={'task_id': task['task_id']})
+        assert wait_done(client, task['task_id'])['status'] == "Stopped by user"
+    gate.set()
+    wait_idle(app)
+    assert len(gate.calls) < 20
+    assert app.coalescer.stats()['groups'] == 0
+
+# Test coalescing: a job turned away after others joined it rejects them too
+def test_rejection_reaches_joiners(app, client, gate, monkeypatch):
+    joined = []
+    def full_queue(*args, **kwargs):
+        joined.append(start(client, 1003)[1])
+        raise QueueFull()
+    monkeypatch.setattr(app.scheduler, "submit", full_queue)
+    status, leader = start(client, 1003)
+    assert status == 503 and 'error' in leader
+    assert joined[0]['coalesced']
+    state = client.get(f"/status/{joined[0]['task_id']}").get_json()
+    assert state['done'] and state['status'] == "Rejected - queue full"
+    assert app.coalescer.stats()['groups'] == 0
+
+# Test coalescing: requests allowing a reduced job (reduce=1) only share with each other
+def test_reduce_requests_do_not_join_full_jobs(client, gate):
+    _, full = start(client, 1004)
+    _, reducible = start(client, 1004, reduce=1)
+    _, reducible_joiner = start(client, 1004, reduce=1)
+    _, full_joiner = start(client, 1004)
+    assert not reducible['coalesced']
+    assert reducible_joiner['coalesced'] and full_joiner['coalesced']
+    gate.set()
+    for task in (full, reducible, reducible_joiner, full_joiner):
+        assert wait_done(client, task['task_id'])['status'].startswith("Test completed")
+    assert (client.get(f"/status/{full_joiner['task_id']}").get_json()['run_id']
+            == client.get(f"/status/{full['task_id']}").get_json()['run_id'])
+    assert (client.get(f"/status/{reducible_joiner['task_id']}").get_json()['run_id']
+            != client.get(f"/status/{full['task_id']}").get_json()['run_id'])
+
+if __name__ == "__main__":
+    pytest.main(["test_app_updated_en.py"])
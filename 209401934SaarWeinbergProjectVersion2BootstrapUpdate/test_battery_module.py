@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+import battery_module
+import result_cache_module
+import tests_module
+from shared_buffer_module import BitSequence
+
+def random_bits(n, seed=1):
+    return ''.join(map(str, np.random.default_rng(seed).integers(0, 2, n)))
+
+# Test run_battery: every requested test reports once, with the same result as a direct call
+def test_run_battery_matches_direct_calls():
+    bits = random_bits(20000)
+    names = ['frequency', 'serial2', 'block_frequency', 'random_excursions_variant']
+    results = dict(battery_module.run_battery(bits, names, workers=2))
+    assert sorted(results) == sorted(names)
+    assert results['frequency']['p-value'] == pytest.approx(tests_module.frequency_test(bits)['p-value'])
+    assert results['block_frequency']['chi2'] == pytest.approx(tests_module.block_frequency_test(bits)['chi2'])
+    assert 'p-value' in results['random_excursions_variant'] or 'error' in results['random_excursions_variant']
+
+# Test run_battery: packed input is accepted as is
+def test_run_battery_packed_input():
+    bits = random_bits(5000, seed=2)
+    results = dict(battery_module.run_battery(tests_module.pack_bits(bits), ['runs', 'longest_run']))
+    assert results['runs']['passed']
+    assert 'p-value' in results['longest_run']
+
+# Test run_battery: a BitSequence already in shared memory is used in place and left to its owner
+def test_run_battery_shared_sequence_input():
+    with BitSequence.from_bits(random_bits(5000, seed=3)) as sequence:
+        results = dict(battery_module.run_battery(sequence, ['frequency', 'block_frequency']))
+        assert sequence.segment.refs == 1
+        assert 'p-value' in results['frequency']
+
+# Test run_battery: results are cached in the calling process, so a repeat run skips the workers
+def test_run_battery_uses_result_cache():
+    result_cache_module.configure()
+    bits = random_bits(5000, seed=4)
+    first = dict(battery_module.run_battery(bits, ['frequency', 'runs'], workers=2))
+    assert result_cache_module.RESULT_CACHE.stats()['misses'] == 2
+    second = dict(battery_module.run_battery(tests_module.pack_bits(bits), ['frequency', 'runs'], workers=2))
+    assert second == first
+    assert result_cache_module.RESULT_CACHE.stats()['hits'] == 2
+    result_cache_module.configure()
+
+def test_run_battery_unknown_test():
+    results = list(battery_module.run_battery("0101", ['nope']))
+    assert 'error' in results[0][1]
+
+if __name__ == "__main__":
+    pytest.main(["test_battery_module.py"])
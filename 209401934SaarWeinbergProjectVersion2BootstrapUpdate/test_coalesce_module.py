@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import pytest
+from coalesce_module import Coalescer
+
+KEY = ('pythonrand', 'frequency', 1000, 500)
+
+# Test Coalescer: the first request leads, identical ones join and all receive the job's states
+def test_coalescer_join_and_targets():
+    coalescer = Coalescer()
+    assert coalescer.join(KEY, 'a') is None
+    assert coalescer.join(KEY, 'b') == 'a'
+    assert coalescer.join(('other',), 'c') is None
+    assert coalescer.targets('a') == ['a', 'b']
+    assert coalescer.targets('c') == ['c']
+    assert coalescer.targets('ungrouped') == ['ungrouped']
+    assert coalescer.job_of('b') == 'a' and coalescer.job_of('x') == 'x'
+    assert coalescer.stats() == {'groups': 2, 'attached_tasks': 3, 'coalesced': 1}
+
+# Test Coalescer: a finished job takes no joiners; the next identical request leads a new job
+def test_coalescer_finish():
+    coalescer = Coalescer()
+    coalescer.join(KEY, 'a')
+    coalescer.join(KEY, 'b')
+    coalescer.finish('a')
+    assert coalescer.targets('a') == ['a']
+    assert coalescer.job_of('b') == 'b'
+    assert coalescer.join(KEY, 'c') is None
+
+# Test Coalescer: detaching leaves the job to the others; once nobody is attached it takes no joiners
+def test_coalescer_detach():
+    coalescer = Coalescer()
+    coalescer.join(KEY, 'a')
+    coalescer.join(KEY, 'b')
+    assert coalescer.detach('a') == 1
+    assert coalescer.targets('a') == ['b']
+    assert coalescer.join(KEY, 'c') == 'a'
+    assert coalescer.detach('b') == 1
+    assert coalescer.detach('c') == 0
+    assert coalescer.targets('a') == []
+    assert coalescer.join(KEY, 'd') is None
+    assert coalescer.detach('ungrouped') is None
+
+if __name__ == "__main__":
+    pytest.main(["test_coalesce_module.py"])
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import math
+
+import numpy as np
+import pytest
+import ent_module
+
+def random_bytes(n, seed=1):
+    return np.random.default_rng(seed).integers(0, 256, n, dtype=np.uint8).tobytes()
+
+# Test ent_test: random bytes look random on all five statistics
+def test_ent_test_random_bytes():
+    result = ent_module.ent_test(random_bytes(600000))
+    assert result['entropy'] > 7.99
+    assert abs(result['mean'] - 127.5) < 1
+    assert abs(result['monte_carlo_pi'] - math.pi) < 0.05
+    assert abs(result['serial_correlation']) < 0.01
+    assert result['N'] == 600000
+
+# Test ent_test: a counting sequence is perfectly uniform but strongly correlated
+def test_ent_test_counting_bytes():
+    result = ent_module.ent_test(bytes(range(256)) * 100)
+    assert result['entropy'] == 8.0
+    assert result['chi2'] == 0
+    assert result['serial_correlation'] > 0.9
+    assert not result['passed']
+
+# Test EntStats: feeding the stream in uneven chunks gives the same result
+def test_ent_stats_chunked_matches_single_pass():
+    data = random_bytes(100003)
+    stats = ent_module.EntStats()
+    for start in range(0, len(data), 7777):
+        stats.update(data[start:start + 7777])
+    chunked, whole = stats.result(), ent_module.ent_test(data)
+    for key in ('entropy', 'chi2', 'mean', 'monte_carlo_pi', 'serial_correlation'):
+        assert chunked[key] == pytest.approx(whole[key])
+
+# Test ent_file: reads a dump from disk
+def test_ent_file(tmp_path):
+    path = tmp_path / "dump.bin"
+    path.write_bytes(random_bytes(50000))
+    result = ent_module.ent_file(str(path), chunk_size=4096)
+    assert result['N'] == 50000
+
+# Test values_to_bytes: fixed-width values keep their leading zeros; values past the largest power of two are dropped
+def test_values_to_bytes():
+    assert ent_module.values_to_bytes([1, 2, 255], 255).tolist() == [1, 2, 255]
+    assert ent_module.values_to_bytes([0, 15, 1, 14], 15).tolist() == [0x0f, 0x1e]
+    assert ent_module.values_to_bytes([0, 16, 15, 1, 14], 20).tolist() == [0x0f, 0x1e]
+    values = np.random.default_rng(2).integers(0, 1001, 200000)
+    result = ent_module.ent_test(ent_module.values_to_bytes(values, 1000))
+    assert result['entropy'] > 7.99 and abs(result['mean'] - 127.5) < 1
+    with pytest.raises(ValueError):
+        ent_module.values_to_bytes([0], 0)
+
+def test_ent_test_too_short():
+    result = ent_module.ent_test(b"\x01")
+    assert 'error' in result
+
+if __name__ == "__main__":
+    pytest.main(["test_ent_module.py"])
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+import entropy_module
+
+def random_bits(n, p_one=0.5, seed=1):
+    return (np.random.default_rng(seed).random(n) < p_one).astype(np.uint8)
+
+# Test repeat_profile: suffix array / LCP counts match a naive substring count
+def test_repeat_profile_matches_naive_count():
+    bits = "0110100110010110" * 3 + "0111"
+    max_count, pairs = entropy_module.repeat_profile(np.array(list(bits), dtype=int))
+    for W in range(1, len(max_count) - 1):
+        counts = Counter(bits[i:i + W] for i in range(len(bits) - W + 1))
+        assert max_count[W] == max(counts.values())
+        assert pairs[W] == sum(c * (c - 1) // 2 for c in counts.values())
+
+# Test most_common_value_estimate: a biased source is bounded near -log2(0.7)
+def test_most_common_value_estimate_biased():
+    result = entropy_module.most_common_value_estimate(random_bits(100000, p_one=0.7))
+    assert abs(result['min-entropy'] - (-math.log2(0.7))) < 0.02
+
+# Test min_entropy_test: fair bits score high, constant and periodic bits score zero
+def test_min_entropy_test_random_bits():
+    result = entropy_module.min_entropy_test(random_bits(20000), bits_per_sample=20)
+    assert 0.6 < result['min-entropy'] <= 1
+    assert result['min-entropy_per_sample'] == pytest.approx(20 * result['min-entropy'])
+    assert set(result['estimates']) == set(entropy_module.ESTIMATORS)
+
+def test_min_entropy_test_constant_bits():
+    result = entropy_module.min_entropy_test("1" * 5000)
+    assert result['min-entropy'] == 0
+
+def test_min_entropy_test_periodic_bits():
+    bits = np.tile(np.array([0, 1, 1, 0, 1, 0, 0, 0, 1], dtype=np.uint8), 2000)
+    result = entropy_module.min_entropy_test(bits)
+    assert result['min-entropy'] < 0.01
+    assert result['estimates']['lag']['min-entropy'] < 0.01
+
+def test_min_entropy_test_too_short():
+    result = entropy_module.min_entropy_test("0101")
+    assert 'error' in result
+
+if __name__ == "__main__":
+    pytest.main(["test_entropy_module.py"])
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+
+import pytest
+from events_module import EventBus, sse_message
+
+# Test EventBus: subscribers get the last state first, then new ones
+def test_event_bus_replays_last_state():
+    bus = EventBus()
+    bus.publish('task', {'status': 'queued'})
+    with bus.subscribe('task') as subscription:
+        assert subscription.get(timeout=1) == {'status': 'queued'}
+        bus.publish('task', {'status': '50%'})
+        assert subscription.get(timeout=1) == {'status': '50%'}
+        assert subscription.get(timeout=0.01) is None
+    assert bus.subscriber_count('task') == 0
+
+# Test EventBus: a slow subscriber drops old states but keeps the newest
+def test_event_bus_slow_subscriber_keeps_newest():
+    bus = EventBus(queue_size=2)
+    subscription = bus.subscribe('task')
+    for i in range(10):
+        bus.publish('task', {'i': i})
+    assert [subscription.get(timeout=1), subscription.get(timeout=1)] == [{'i': 8}, {'i': 9}]
+    subscription.close()
+
+# Test EventBus: a state published from another thread wakes a waiting subscriber
+def test_event_bus_cross_thread():
+    bus = EventBus()
+    subscription = bus.subscribe('task')
+    threading.Timer(0.05, bus.publish, ('task', {'done': True})).start()
+    assert subscription.get(timeout=2) == {'done': True}
+    bus.forget('task')
+    assert bus.subscribe('other').get(timeout=0.01) is None
+
+# Test sse_message: SSE framing with a JSON payload
+def test_sse_message():
+    message = sse_message({'status': 'ok'}, event='progress')
+    assert message.startswith('event: progress\ndata: ')
+    assert message.endswith('\n\n')
+    assert json.loads(message.split('data: ')[1]) == {'status': 'ok'}
+
+if __name__ == "__main__":
+    pytest.main(["test_events_module.py"])
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
+import numpy as np
 import pytest
 from generators import (
     PythonRandomGenerator, 
     JavaRandomGenerator, 
     NanoTimeRandomGenerator, 
+    MixRandomGenerators,
     SoundRandomGenerator,
     generator_factory
 )
@@ -23,6 +25,21 @@ def test_python_random_generator_different_values():
     vals = set(rng.generate(1000) for _ in range(50))
     assert len(vals) > 1
 
+# Test for generate_many:
+# Ensures the batch helper returns a NumPy int64 array of in-range values.
+def test_generate_many_returns_array_in_range():
+    rng = PythonRandomGenerator()
+    vals = rng.generate_many(10, 200)
+    assert vals.dtype == np.int64 and len(vals) == 200
+    assert vals.min() >= 0 and vals.max() <= 10
+
+# Test for generate_bytes:
+# Ensures the raw byte stream has the requested length.
+def test_generate_bytes_length():
+    rng = PythonRandomGenerator()
+    data = rng.generate_bytes(64)
+    assert isinstance(data, bytes) and len(data) == 64
+
 # Test for NanoTimeRandomGenerator: 
 # Ensures all generated values are in the requested range [0, 999999].
 def test_nanotime_random_generator_range():
@@ -53,6 +70,17 @@ def test_java_random_generator_returns_zero_on_error(monkeypatch):
     val = rng.generate(10)
     assert val == 0
 
+# Test for MixRandomGenerators.generate_sources:
+# Ensures both sources are drawn once per step, in range and aligned.
+def test_mix_generate_sources_aligned(monkeypatch):
+    import generators
+    monkeypatch.setattr(generators, 'safe_run', lambda *a, **k: "7\n")
+    rng = MixRandomGenerators()
+    time_values, java_values = rng.generate_sources(100, 20)
+    assert len(time_values) == len(java_values) == 20
+    assert time_values.min() >= 0 and time_values.max() <= 100
+    assert (java_values == 7).all()
+
 # Test for SoundRandomGenerator:
 # Checks that SoundRandomGenerator can be created and closed without raising exceptions.
 def test_sound_random_generator_close():
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+import integer_tests_module
+
+# Uniform integers from a fixed-seed NumPy generator, as a well-behaved reference stream.
+def uniform_stream(upper_bound, count, seed=1):
+    return np.random.default_rng(seed).integers(0, upper_bound + 1, count)
+
+# Test birthday_spacings_test: uniform integers pass and report batch parameters
+def test_birthday_spacings_test_uniform():
+    values = uniform_stream(2**16 - 1, 40000)
+    result = integer_tests_module.birthday_spacings_test(values, 2**16 - 1)
+    assert result['birthdays'] == 81
+    assert result['batches'] == 40000 // 81
+    assert sum(result['class_counts']) == result['batches']
+    assert result['passed']
+
+# Test birthday_spacings_test: an arithmetic progression has only repeated spacings
+def test_birthday_spacings_test_detects_lattice():
+    values = np.arange(40000) * 7919 % 65536
+    result = integer_tests_module.birthday_spacings_test(values, 65535)
+    assert not result['passed']
+
+def test_birthday_spacings_test_too_short():
+    result = integer_tests_module.birthday_spacings_test([1, 2, 3], 999999)
+    assert 'error' in result
+
+# Test overlapping_permutations_test: uniform stream passes with 96 degrees of freedom
+def test_overlapping_permutations_test_uniform():
+    values = uniform_stream(10**9, 50000)
+    result = integer_tests_module.overlapping_permutations_test(values, t=5)
+    assert result['df'] == 96
+    assert result['windows'] == 50000 - 4
+    assert result['passed']
+
+# Test overlapping_permutations_test: a sawtooth stream has very few orderings
+def test_overlapping_permutations_test_detects_sawtooth():
+    values = np.arange(50000) % 97
+    result = integer_tests_module.overlapping_permutations_test(values, t=3)
+    assert not result['passed']
+
+def test_overlapping_permutations_test_invalid_window():
+    result = integer_tests_module.overlapping_permutations_test(uniform_stream(100, 5000), t=8)
+    assert 'error' in result
+
+# Test parking_lot_test: uniform points park close to the Diehard mean of 3523 cars
+def test_parking_lot_test_uniform():
+    values = uniform_stream(2**32 - 1, 2 * 12000 * 3)
+    result = integer_tests_module.parking_lot_test(values, 2**32 - 1)
+    assert result['runs'] == 3
+    assert all(abs(k - 3523) < 6 * 21.9 for k in result['parked'])
+    assert 'p-value' in result
+
+# Test parking_lot_test: a coarse bound leaves only a small lattice of parking spots
+def test_parking_lot_test_detects_coarse_bound():
+    values = uniform_stream(9, 2 * 12000)
+    result = integer_tests_module.parking_lot_test(values, 9)
+    assert not result['passed']
+
+def test_parking_lot_test_too_short():
+    result = integer_tests_module.parking_lot_test([1, 2, 3], 10)
+    assert 'error' in result
+
+# Test minimum_distance_test and spheres_3d_test: uniform points pass
+def test_minimum_distance_test_uniform():
+    values = uniform_stream(2**32 - 1, 2 * 8000 * 20)
+    result = integer_tests_module.minimum_distance_test(values, 2**32 - 1)
+    assert result['runs'] == 20
+    assert result['passed']
+
+def test_spheres_3d_test_uniform():
+    values = uniform_stream(2**32 - 1, 3 * 4000 * 20)
+    result = integer_tests_module.spheres_3d_test(values, 2**32 - 1)
+    assert result['runs'] == 20
+    assert result['passed']
+
+# Test minimum_distance_test: a small bound forces duplicate points (distance 0)
+def test_minimum_distance_test_detects_duplicates():
+    values = uniform_stream(999, 2 * 8000 * 5)
+    result = integer_tests_module.minimum_distance_test(values, 999)
+    assert result['duplicate_points'] == 5
+    assert not result['passed']
+
+# Test equidistribution_test: uniform stream passes, modulo-reduced stream fails
+def test_equidistribution_test_uniform():
+    values = uniform_stream(999999, 100000)
+    result = integer_tests_module.equidistribution_test(values, 999999)
+    assert result['bins'] == 20000
+    assert result['passed']
+
+def test_equidistribution_test_detects_modulo_bias():
+    values = uniform_stream(999999, 200000) % 700001  # low values twice as likely
+    result = integer_tests_module.equidistribution_test(values, 700000)
+    assert not result['passed']
+
+def test_equidistribution_test_large_bound():
+    values = np.random.default_rng(2).integers(0, 2**62, 50000, dtype=np.int64)
+    result = integer_tests_module.equidistribution_test(values, 2**62 - 1)
+    assert result['passed']
+
+# Test gap_test: uniform stream passes and every gap is counted
+def test_gap_test_uniform():
+    values = uniform_stream(999, 20000)
+    result = integer_tests_module.gap_test(values, 999)
+    assert sum(result['gap_counts']) == result['gaps']
+    assert result['passed']
+
+def test_gap_test_detects_alternation():
+    values = np.tile([10, 900], 5000)  # marked values exactly every second draw
+    result = integer_tests_module.gap_test(values, 999)
+    assert not result['passed']
+
+# Test coupon_collector_test: uniform stream passes, a missing category fails
+def test_coupon_collector_test_uniform():
+    values = uniform_stream(999999, 30000)
+    result = integer_tests_module.coupon_collector_test(values, 999999)
+    assert result['categories'] == 5
+    assert result['passed']
+
+def test_coupon_collector_test_too_short():
+    result = integer_tests_module.coupon_collector_test(uniform_stream(99, 20), 99)
+    assert 'error' in result
+
+# Test runs_up_test and runs_up_down_test: uniform stream passes, sorted blocks fail
+def test_runs_up_test_uniform():
+    result = integer_tests_module.runs_up_test(uniform_stream(10**9, 20000))
+    assert len(result['run_counts']) == 6
+    assert result['passed']
+
+def test_runs_up_test_detects_long_runs():
+    values = np.sort(uniform_stream(10**9, 20000).reshape(-1, 8), axis=1).ravel()
+    result = integer_tests_module.runs_up_test(values)
+    assert not result['passed']
+
+def test_runs_up_down_test_uniform_and_ties():
+    values = uniform_stream(10**9, 20000)
+    result = integer_tests_module.runs_up_down_test(values)
+    assert result['ties'] == 0
+    assert result['passed']
+
+# Test bit_position_test: exact expected frequencies for a non power-of-two range
+def test_bit_position_test_uniform():
+    values = uniform_stream(999999, 50000)
+    result = integer_tests_module.bit_position_test(values, 999999)
+    assert result['width'] == 20
+    assert result['expected_frequencies'][0] == 0.5
+    assert result['expected_frequencies'][19] == pytest.approx((10**6 - 2**19) / 10**6)
+    assert result['passed']
+
+# Test bit_position_test: a stuck low bit and a copied bit are detected
+def test_bit_position_test_detects_bias():
+    values = uniform_stream(999999, 50000)
+    result = integer_tests_module.bit_position_test(values & ~1, 999999)
+    assert not result['passed']
+    assert result['worst_position'] == 0
+    copied = (values & ~1) | ((values >> 3) & 1)
+    result = integer_tests_module.bit_position_test(copied, 999999)
+    assert not result['passed']
+    assert result['worst_pair'] == (0, 3)
+    assert result['correlation'][0][3] == pytest.approx(1.0)
+
+if __name__ == "__main__":
+    pytest.main(["test_integer_tests_module.py"])
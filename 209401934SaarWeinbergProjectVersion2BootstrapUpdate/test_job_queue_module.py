@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+from job_queue_module import JobScheduler, QueueFull
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+# Blocks until released, recording the job order.
+class Gate:
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+        self.finished = []
+
+    def job(self, name, token=None):
+        self.started.append(name)
+        while not self.release.wait(0.01):
+            if token.cancelled:
+                return
+        self.finished.append(name)
+
+# Test JobScheduler: the queue is bounded
+def test_scheduler_queue_full():
+    gate = Gate()
+    scheduler = JobScheduler(workers=1, max_queued=2)
+    scheduler.submit('a', gate.job, ('a',))
+    assert wait_until(lambda: gate.started == ['a'])
+    scheduler.submit('b', gate.job, ('b',))
+    scheduler.submit('c', gate.job, ('c',))
+    with pytest.raises(QueueFull):
+        scheduler.submit('d', gate.job, ('d',))
+    gate.release.set()
+    assert wait_until(lambda: len(gate.finished) == 3)
+    scheduler.shutdown()
+
+# Test JobScheduler: higher priority jobs start first
+def test_scheduler_priorities():
+    gate = Gate()
+    scheduler = JobScheduler(workers=1)
+    scheduler.submit('first', gate.job, ('first',))
+    assert wait_until(lambda: gate.started == ['first'])
+    scheduler.submit('low', gate.job, ('low',), priority=0)
+    scheduler.submit('high', gate.job, ('high',), priority=5)
+    assert scheduler.position('high') == 0
+    gate.release.set()
+    assert wait_until(lambda: len(gate.finished) == 3)
+    assert gate.started == ['first', 'high', 'low']
+    scheduler.shutdown()
+
+# Test JobScheduler: a generator at its limit does not block other generators
+def test_scheduler_generator_limits():
+    gate = Gate()
+    scheduler = JobScheduler(workers=3, generator_limits={'sound': 1})
+    scheduler.submit('s1', gate.job, ('s1',), generator_name='sound')
+    scheduler.submit('s2', gate.job, ('s2',), generator_name='sound')
+    scheduler.submit('p1', gate.job, ('p1',), generator_name='pythonrand')
+    assert wait_until(lambda: sorted(gate.started) == ['p1', 's1'])
+    time.sleep(0.05)
+    assert scheduler.stats()['running_per_generator'] == {'sound': 1, 'pythonrand': 1}
+    gate.release.set()
+    assert wait_until(lambda: len(gate.finished) == 3)
+    scheduler.shutdown()
+
+# Test JobScheduler: generator slots taken outside the queue share the generator's limit with jobs
+def test_scheduler_acquire_generator():
+    gate = Gate()
+    scheduler = JobScheduler(workers=2, generator_limits={'sound': 1})
+    assert scheduler.acquire_generator('sound')
+    assert not scheduler.acquire_generator('sound')
+    assert scheduler.acquire_generator('pythonrand')
+    scheduler.submit('s1', gate.job, ('s1',), generator_name='sound')
+    time.sleep(0.05)
+    assert gate.started == []
+    scheduler.release_generator('sound')
+    assert wait_until(lambda: gate.started == ['s1'])
+    gate.release.set()
+    scheduler.release_generator('pythonrand')
+    assert wait_until(lambda: scheduler.stats()['running_per_generator'] == {})
+    scheduler.shutdown()
+
+# Test JobScheduler: cancelling removes queued jobs and signals running ones
+def test_scheduler_cancel():
+    gate = Gate()
+    scheduler = JobScheduler(workers=1)
+    running_token = scheduler.submit('run', gate.job, ('run',))
+    assert wait_until(lambda: gate.started == ['run'])
+    queued_token = scheduler.submit('queued', gate.job, ('queued',))
+    assert scheduler.cancel('queued') == 'queued'
+    assert queued_token.cancelled
+    assert scheduler.cancel('run') == 'running'
+    assert running_token.cancelled
+    assert wait_until(lambda: scheduler.stats()['running'] == 0)
+    assert gate.finished == [] and gate.started == ['run']
+    assert scheduler.cancel('unknown') is None
+    scheduler.shutdown()
+
+if __name__ == "__main__":
+    pytest.main(["test_job_queue_module.py"])
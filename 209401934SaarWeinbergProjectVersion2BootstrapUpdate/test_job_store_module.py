@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import sqlite3
+
+import numpy as np
+import pytest
+from job_store_module import JobStore
+
+def write_jobs(path, prefix, count):
+    store = JobStore(path)
+    for i in range(count):
+        store.save(f"{prefix}-{i}", {"status": "Queued", "done": False, "result": "",
+                                     "generator_name": prefix})
+        store.update(f"{prefix}-{i}", status="100% complete", done=True)
+
+# Test JobStore: state fields round-trip and progress follows the status text
+def test_job_store_save_update_get(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    store.save('t1', {"status": "Queued", "done": False, "result": "", "generator_name": "time"},
+               test_type='frequency')
+    store.update('t1', status="40% complete - Time Nano Generator")
+    job = store.get('t1')
+    assert job['status'].startswith("40%") and job['progress'] == 40
+    assert job['generator_name'] == "time" and job['test_type'] == 'frequency'
+    assert job['done'] is False and job['result_data'] is None
+    store.update('t1', status="Test completed", done=True, result="PASS", run_id="r1")
+    job = store.get('t1')
+    assert job['done'] is True and job['progress'] == 100 and job['run_id'] == "r1"
+    assert store.get('missing') is None
+
+# Test JobStore: structured results with NumPy values are stored as JSON
+def test_job_store_structured_result(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    store.save('t1', {"status": "done", "done": True, "result": "x", "generator_name": "time"})
+    store.save_result('t1', {'p-value': np.float64(0.5), 'passed': np.bool_(True),
+                             'counts': np.arange(3)})
+    assert store.get('t1')['result_data'] == {'p-value': 0.5, 'passed': True, 'counts': [0, 1, 2]}
+
+# Test JobStore: a cancel request flags unfinished jobs only, until the owner clears it
+def test_job_store_cancel_requests(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(path)
+    store.save('running', {"status": "10% complete", "done": False})
+    store.save('finished', {"status": "Test completed", "done": True})
+    other = JobStore(path)  # as another server process sees it
+    assert other.request_cancel('running')
+    assert not other.request_cancel('finished') and not other.request_cancel('missing')
+    assert store.cancel_requests() == ['running'] and store.get('running')['cancel_requested']
+    store.clear_cancel('running')
+    assert store.cancel_requests() == []
+
+# Test JobStore: a database created before the cancel flag is migrated
+def test_job_store_adds_cancel_column(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (task_id TEXT PRIMARY KEY, generator TEXT, test_type TEXT, status TEXT, "
+                 "progress INTEGER DEFAULT 0, done INTEGER DEFAULT 0, result TEXT DEFAULT '', "
+                 "result_json TEXT, run_id TEXT, created REAL NOT NULL, updated REAL NOT NULL)")
+    conn.execute("INSERT INTO jobs (task_id, done, created, updated) VALUES ('old', 0, 0, 0)")
+    conn.commit()
+    conn.close()
+    store = JobStore(path)
+    assert store.get('old')['cancel_requested'] is False
+    assert store.request_cancel('old') and store.cancel_requests() == ['old']
+
+# Test JobStore: history is newest first, filtered by generator and paginated
+def test_job_store_history_pagination(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    for i in range(5):
+        store.save(f"t{i}", {"status": "done", "done": True, "generator_name": "time" if i % 2 else "sound"})
+    page = store.history(page=1, per_page=2)
+    assert page['total'] == 5 and [job['task_id'] for job in page['jobs']] == ['t4', 't3']
+    assert [job['task_id'] for job in store.history(page=3, per_page=2)['jobs']] == ['t0']
+    timed = store.history(generator="time")
+    assert timed['total'] == 2 and {job['task_id'] for job in timed['jobs']} == {'t1', 't3'}
+    assert store.history(since=store.get('t3')['created'])['total'] == 2
+
+# Test JobStore: several processes write the same database concurrently
+def test_job_store_multiple_processes(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    JobStore(path)
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=write_jobs, args=(path, f"p{i}", 25)) for i in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+    store = JobStore(path)
+    assert store.history()['total'] == 75
+    assert all(job['done'] for job in store.history(per_page=200)['jobs'])
+    assert store.history(generator="p1")['total'] == 25
+
+# Test JobStore: with a retention period, saving a job prunes the jobs older than it
+def test_job_store_retention(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), retention_seconds=3600, prune_interval=3600)
+    store.save('old', {"status": "done", "done": True})
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET created = created - 7200 WHERE task_id = 'old'")
+    store.save('new', {"status": "Queued", "done": False})
+    assert store.get('old') is not None  # the first save pruned; the next prune is an interval away
+    store._next_prune = 0
+    store.save('newer', {"status": "Queued", "done": False})
+    assert store.get('old') is None and store.get('new') is not None
+    assert JobStore(str(tmp_path / "other.sqlite3")).prune() == 0
+
+if __name__ == "__main__":
+    pytest.main(["test_job_store_module.py"])
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import numpy as np
+import pytest
+from prefetch_module import Prefetcher, PrefetchPool
+
+class CountingGenerator:
+    """Returns the words 0, 1, 2, ... so every bit served can be traced back to its word."""
+    def __init__(self):
+        self.next = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_many(self, upper_bound, count):
+        with self.lock:
+            self.calls += 1
+            values = np.arange(self.next, self.next + count) % (upper_bound + 1)
+            self.next += count
+            return values
+
+class FailingGenerator:
+    def generate_many(self, upper_bound, count):
+        raise RuntimeError("device unavailable")
+
+# Test Prefetcher: the buffer fills to the high watermark and serves bits in order, never twice
+def test_prefetcher_serves_bits_once():
+    generator = CountingGenerator()
+    prefetcher = Prefetcher(lambda: generator, 64, 256, word_bits=8, batch_words=4)
+    try:
+        assert prefetcher.wait_filled(timeout=5)
+        # 8-bit words 0, 1, 2, ... read 8 bits at a time give the words back
+        assert prefetcher.draw_many(255, 4) == [0, 1, 2, 3]
+        assert prefetcher.draw(255) == 4
+        # 4-bit draws split the next word (5) into its low and high nibble
+        assert prefetcher.draw_many(15, 2) == [5, 0]
+        stats = prefetcher.stats()
+        assert stats['hits'] == 3 and stats['misses'] == 0
+        assert stats['buffered_bits'] >= 64
+    finally:
+        prefetcher.close()
+
+# Test Prefetcher: rejection sampling keeps draws within the bound
+def test_prefetcher_bound():
+    prefetcher = Prefetcher(lambda: CountingGenerator(), 1024, 4096, word_bits=16)
+    try:
+        assert prefetcher.wait_filled(timeout=5)
+        values = prefetcher.draw_many(5, 100)
+        assert values is not None and all(0 <= v <= 5 for v in values)
+        assert prefetcher.draw(-1) is None
+    finally:
+        prefetcher.close()
+
+# Test Prefetcher: a draw larger than the buffer is a miss that leaves the buffer as it was
+def test_prefetcher_miss_keeps_buffer():
+    generator = CountingGenerator()
+    prefetcher = Prefetcher(lambda: generator, 32, 64, word_bits=8, batch_words=2)
+    try:
+        assert prefetcher.wait_filled(timeout=5)
+        assert prefetcher.max_count(255) == 8
+        buffered = prefetcher.stats()['buffered_bits']
+        assert prefetcher.draw_many(255, 100) is None
+        assert prefetcher.stats()['misses'] == 1
+        assert prefetcher.stats()['buffered_bits'] == buffered
+        assert prefetcher.draw(255) == 0
+    finally:
+        prefetcher.close()
+
+# Test Prefetcher: a draw that runs dry through rejections puts the bits it read back
+def test_prefetcher_rejections_put_back():
+    generator = CountingGenerator()
+    prefetcher = Prefetcher(lambda: generator, 32, 64, word_bits=8, batch_words=2)
+    try:
+        assert prefetcher.wait_filled(timeout=5)
+    finally:
+        prefetcher.close()  # no refills from here on
+    buffered = prefetcher.stats()['buffered_bits']
+    # Bound 0 takes one bit per try and rejects the ones: the words 0, 1, 2, ... hold this many zeros
+    zeros = sum(8 - bin(word).count('1') for word in range(buffered // 8))
+    assert prefetcher.draw_many(0, zeros + 1) is None
+    assert prefetcher.stats()['buffered_bits'] == buffered
+    assert prefetcher.draw(255) == 0
+    assert prefetcher.draw_many(0, zeros - 8) == [0] * (zeros - 8)
+
+# Test Prefetcher: the buffer is refilled after a draw takes it below the low watermark
+def test_prefetcher_miss_and_refill():
+    generator = CountingGenerator()
+    prefetcher = Prefetcher(lambda: generator, 32, 64, word_bits=8, batch_words=2)
+    try:
+        assert prefetcher.wait_filled(timeout=5)
+        assert prefetcher.draw_many(255, 6) is not None
+        assert prefetcher.wait_filled(timeout=5)
+        assert prefetcher.stats()['refills'] >= 2
+    finally:
+        prefetcher.close()
+
+# Test Prefetcher: generator failures are counted and draws miss instead of raising
+def test_prefetcher_generator_failure():
+    prefetcher = Prefetcher(FailingGenerator, 16, 64, retry_seconds=0.01)
+    try:
+        assert not prefetcher.wait_filled(timeout=0.2)
+        assert prefetcher.draw(10) is None
+        assert prefetcher.stats()['errors'] >= 1
+    finally:
+        prefetcher.close()
+
+# Test PrefetchPool: only configured generators are prefetched
+def test_prefetch_pool():
+    pool = PrefetchPool(lambda name: CountingGenerator(), {'fast': (64, 128)}, word_bits=8)
+    try:
+        assert pool.prefetchers['fast'].wait_filled(timeout=5)
+        assert pool.draw('fast', 255) == 0
+        assert pool.draw('other', 255) is None
+        assert set(pool.stats()) == {'fast'}
+    finally:
+        pool.close()
+
+def test_prefetcher_rejects_bad_watermarks():
+    with pytest.raises(ValueError):
+        Prefetcher(CountingGenerator, 100, 100)
+
+if __name__ == "__main__":
+    pytest.main(["test_prefetch_module.py"])
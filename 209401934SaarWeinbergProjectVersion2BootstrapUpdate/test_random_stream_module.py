@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import json
+
+import numpy as np
+import pytest
+import random_stream_module
+from random_stream_module import encode_stream
+
+class CountingGenerator:
+    """Returns 0, 1, 2, ... modulo upper_bound + 1 and records the batch sizes requested."""
+    def __init__(self):
+        self.next = 0
+        self.batches = []
+
+    def generate_many(self, upper_bound, count):
+        self.batches.append(count)
+        values = (np.arange(self.next, self.next + count) % (upper_bound + 1)).astype(np.int64)
+        self.next += count
+        return values
+
+    def generate_bytes(self, count):
+        return self.generate_many(255, count).astype(np.uint8).tobytes()
+
+# Test encode_stream: the JSON array holds every value, drawn in bounded chunks
+def test_encode_stream_json_chunks():
+    generator = CountingGenerator()
+    chunks = list(encode_stream(generator, 1000, 2500, 'json', chunk_values=1000))
+    assert json.loads(''.join(chunks)) == [i % 1001 for i in range(2500)]
+    assert generator.batches == [1000, 1000, 500]
+
+# Test encode_stream: NDJSON gives one value per line
+def test_encode_stream_ndjson():
+    text = ''.join(encode_stream(CountingGenerator(), 9, 25, 'ndjson', chunk_values=10))
+    assert [json.loads(line) for line in text.splitlines()] == [i % 10 for i in range(25)]
+
+# Test encode_stream: binary values are little-endian at the narrowest width for the bound
+def test_encode_stream_binary_widths():
+    for upper_bound, width in [(255, 1), (1000, 2), (70000, 4), (1 << 40, 8)]:
+        assert random_stream_module.value_width(upper_bound) == width
+        data = b''.join(encode_stream(CountingGenerator(), upper_bound, 300, 'binary', chunk_values=128))
+        assert len(data) == 300 * width
+        values = np.frombuffer(data, dtype=f'<u{width}')
+        assert values.tolist() == [i % (upper_bound + 1) for i in range(300)]
+
+def test_validate():
+    assert random_stream_module.validate('json', 1000, 10) is None
+    assert 'format' in random_stream_module.validate('xml', 1000, 10)
+    assert random_stream_module.validate('json', 0, 10)
+    assert random_stream_module.validate('json', 1 << 63, 10)
+    assert random_stream_module.validate('binary', 1000, random_stream_module.MAX_COUNT + 1)
+
+if __name__ == "__main__":
+    pytest.main(["test_random_stream_module.py"])
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+import repetition_module
+
+# Test repetition_test: the exact count matches np.unique even with a tiny, saturated filter
+def test_repetition_test_exact_count():
+    values = np.random.default_rng(1).integers(0, 10**6, 100000)
+    result = repetition_module.repetition_test(values, 10**6 - 1, memory_bytes=1 << 10, chunk_size=7000)
+    assert result['verified']
+    assert result['repeats'] == len(values) - len(np.unique(values))
+    assert result['passed']
+
+# Test repetition_test: a replayed block of outputs is far above the birthday bound
+def test_repetition_test_detects_replay():
+    values = np.random.default_rng(2).integers(0, 2**62, 200000)
+    values[150000:150050] = values[1000:1050]
+    result = repetition_module.repetition_test(values, 2**62 - 1)
+    assert result['repeats'] == 50
+    assert result['expected_repeats'] < 1e-6
+    assert not result['passed']
+
+# Test RepetitionDetector: chunks from a callable source are scanned twice
+def test_repetition_test_callable_source():
+    def source():
+        rng = np.random.default_rng(3)
+        for _ in range(5):
+            yield rng.integers(0, 5000, 1000)
+    result = repetition_module.repetition_test(source, 4999)
+    assert result['N'] == 5000
+    assert result['expected_repeats'] == pytest.approx(5000 - 5000 * (1 - (1 - 1 / 5000) ** 5000))
+
+# Test block_values: byte stream split into big-endian blocks
+def test_block_values():
+    blocks = repetition_module.block_values(bytes(range(9)), block_bytes=4)
+    assert blocks.tolist() == [0x00010203, 0x04050607]
+
+def test_repetition_test_too_short():
+    result = repetition_module.repetition_test([5], 10)
+    assert 'error' in result
+
+if __name__ == "__main__":
+    pytest.main(["test_repetition_module.py"])
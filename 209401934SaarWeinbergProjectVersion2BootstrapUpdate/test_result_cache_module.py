@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import pytest
+import result_cache_module
+import tests_module
+from result_cache_module import ResultCache, cached_test, make_key
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    result_cache_module.configure()
+    yield
+    result_cache_module.configure()
+
+calls = []
+
+@cached_test
+def counting_test(bits, group_size=2):
+    calls.append(group_size)
+    return {'p-value': 0.5, 'passed': True}
+
+# Test cached_test: same bits and parameters hit, other parameters miss
+def test_cached_test_hits_and_misses():
+    calls.clear()
+    counting_test("0110" * 10)
+    counting_test("0110" * 10)
+    counting_test("0110" * 10, group_size=3)
+    assert calls == [2, 3]
+    stats = result_cache_module.RESULT_CACHE.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
+
+# Test cached_test: positional, keyword and default values of a parameter share one key
+def test_cached_test_binds_arguments():
+    calls.clear()
+    counting_test("0110" * 10, 2)
+    counting_test("0110" * 10, group_size=2)
+    counting_test("0110" * 10)
+    counting_test(bits="0110" * 10)
+    assert calls == [2]
+    assert tests_module.serial_test("0110" * 50, 2) == tests_module.serial_test("0110" * 50)
+    assert result_cache_module.RESULT_CACHE.stats()['hits'] == 4
+
+# Test make_key: the same bits share one key however they are passed
+def test_make_key_content():
+    bits = "1011001"
+    assert make_key('t', (bits,), {}) == make_key('t', ("1011001",), {})
+    assert make_key('t', (bits,), {}) != make_key('t', ("1011000",), {})
+    assert make_key('t', (bits,), {}) == make_key('t', (tests_module.pack_bits(bits),), {})
+    assert make_key('t', (bits,), {}) == make_key('t', (list(bits),), {})
+
+# Test tests_module functions are cached and callers get their own copy
+def test_tests_module_results_cached():
+    bits = "1100100100001111" * 64
+    first = tests_module.block_frequency_test(bits, block_size=16)
+    first['p-value'] = -1
+    second = tests_module.block_frequency_test(bits, block_size=16)
+    assert second['p-value'] != -1
+    assert result_cache_module.RESULT_CACHE.stats()['hits'] == 1
+
+def test_errors_are_not_cached():
+    tests_module.longest_run_test("1" * 100)
+    tests_module.longest_run_test("1" * 100)
+    assert result_cache_module.RESULT_CACHE.stats()['entries'] == 0
+
+# Test ResultCache: size-based LRU eviction keeps the most recently used entries
+def test_result_cache_lru_eviction():
+    cache = ResultCache(max_bytes=200)
+    for i in range(10):
+        cache.put(f"k{i}", {'value': i})
+        cache.get("k0")  # keep k0 recent
+    stats = cache.stats()
+    assert stats['bytes'] <= 200
+    assert cache.get("k0") == {'value': 0}
+    assert cache.get("k1") is None
+    assert cache.get("k9") == {'value': 9}
+
+# Test ResultCache: the disk tier survives a new cache instance
+def test_result_cache_disk_tier(tmp_path):
+    ResultCache(disk_dir=str(tmp_path)).put("key", {'p-value': 0.25})
+    cache = ResultCache(disk_dir=str(tmp_path))
+    assert cache.get("key") == {'p-value': 0.25}
+    assert cache.get("key") == {'p-value': 0.25}
+    assert cache.stats()['disk_hits'] == 1
+
+if __name__ == "__main__":
+    pytest.main(["test_result_cache_module.py"])
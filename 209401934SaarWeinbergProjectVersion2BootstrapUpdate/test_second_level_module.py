@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+import pytest
+import second_level_module
+
+# Sequence sources for the process pool; module level so they can be pickled.
+def uniform_bits(index):
+    rng = np.random.default_rng(index)
+    return ''.join(map(str, rng.integers(0, 2, 2000)))
+
+def biased_bits(index):
+    rng = np.random.default_rng(index)
+    return ''.join(map(str, (rng.random(2000) < 0.53).astype(int)))
+
+def crashing_bits(index):
+    os._exit(1)
+
+# Test p_value_uniformity: uniform p-values pass, clustered p-values fail
+def test_p_value_uniformity_uniform():
+    p = np.random.default_rng(1).random(200)
+    result = second_level_module.p_value_uniformity(p)
+    assert result['sequences'] == 200
+    assert sum(result['bin_counts']) == 200
+    assert result['passed']
+
+def test_p_value_uniformity_clustered():
+    p = np.random.default_rng(2).random(200) * 0.3
+    result = second_level_module.p_value_uniformity(p)
+    assert result['p-value'] < 0.0001
+    assert not result['passed']
+
+def test_p_value_uniformity_too_few():
+    result = second_level_module.p_value_uniformity([0.5] * 5)
+    assert 'error' in result
+
+# Test second_level_test: sequences are spread over worker processes
+def test_second_level_test_uniform_source():
+    result = second_level_module.second_level_test(uniform_bits, ['frequency', 'runs'],
+                                                   sequences=60, workers=2)
+    assert result['frequency']['sequences'] == 60
+    assert result['runs']['passed']
+
+def test_second_level_test_detects_bias():
+    result = second_level_module.second_level_test(biased_bits, ['frequency'], sequences=60, workers=2)
+    assert not result['frequency']['passed']
+
+# Test process_pool: one long-lived pool per size, with spawned (not forked) workers
+def test_process_pool_is_shared():
+    pool = second_level_module.process_pool(2)
+    assert second_level_module.process_pool(2) is pool
+    assert pool._mp_context.get_start_method() == 'spawn'
+    assert pool.submit(uniform_bits, 1).result() == uniform_bits(1)
+
+# Test second_level_test: sequences can be drawn in the calling process, with only the tests in workers
+def test_second_level_test_generate_in_caller():
+    drawn = []
+    def make_bits(index):  # a closure: it could not be pickled to a worker
+        drawn.append(index)
+        return uniform_bits(index)
+    result = second_level_module.second_level_test(make_bits, ['frequency'], sequences=30, workers=2,
+                                                   generate_in_workers=False)
+    assert sorted(drawn) == list(range(30))
+    assert result['frequency']['sequences'] == 30
+
+# Test process_pool: a pool broken by a dead worker is replaced for the next job
+def test_broken_pool_is_replaced():
+    pool = second_level_module.process_pool(3)
+    result = second_level_module.second_level_test(crashing_bits, ['frequency'], sequences=2, workers=3)
+    assert 'error' in result
+    replaced = second_level_module.process_pool(3)
+    assert replaced is not pool
+    assert replaced.submit(uniform_bits, 1).result() == uniform_bits(1)
+
+def test_second_level_test_unknown_test():
+    result = second_level_module.second_level_test(uniform_bits, ['nope'], sequences=10)
+    assert 'error' in result
+
+if __name__ == "__main__":
+    pytest.main(["test_second_level_module.py"])
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from sequence_store_module import SequenceStore
+
+def make_run(store, count=1000, seed=1, **kwargs):
+    values = np.random.default_rng(seed).integers(0, 1000, count)
+    bits = ''.join(bin(int(v))[2:] for v in values)
+    return store.put('pythonrand', 999, count, list(bits), values, "note", **kwargs), bits, values
+
+# Test SequenceStore: a stored run gives back the same bits and values
+def test_sequence_store_round_trip():
+    store = SequenceStore()
+    run_id, bits, values = make_run(store)
+    run = store.get(run_id)
+    assert run.bits == bits
+    assert np.array_equal(run.values, values)
+    assert (run.generator_name, run.upper_bound, run.samples) == ('pythonrand', 999, 1000)
+    assert store.get('missing') is None
+
+# Test SequenceStore: over the budget, least recently used runs are evicted
+def test_sequence_store_lru_eviction_without_spill():
+    store = SequenceStore(memory_budget=20000)
+    first, _, _ = make_run(store, seed=1)
+    second, _, _ = make_run(store, seed=2)
+    store.get(first)
+    third, _, _ = make_run(store, seed=3)
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
+    assert store.runs()['bytes'] <= 20000
+
+# Test SequenceStore: evicted runs spill to disk and load back intact
+def test_sequence_store_spills_to_disk(tmp_path):
+    store = SequenceStore(memory_budget=10000, spill_dir=str(tmp_path))
+    first, bits, values = make_run(store, seed=1)
+    make_run(store, seed=2)
+    assert store.runs()['spilled'] == [first]
+    run = store.get(first)
+    assert run.bits == bits
+    assert np.array_equal(run.values, values)
+    assert first not in store.runs()['spilled']
+
+# Test SequenceStore: the spill directory keeps to its byte budget, oldest files go first
+def test_sequence_store_disk_budget(tmp_path):
+    store = SequenceStore(memory_budget=10000, spill_dir=str(tmp_path), disk_budget=20000)
+    run_ids = [make_run(store, seed=seed)[0] for seed in range(5)]
+    assert store.runs()['spilled'] == run_ids[3:4]
+    assert store.runs()['spilled_bytes'] <= 20000
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f"{r}.run" for r in run_ids[3:])
+    assert store.get(run_ids[0]) is None
+
+# Test SequenceStore: spilled runs past their time to live are deleted
+def test_sequence_store_spill_ttl(tmp_path):
+    store = SequenceStore(memory_budget=10000, spill_dir=str(tmp_path), spill_ttl=0)
+    first, _, _ = make_run(store, seed=1)
+    make_run(store, seed=2)
+    assert store.runs()['spilled'] == [] and list(tmp_path.iterdir()) == []
+    assert store.get(first) is None
+
+# Test SequenceStore: a new store indexes the runs spilled by an earlier one
+def test_sequence_store_reindexes_after_restart(tmp_path):
+    store = SequenceStore(memory_budget=10000, spill_dir=str(tmp_path))
+    first, bits, _ = make_run(store, seed=1)
+    second, _, _ = make_run(store, seed=2)
+    restarted = SequenceStore(memory_budget=10000, spill_dir=str(tmp_path))
+    assert restarted.runs()['spilled'] == [first, second]
+    assert restarted.get(first).bits == bits
+
+# Test SequenceStore: a run stored by another process after this store started is found in the spill dir
+def test_sequence_store_finds_runs_of_other_stores(tmp_path):
+    other = SequenceStore(spill_dir=str(tmp_path))
+    store = SequenceStore(spill_dir=str(tmp_path))
+    run_id, bits, values = make_run(other, seed=1)
+    run = store.get(run_id)
+    assert run.bits == bits
+    assert np.array_equal(run.values, values)
+    assert store.get("../" + run_id) is None
+
+# Test SequenceStore: very large bounds keep exact Python ints
+def test_sequence_store_large_values():
+    store = SequenceStore()
+    run_id = store.put('pythonrand', 2 ** 70, 2, "1" * 71 + "0" * 71, [2 ** 70, 2 ** 70 - 1])
+    assert store.get(run_id).values == [2 ** 70, 2 ** 70 - 1]
+
+if __name__ == "__main__":
+    pytest.main(["test_sequence_store_module.py"])
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+import shared_buffer_module
+from shared_buffer_module import BitSequence
+
+# Worker helpers; module level so they can be pickled.
+def append_in_worker(name, bits):
+    with BitSequence.attach(name) as sequence:
+        sequence.append(bits)
+        return sequence.n
+
+def read_in_worker(name):
+    with BitSequence.attach(name) as sequence:
+        return sequence.to_string()
+
+# Test BitSequence: uneven appends give the same bytes as packing in one go
+def test_bit_sequence_append_matches_pack():
+    bits = ''.join(map(str, np.random.default_rng(1).integers(0, 2, 1001)))
+    with BitSequence.create(2000) as sequence:
+        for start in range(0, len(bits), 13):
+            sequence.append(bits[start:start + 13])
+        assert sequence.n == 1001
+        assert sequence.to_string() == bits
+        assert bytes(sequence.packed) == bytes(np.packbits(sequence.to_array()))
+
+def test_bit_sequence_full():
+    with BitSequence.create(8) as sequence:
+        with pytest.raises(ValueError):
+            sequence.append("1" * 9)
+
+# Test BitSequence: a worker process writes in place and another reads the same segment
+def test_bit_sequence_shared_between_processes():
+    with BitSequence.create(64) as sequence:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(append_in_worker, sequence.name, "1011").result() == 4
+            assert pool.submit(append_in_worker, sequence.name, "0011").result() == 8
+            assert pool.submit(read_in_worker, sequence.name).result() == "10110011"
+        assert sequence.to_string() == "10110011"
+
+# Test SharedSegment: the block is unlinked only when the last reference is released
+def test_shared_segment_reference_counting():
+    sequence = BitSequence.from_bits("1100")
+    segment = sequence.segment
+    segment.acquire()
+    sequence.close()
+    assert segment.name in shared_buffer_module.live_segments()
+    segment.release()
+    assert segment.name not in shared_buffer_module.live_segments()
+
+def test_shared_segment_discard_and_cleanup():
+    first = BitSequence.from_bits("1")
+    BitSequence.from_bits("0")  # never released by its owner
+    first.segment.acquire()
+    first.close()
+    first.segment.discard()
+    assert first.name not in shared_buffer_module.live_segments()
+    shared_buffer_module.cleanup_segments()
+    assert shared_buffer_module.live_segments() == {}
+
+if __name__ == "__main__":
+    pytest.main(["test_shared_buffer_module.py"])
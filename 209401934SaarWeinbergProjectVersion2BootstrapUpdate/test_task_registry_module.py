@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+from task_registry_module import TaskRegistry
+
+def running(status="running"):
+    return {"status": status, "done": False, "result": ""}
+
+def finished(result="ok"):
+    return {"status": "done", "done": True, "result": result}
+
+# Test TaskRegistry: update reports changes only and callers get copies
+def test_task_registry_update_and_copies():
+    registry = TaskRegistry()
+    registry.set('a', running())
+    assert registry.update('a', status="running") is None
+    assert registry.update('a', status="50%") == {"status": "50%", "done": False, "result": ""}
+    registry.get('a')['status'] = "changed outside"
+    assert registry.get('a')['status'] == "50%"
+    assert registry.update('missing', status="x") is None
+    assert 'a' in registry and 'missing' not in registry
+
+# Test TaskRegistry: finished tasks expire after the TTL, running ones stay
+def test_task_registry_ttl_eviction():
+    evicted = []
+    registry = TaskRegistry(ttl_seconds=0.05, on_evict=evicted.append)
+    registry.set('old', finished())
+    registry.set('busy', running())
+    time.sleep(0.1)
+    registry.set('new', finished())
+    assert evicted == ['old']
+    assert 'busy' in registry and 'new' in registry
+
+# Test TaskRegistry: deleting a task notifies on_evict, so its other state is dropped too
+def test_task_registry_delete_notifies():
+    evicted = []
+    registry = TaskRegistry(on_evict=evicted.append)
+    registry.set('a', finished())
+    registry.delete('a')
+    registry.delete('missing')
+    assert evicted == ['a'] and 'a' not in registry
+
+# Test TaskRegistry: over the cap, the oldest finished tasks go first
+def test_task_registry_size_cap():
+    registry = TaskRegistry(max_tasks=3)
+    registry.set('busy', running())
+    for name in ('f1', 'f2', 'f3'):
+        registry.set(name, finished())
+        time.sleep(0.01)
+    assert len(registry) == 3
+    assert 'f1' not in registry and 'busy' in registry
+    stats = registry.stats()
+    assert stats['running'] == 1 and stats['finished'] == 2 and stats['evicted'] == 1
+
+# Test TaskRegistry: the memory estimate follows the size of the results
+def test_task_registry_stats_bytes():
+    registry = TaskRegistry()
+    registry.set('small', finished("x"))
+    small = registry.stats()['bytes']
+    registry.set('big', finished("x" * 100000))
+    assert registry.stats()['bytes'] - small > 100000
+    registry.delete('big')
+    assert registry.stats()['bytes'] == small
+
+if __name__ == "__main__":
+    pytest.main(["test_task_registry_module.py"])
@@ -5,6 +5,7 @@ Created on Thu Aug 21 00:18:59 2025
 @author: user
 """
 
+import numpy as np
 import pytest
 import tests_module
 
@@ -98,6 +99,76 @@ def test_maurer_universal_test_valid():
     assert 'p-value' in result
     assert 'passed' in result
 
+# Test random_excursions_test: NIST SP 800-22 worked example (state x=+1)
+def test_random_excursions_test_nist_example():
+    bits = "0110110101"  # 3 cycles
+    result = tests_module.random_excursions_test(bits, min_cycles=1)
+    assert result['cycles'] == 3
+    assert result['states'][1]['counts'] == [1, 1, 0, 1, 0, 0]
+    assert abs(result['states'][1]['p-value'] - 0.502488) < 1e-5
+
+def test_random_excursions_test_too_few_cycles():
+    bits = "0110110101"
+    result = tests_module.random_excursions_test(bits)
+    assert 'error' in result and result['passed'] is False
+    result = tests_module.random_excursions_variant_test(bits)
+    assert 'error' in result and result['passed'] is False
+
+# Test random_excursions_variant_test: NIST SP 800-22 worked example (state x=+1)
+def test_random_excursions_variant_test_nist_example():
+    bits = "0110110101"
+    result = tests_module.random_excursions_variant_test(bits, min_cycles=1)
+    assert result['states'][1]['visits'] == 4
+    assert abs(result['states'][1]['p-value'] - 0.683091) < 1e-5
+    assert 'passed' in result
+
+# Test block_frequency_test: NIST SP 800-22 worked example, and packed input
+def test_block_frequency_test_nist_example():
+    result = tests_module.block_frequency_test("0110011010", block_size=3)
+    assert result['num_blocks'] == 3
+    assert abs(result['p-value'] - 0.801252) < 1e-5
+
+def test_block_frequency_test_packed_input():
+    bits = "1100100100001111" * 64
+    result = tests_module.block_frequency_test(tests_module.pack_bits(bits), block_size=16)
+    assert result['num_blocks'] == 64
+    assert result['chi2'] == 0  # every block has exactly 8 ones
+
+# Test longest_run_test: NIST SP 800-22 worked example (M=8) and short input
+def test_longest_run_test_nist_example():
+    bits = ("11001100000101010110110001001100111000000000001001001101010100010001"
+            "001111010110100000001101011111001100111001101101100010110010")
+    result = tests_module.longest_run_test(bits)
+    assert result['block_size'] == 8
+    assert result['class_counts'] == [4, 9, 3, 0]
+    assert 'p-value' in result
+
+def test_longest_run_test_too_short():
+    result = tests_module.longest_run_test("1" * 100)
+    assert 'error' in result and result['passed'] is False
+    assert tests_module.block_frequency_test("01", block_size=3)['passed'] is False
+
+# Test cross_correlation_test: independent streams pass, a shifted copy is found at its lag
+def test_cross_correlation_test_independent():
+    rng = np.random.default_rng(5)
+    a = rng.integers(0, 2, 100000, dtype=np.uint8)
+    b = rng.integers(0, 2, 100000, dtype=np.uint8)
+    result = tests_module.cross_correlation_test(tests_module.pack_bits(a), tests_module.pack_bits(b))
+    assert result['passed']
+    assert abs(result['max_correlation']) < 0.02
+
+def test_cross_correlation_test_detects_shift():
+    a = np.random.default_rng(6).integers(0, 2, 5000, dtype=np.uint8)
+    b = np.roll(a, -3)  # b[i] == a[i + 3]
+    result = tests_module.cross_correlation_test(a, b, max_lag=10)
+    assert not result['passed']
+    assert result['lag'] == -3
+    assert result['max_correlation'] == pytest.approx(1.0, abs=1e-3)
+
+def test_cross_correlation_test_too_short():
+    result = tests_module.cross_correlation_test("01" * 20, "10" * 20)
+    assert 'error' in result
+
 # Run all tests if this file is executed directly (optional)
 if __name__ == "__main__":
     pytest.main(["test_tests_module.py"])
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import numpy as np
+import pytest
+import warmup_module
+from warmup_module import Warmup
+
+class FakeGenerator:
+    def __init__(self, values):
+        self.values = values
+        self.closed = False
+
+    def generate_many(self, upper_bound, count):
+        return np.resize(np.asarray(self.values), count)
+
+    def close(self):
+        self.closed = True
+
+# Test self_test: healthy draws pass; constant or out-of-range draws fail, and the generator is closed
+def test_self_test():
+    made = []
+    def factory(values):
+        made.append(FakeGenerator(values))
+        return made[-1]
+    warmup_module.self_test(factory, [1, 2, 3])
+    with pytest.raises(RuntimeError):
+        warmup_module.self_test(factory, [0])
+    with pytest.raises(RuntimeError):
+        warmup_module.self_test(factory, [1, 1 << 20])
+    assert all(generator.closed for generator in made)
+
+# Test Warmup: generators warm up in parallel; readiness needs every one to pass
+def test_warmup_parallel_and_ready():
+    barrier = threading.Barrier(3, timeout=5)
+    def check(name):
+        barrier.wait()  # passes only if all three checks run at once
+        if name == 'broken':
+            raise RuntimeError("no device")
+    warmup = Warmup(['a', 'b', 'broken'], check, attempts=1).start()
+    try:
+        assert warmup.wait(timeout=10)
+        status = warmup.status()
+        assert status['finished'] and not status['ready'] and not warmup.ready
+        assert status['generators']['a']['status'] == 'ready'
+        assert status['generators']['broken'] == {'status': 'failed', 'required': True, 'attempts': 1,
+                                                  'seconds': None, 'error': "no device"}
+    finally:
+        warmup.stop()
+
+# Test Warmup: an optional generator is reported but does not hold readiness back
+def test_warmup_optional_generator():
+    def check(name):
+        if name == 'sound':
+            raise RuntimeError("no microphone")
+    warmup = Warmup(['pythonrand', 'sound'], check, required=['pythonrand'], attempts=1).start()
+    try:
+        assert warmup.wait(timeout=5)
+        status = warmup.status()
+        assert status['ready'] and warmup.ready
+        assert status['generators']['sound']['status'] == 'failed'
+        assert status['generators']['sound']['required'] is False
+    finally:
+        warmup.stop()
+    with pytest.raises(ValueError):
+        Warmup(['a'], check, required=['b'])
+
+# Test Warmup: a failed generator keeps being checked in the background and becomes ready when it passes
+def test_warmup_recheck_after_failure():
+    device = threading.Event()
+    def check(name):
+        if not device.is_set():
+            raise RuntimeError("no device")
+    warmup = Warmup(['a'], check, attempts=2, retry_seconds=0.01, recheck_seconds=0.01).start()
+    try:
+        assert warmup.wait(timeout=5)
+        assert not warmup.ready and warmup.status()['generators']['a']['status'] in ('failed', 'retrying')
+        device.set()
+        deadline = time.monotonic() + 5
+        while not warmup.ready and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert warmup.ready and warmup.status()['generators']['a']['attempts'] > 2
+    finally:
+        warmup.stop()
+
+# Test Warmup: a failed check is retried
+def test_warmup_retry():
+    calls = []
+    def check(name):
+        calls.append(name)
+        if len(calls) < 2:
+            raise RuntimeError("cold")
+    warmup = Warmup(['a'], check, attempts=3, retry_seconds=0.01).start()
+    assert warmup.wait(timeout=5)
+    assert warmup.ready and warmup.status()['generators']['a']['attempts'] == 2
+
+if __name__ == "__main__":
+    pytest.main(["test_warmup_module.py"])
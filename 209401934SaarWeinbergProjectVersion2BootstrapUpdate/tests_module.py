@@ -6,7 +6,13 @@ Created on Mon Aug 18 23:50:52 2025
 This module implements various statistical tests for evaluating the randomness 
 of bit sequences. It provides functions to convert numbers to binary, 
 perform frequency and runs tests, chi-squared tests on groups and patterns, 
-autocorrelation checks, Poker test, and Maurer's Universal statistical test.
+autocorrelation checks, Poker test, Maurer's Universal statistical test, the NIST random
+excursions and random excursions variant tests, and the NIST block
+frequency and longest-run-of-ones tests on packed bytes, and an FFT
+cross-correlation test between two generators' streams.
+
+Every test is wrapped by result_cache_module.cached_test, so repeating a
+test on the same bits with the same parameters returns the stored result.
 
 Suitable for analyzing output of pseudo-random and hardware random generators.
 """
@@ -26,10 +32,15 @@ logging.basicConfig(
     format='%(asctime)s %(levelname)s: %(message)s'
 )
 
+import numpy as np
 from scipy.stats import chisquare
+from scipy.special import gammaincc, erfc
+from scipy import fft
 from collections import Counter
 from scipy.stats import norm
 
+from result_cache_module import cached_test
+
 def convert_to_bits(number, max_bits=None):
     """
     Converts a (non-negative) integer to its binary string representation.
@@ -51,6 +62,7 @@ def convert_to_bits(number, max_bits=None):
     else:
         return bits.zfill(max_bits)
 
+@cached_test
 def frequency_test(bits):
     """
     Performs a frequency (monobit) test on a bit sequence.
@@ -76,6 +88,7 @@ def frequency_test(bits):
         logging.error(f"frequency_test failed: {e}")
         return {'error': str(e), 'passed': False}
 
+@cached_test
 def runs_test(bits):
     """
     Calculates the number of runs (continuous blocks of identical digits) in the sequence,
@@ -111,6 +124,7 @@ def runs_test(bits):
         logging.error(f"runs_test failed: {e}")
         return {'error': str(e), 'passed': False}
 
+@cached_test
 def chi_squared_full_test(bits, group_size=8):
     """
     Splits bit sequence into groups (default of 8, i.e., bytes), 
@@ -151,6 +165,7 @@ def chi_squared_full_test(bits, group_size=8):
         logging.error(f"chi_squared_full_test failed: {e}")
         return {'error': str(e), 'passed': False}
 
+@cached_test
 def serial_test(bits, group_size=2):
     """
     Counts all possible bit patterns of length 'group_size' in the sequence,
@@ -188,6 +203,7 @@ def serial_test(bits, group_size=2):
         logging.error(f"serial_test failed: {e}")
         return {'error': str(e), 'passed': False}
 
+@cached_test
 def autocorrelation_test(bits, lag=1):
     """
     Calculates autocorrelation coefficient at given lag
@@ -225,6 +241,7 @@ def autocorrelation_test(bits, lag=1):
         logging.error(f"autocorrelation_test failed: {e}")
         return {'error': str(e), 'passed': False}
 
+@cached_test
 def poker_test(bits, group_size=4):
     """
     Splits bit sequence into groups (of size group_size) and checks 
@@ -263,6 +280,7 @@ def poker_test(bits, group_size=4):
 
 import math
 
+@cached_test
 def maurer_universal_test(bits, L=7):
     """
     Maurer's Universal Statistical Test estimates the compressibility 
@@ -339,3 +357,323 @@ def _maurer_variance(L):
         13: 3.410, 14: 3.416, 15: 3.419, 16: 3.421
     }
     return variance_table.get(L, 1)
+
+def _bits_to_array(bits):
+    """
+    Converts a bit sequence (str, list of '0'/'1' or ints, or NumPy array)
+    into a NumPy uint8 array of 0/1 values.
+    """
+    if isinstance(bits, np.ndarray):
+        return bits.astype(np.uint8, copy=False)
+    if not isinstance(bits, str):
+        bits = ''.join(map(str, bits))
+    return np.frombuffer(bits.encode('ascii'), dtype=np.uint8) - ord('0')
+
+# Reference probabilities pi_k(x) for the random excursions test: the chance
+# that state x is visited exactly k times in a cycle (k=5 means 5 or more).
+_EXCURSION_STATES = (-4, -3, -2, -1, 1, 2, 3, 4)
+_EXCURSION_VARIANT_STATES = tuple(x for x in range(-9, 10) if x != 0)
+
+def _excursion_probabilities(x):
+    a = 1 - 1 / (2 * abs(x))
+    probs = [a] + [(1 / (4 * x * x)) * a ** (k - 1) for k in range(1, 5)]
+    probs.append((1 / (2 * abs(x))) * a ** 4)
+    return np.array(probs)
+
+_EXCURSION_PI = {x: _excursion_probabilities(x) for x in _EXCURSION_STATES}
+
+def _excursion_cycle_index(bits):
+    """
+    Builds the cycle index of the random walk used by both excursion tests.
+
+    The walk S' = 0, S_1, ..., S_n, 0 is split into cycles at its zero
+    crossings. Instead of slicing every cycle, each position gets the id of
+    the cycle it belongs to, so per-cycle counts become a single bincount.
+
+    Returns:
+        tuple: (walk without the closing zero, cycle id per position, J cycles)
+    """
+    x = _bits_to_array(bits).astype(np.int64) * 2 - 1
+    walk = np.concatenate(([0], np.cumsum(x)))
+    zeros = walk == 0
+    cycle_ids = np.cumsum(zeros) - 1
+    # The closing zero of S' ends the last cycle; count it if the walk is open.
+    num_cycles = int(zeros.sum()) - (1 if walk[-1] == 0 else 0)
+    return walk, cycle_ids, num_cycles
+
+@cached_test
+def random_excursions_test(bits, min_cycles=500):
+    """
+    NIST random excursions test. Counts, per cycle of the cumulative-sum
+    random walk, how often each state -4..-1, 1..4 is visited and compares
+    the distribution of visit counts to the theoretical one with chi-squared.
+
+    Args:
+        bits (str or list): Bit string or list.
+        min_cycles (int): Minimum number of cycles for the test to apply.
+
+    Returns:
+        dict: Per-state statistics, overall minimum p-value and pass/fail.
+    """
+    try:
+        walk, cycle_ids, J = _excursion_cycle_index(bits)
+        if J < min_cycles:
+            return {"error": f"Not enough cycles ({J} < {min_cycles})", "passed": False}
+        states = {}
+        for x in _EXCURSION_STATES:
+            visits = np.bincount(cycle_ids[walk == x], minlength=J)[:J]
+            nu = np.bincount(np.minimum(visits, 5), minlength=6)
+            expected = J * _EXCURSION_PI[x]
+            chi2 = float(np.sum((nu - expected) ** 2 / expected))
+            p = float(gammaincc(2.5, chi2 / 2))
+            states[x] = {'chi2': chi2, 'p-value': p, 'counts': nu.tolist()}
+        p_min = min(s['p-value'] for s in states.values())
+        return {
+            'cycles': J,
+            'states': states,
+            'p-value': p_min,
+            'passed': p_min >= 0.01,
+            'n': len(walk) - 1
+        }
+    except Exception as e:
+        logging.error(f"random_excursions_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+@cached_test
+def random_excursions_variant_test(bits, min_cycles=500):
+    """
+    NIST random excursions variant test. Compares the total number of visits
+    to each state -9..-1, 1..9 of the random walk with the number of cycles.
+
+    Args:
+        bits (str or list): Bit string or list.
+        min_cycles (int): Minimum number of cycles for the test to apply.
+
+    Returns:
+        dict: Per-state visit totals and p-values, minimum p-value and pass/fail.
+    """
+    try:
+        walk, _, J = _excursion_cycle_index(bits)
+        if J < min_cycles:
+            return {"error": f"Not enough cycles ({J} < {min_cycles})", "passed": False}
+        # States beyond +/-9 are not tested, so they are folded into +/-10.
+        visits = np.bincount(np.clip(walk, -10, 10) + 10, minlength=21)
+        states = {}
+        for x in _EXCURSION_VARIANT_STATES:
+            xi = int(visits[x + 10])
+            p = float(erfc(abs(xi - J) / np.sqrt(2 * J * (4 * abs(x) - 2))))
+            states[x] = {'visits': xi, 'p-value': p}
+        p_min = min(s['p-value'] for s in states.values())
+        return {
+            'cycles': J,
+            'states': states,
+            'p-value': p_min,
+            'passed': p_min >= 0.01,
+            'n': len(walk) - 1
+        }
+    except Exception as e:
+        logging.error(f"random_excursions_variant_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def pack_bits(bits):
+    """
+    Packs a bit sequence into bytes (MSB first), 8 bits per byte.
+
+    Args:
+        bits (str, list or tuple): Bit sequence, or an already packed
+            (bytes, n) pair which is returned unchanged.
+
+    Returns:
+        tuple: (np.ndarray of uint8, number of valid bits n).
+    """
+    if isinstance(bits, tuple):
+        return bits
+    arr = _bits_to_array(bits)
+    return np.packbits(arr), len(arr)
+
+def _byte_table(fn):
+    return np.array([fn(format(b, '08b')) for b in range(256)], dtype=np.int32)
+
+# Per-byte lookup tables: popcount, and the leading, trailing and longest
+# runs of ones inside the byte (MSB first, matching np.packbits).
+_POPCOUNT = _byte_table(lambda s: s.count('1'))
+_LEAD_ONES = _byte_table(lambda s: len(s) - len(s.lstrip('1')))
+_TRAIL_ONES = _byte_table(lambda s: len(s) - len(s.rstrip('1')))
+_MAX_ONES = _byte_table(lambda s: max(len(r) for r in s.split('0')))
+
+# NIST SP 800-22 parameters for the longest run test, keyed by minimum n:
+# (block size M, run-length class bounds (v_min, v_max), class probabilities)
+_LONGEST_RUN_PARAMS = (
+    (750000, 10000, (10, 16), (0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727)),
+    (6272, 128, (4, 9), (0.1174, 0.2430, 0.2493, 0.1752, 0.1027, 0.1124)),
+    (128, 8, (1, 4), (0.2148, 0.3672, 0.2305, 0.2266)),
+)
+
+# Bytes handled per vectorized step, so gigabit inputs keep a bounded footprint.
+_CHUNK_BYTES = 1 << 22
+
+@cached_test
+def block_frequency_test(bits, block_size=128):
+    """
+    NIST block frequency test. Splits the sequence into blocks of
+    block_size bits and checks that the proportion of ones in each block
+    is close to 1/2. Catches local bias that the global frequency test misses.
+
+    Args:
+        bits (str, list or tuple): Bit string/list or packed (bytes, n) pair.
+        block_size (int): Bits per block (M).
+
+    Returns:
+        dict: Chi-squared statistic, p-value and pass/fail.
+    """
+    try:
+        packed, n = pack_bits(bits)
+        M = block_size
+        N = n // M
+        if N == 0:
+            return {"error": "Sequence too short for the block frequency test", "passed": False}
+        if M % 8 == 0:
+            # Whole-byte blocks: popcounts straight from the lookup table.
+            per_block = M // 8
+            ones = np.empty(N, dtype=np.int64)
+            step = max(1, _CHUNK_BYTES // per_block)
+            for start in range(0, N, step):
+                stop = min(N, start + step)
+                chunk = packed[start * per_block:stop * per_block]
+                ones[start:stop] = _POPCOUNT[chunk].reshape(-1, per_block).sum(axis=1)
+        else:
+            ones = np.unpackbits(packed, count=N * M).reshape(N, M).sum(axis=1, dtype=np.int64)
+        pi = ones / M
+        chi2 = float(4 * M * np.sum((pi - 0.5) ** 2))
+        p = float(gammaincc(N / 2, chi2 / 2))
+        return {
+            'chi2': chi2,
+            'p-value': p,
+            'passed': p >= 0.01,
+            'block_size': M,
+            'num_blocks': N,
+            'n': n
+        }
+    except Exception as e:
+        logging.error(f"block_frequency_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+def _longest_runs_per_block(packed, per_block, N):
+    """
+    Longest run of ones in each of N blocks of per_block bytes.
+
+    A run either lies inside one byte (_MAX_ONES) or crosses byte
+    boundaries: the run still open at the end of byte i is the trailing
+    ones of the last non-0xFF byte plus 8 for every full byte after it.
+    """
+    longest = np.empty(N, dtype=np.int64)
+    step = max(1, _CHUNK_BYTES // per_block)
+    cols = np.arange(per_block)
+    for start in range(0, N, step):
+        stop = min(N, start + step)
+        block = packed[start * per_block:stop * per_block].reshape(-1, per_block)
+        full = block == 0xFF
+        last = np.maximum.accumulate(np.where(full, -1, cols), axis=1)
+        trail = _TRAIL_ONES[block[np.arange(len(block))[:, None], np.maximum(last, 0)]]
+        open_run = np.where(last >= 0, trail + 8 * (cols - last), 8 * (cols + 1))
+        prev_run = np.zeros_like(open_run)
+        prev_run[:, 1:] = open_run[:, :-1]
+        runs = np.maximum(_MAX_ONES[block], prev_run + _LEAD_ONES[block])
+        longest[start:stop] = np.maximum(runs, open_run).max(axis=1)
+    return longest
+
+@cached_test
+def longest_run_test(bits):
+    """
+    NIST longest-run-of-ones-in-a-block test. The block size and reference
+    distribution are chosen from the sequence length as in SP 800-22.
+
+    Args:
+        bits (str, list or tuple): Bit string/list or packed (bytes, n) pair.
+
+    Returns:
+        dict: Class counts, chi-squared statistic, p-value and pass/fail.
+    """
+    try:
+        packed, n = pack_bits(bits)
+        params = next((p for p in _LONGEST_RUN_PARAMS if n >= p[0]), None)
+        if params is None:
+            return {"error": "Sequence too short (less than 128 bits)", "passed": False}
+        _, M, (v_min, v_max), probs = params
+        N = n // M
+        longest = _longest_runs_per_block(packed, M // 8, N)
+        classes = np.clip(longest, v_min, v_max) - v_min
+        nu = np.bincount(classes, minlength=len(probs))
+        expected = N * np.array(probs)
+        chi2 = float(np.sum((nu - expected) ** 2 / expected))
+        p = float(gammaincc((len(probs) - 1) / 2, chi2 / 2))
+        return {
+            'chi2': chi2,
+            'p-value': p,
+            'passed': p >= 0.01,
+            'block_size': M,
+            'num_blocks': N,
+            'class_counts': nu.tolist(),
+            'n': n
+        }
+    except Exception as e:
+        logging.error(f"longest_run_test failed: {e}")
+        return {'error': str(e), 'passed': False}
+
+@cached_test
+def cross_correlation_test(bits_a, bits_b, max_lag=1024, alpha=0.01):
+    """
+    Cross-correlation test between two aligned bit streams, e.g. the two
+    sources inside a combining generator. Bits are mapped to centered
+    +/-1 values and the correlation at every lag in [-max_lag, max_lag] is
+    computed with one zero-padded FFT, so multi-million-bit streams are
+    cheap. Each lag's normalized correlation r_k gives z_k = r_k*sqrt(n-|k|);
+    the largest |z_k| is Sidak corrected for the number of lags.
+
+    Args:
+        bits_a, bits_b (str, list or tuple): Bit strings/lists or packed
+            (bytes, n) pairs; the longer stream is truncated to the shorter.
+        max_lag (int): Largest lag checked in each direction.
+        alpha (float): Significance level for the corrected p-value.
+
+    Returns:
+        dict: Maximum correlation, its lag, z-score, corrected p-value and pass/fail.
+    """
+    try:
+        packed_a, n_a = pack_bits(bits_a)
+        packed_b, n_b = pack_bits(bits_b)
+        n = min(n_a, n_b)
+        max_lag = min(max_lag, n - 1)
+        if n < 100:
+            return {"error": "Sequences too short for the cross-correlation test (less than 100 bits)", "passed": False}
+        a = np.unpackbits(packed_a, count=n).astype(np.float64)
+        b = np.unpackbits(packed_b, count=n).astype(np.float64)
+        a -= a.mean()
+        b -= b.mean()
+        sd = np.sqrt(np.mean(a * a) * np.mean(b * b))
+        if sd == 0:
+            return {"error": "A constant stream has no defined correlation", "passed": False}
+        # Padding to n + max_lag keeps the circular wrap-around out of the lags we read.
+        size = fft.next_fast_len(n + max_lag, real=True)
+        corr = fft.irfft(np.conj(fft.rfft(a, size)) * fft.rfft(b, size), size)
+        lags = np.arange(-max_lag, max_lag + 1)
+        # corr[k] = sum_i a[i] * b[i+k]; negative lags sit at the end of the array.
+        c = corr[lags % size]
+        overlap = n - np.abs(lags)
+        r = c / (overlap * sd)
+        z = r * np.sqrt(overlap)
+        best = int(np.argmax(np.abs(z)))
+        p_single = 2 * norm.sf(abs(z[best]))
+        p = float(-np.expm1(len(lags) * np.log1p(-p_single))) if p_single < 1 else 1.0
+        return {
+            'max_correlation': float(r[best]),
+            'lag': int(lags[best]),
+            'z': float(z[best]),
+            'p-value': p,
+            'passed': p > alpha,
+            'max_lag': max_lag,
+            'n': n
+        }
+    except Exception as e:
+        logging.error(f"cross_correlation_test failed: {e}")
+        return {'error': str(e), 'passed': False}
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Startup warm-up of the generator backends.
+
+At startup every configured generator is initialized in parallel, in
+background threads: it is created (opening PyAudio and the audio stream,
+launching a first JVM, ...) and runs a short self-test draw. The app
+reports readiness once every required generator passed, so a load
+balancer routes traffic only to warmed-up instances; optional generators
+are warmed up and reported the same way but do not hold readiness back.
+A failed generator is retried a few times, then reported as failed and
+checked again periodically in the background, so a device that comes up
+later is picked up without a restart.
+"""
+
+import logging
+import threading
+import time
+
+def self_test(generator_factory, name, draws=16, upper_bound=(1 << 16) - 1):
+    """
+    Creates a generator and checks a short draw: every value must lie in
+    [0, upper_bound] and the draws must not all be equal (the generators
+    return 0 when their source fails).
+
+    Raises:
+        RuntimeError: If the draw fails the checks.
+    """
+    generator = generator_factory(name)
+    try:
+        values = [int(v) for v in generator.generate_many(upper_bound, draws)]
+    finally:
+        if hasattr(generator, 'close'):
+            generator.close()
+    if any(not 0 <= v <= upper_bound for v in values):
+        raise RuntimeError(f"self-test value out of range [0, {upper_bound}]")
+    if draws > 1 and len(set(values)) == 1:
+        raise RuntimeError(f"self-test draws were all {values[0]}")
+
+class Warmup:
+    """
+    Warms up generators in parallel. check(name) initializes and tests one
+    generator, raising on failure; it is retried up to `attempts` times,
+    retry_seconds apart, and after that every recheck_seconds until it
+    passes. Readiness needs the `required` generators only (default: all).
+    """
+    def __init__(self, names, check, required=None, attempts=3, retry_seconds=5.0, recheck_seconds=60.0):
+        self.names = list(names)
+        self.required = set(self.names if required is None else required)
+        unknown = self.required - set(self.names)
+        if unknown:
+            raise ValueError(f"Unknown required generators: {', '.join(sorted(unknown))}")
+        self.check = check
+        self.attempts = attempts
+        self.retry_seconds = retry_seconds
+        self.recheck_seconds = recheck_seconds
+        self._state = {name: {'status': 'pending', 'required': name in self.required, 'attempts': 0,
+                              'seconds': None, 'error': None}
+                       for name in self.names}
+        self._lock = threading.Lock()
+        self._pending = len(self.names)  # generators still in their first round of attempts
+        self._done = threading.Event()
+        self._stopping = threading.Event()
+        self.started = None
+
+    def start(self):
+        """Starts the warm-up in the background, one thread per generator; returns at once."""
+        self.started = time.time()
+        if not self.names:
+            self._done.set()
+        for name in self.names:
+            threading.Thread(target=self._warm, args=(name,), daemon=True, name=f"warmup-{name}").start()
+        return self
+
+    def stop(self):
+        """Ends the background retries of failed generators."""
+        self._stopping.set()
+
+    def _first_round_over(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._done.set()
+
+    def _warm(self, name):
+        attempt = 0
+        while not self._stopping.is_set():
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                self.check(name)
+            except Exception as e:
+                logging.error(f"Warm-up of {name} failed (attempt {attempt}): {e}")
+                failed = attempt >= self.attempts
+                with self._lock:
+                    self._state[name].update(attempts=attempt, error=str(e),
+                                             status='failed' if failed else 'retrying')
+                if attempt == self.attempts:
+                    self._first_round_over()
+                self._stopping.wait(self.recheck_seconds if failed else self.retry_seconds)
+                continue
+            with self._lock:
+                self._state[name].update(status='ready', attempts=attempt, error=None,
+                                         seconds=time.perf_counter() - start)
+            if attempt <= self.attempts:
+                self._first_round_over()
+            return
+
+    def wait(self, timeout=None):
+        """Blocks until every generator is ready or has failed its first attempts; returns whether it did."""
+        return self._done.wait(timeout)
+
+    @property
+    def ready(self):
+        """True once every required generator passed its self-test."""
+        with self._lock:
+            return all(self._state[name]['status'] == 'ready' for name in self.required)
+
+    def status(self):
+        """
+        Readiness, elapsed time and, per generator, its state, whether it is
+        required, attempts, warm-up time and last error.
+        """
+        with self._lock:
+            generators = {name: dict(state) for name, state in self._state.items()}
+        return {
+            'ready': all(generators[name]['status'] == 'ready' for name in self.required),
+            'finished': self._done.is_set(),
+            'elapsed_seconds': time.time() - self.started if self.started else 0.0,
+            'generators': generators
+        }